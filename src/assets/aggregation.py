@@ -0,0 +1,189 @@
+"""
+Aggregating the prices of an asset's sources into the value it reports
+
+aggregate works on the fixed-point integer prices of one pair and stays exact:
+median, weighted_median and mad pick one of the prices, the mean of two middle
+prices and the means are rounded down with integer division. aggregate_matrix
+runs the same methods with NumPy over a matrix of prices, one row per pair and
+one column per source (nan where a source has no price), to aggregate many pairs
+in one pass when float64 precision (scaled prices below 2**53) is enough:
+
+- median: the middle price, the mean of the two middle prices for an even count
+- trimmed_mean: the mean after dropping `trim` of the prices at each end
+- mad: the median of the prices within `mad_threshold` median absolute deviations
+  of the median, so a broken source can't pull the value
+- weighted_median: the price where the cumulative source weight reaches half
+- weighted_mean: the weighted mean, e.g. by exchange volume
+
+weights are set per source in config.yml (`weight`, 1 by default).
+"""
+from fractions import Fraction
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+METHODS = ("median", "trimmed_mean", "mad", "weighted_median", "weighted_mean")
+
+# fraction of the prices dropped at each end by trimmed_mean
+TRIM = 0.2
+
+# median absolute deviations from the median a price is kept within by mad
+MAD_THRESHOLD = 3.0
+
+# scales the median absolute deviation to the standard deviation of normally distributed prices
+MAD_SCALE = 1.4826
+
+
+def aggregate_matrix(
+    prices: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    method: str = "median",
+    trim: float = TRIM,
+    mad_threshold: float = MAD_THRESHOLD,
+) -> np.ndarray:
+    """
+    Aggregates every row of a matrix of prices
+
+    Args:
+        prices (np.ndarray): pairs x sources, nan where a source has no price
+        weights (np.ndarray): weight of every price (or every source, broadcast over the pairs), 1 if not given
+        method (str): one of METHODS
+        trim (float): fraction dropped at each end by trimmed_mean
+        mad_threshold (float): deviations from the median kept by mad
+    Returns:
+        np.ndarray: the value of every pair, nan for pairs without prices
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    valid = ~np.isnan(prices)
+    weights = (
+        np.ones_like(prices) if weights is None else np.broadcast_to(np.asarray(weights, np.float64), prices.shape)
+    )
+    weights = np.where(valid, weights, 0.0)
+    empty = ~valid.any(axis=1)
+    # rows without prices are aggregated over a placeholder and set to nan at the end
+    prices = np.where(empty[:, None], 0.0, prices)
+
+    if method == "median":
+        values = np.nanmedian(prices, axis=1)
+    elif method == "trimmed_mean":
+        values = _trimmed_mean(prices, trim)
+    elif method == "mad":
+        values = _mad_median(prices, mad_threshold)
+    elif method == "weighted_median":
+        values = _weighted_median(prices, weights)
+    elif method == "weighted_mean":
+        total = weights.sum(axis=1)
+        values = np.nansum(prices * weights, axis=1) / np.where(total > 0, total, np.nan)
+    else:
+        raise ValueError(f"unknown aggregation method {method}, expected one of {METHODS}")
+
+    return np.where(empty, np.nan, values)
+
+
+def aggregate(
+    prices: Sequence[int],
+    weights: Optional[Sequence[float]] = None,
+    method: str = "median",
+    trim: float = TRIM,
+    mad_threshold: float = MAD_THRESHOLD,
+) -> int:
+    """
+    Aggregates the integer prices of one pair exactly, with the methods of aggregate_matrix
+
+    Args:
+        prices (list): the fixed-point prices of the sources
+        weights (list): weight of every price, 1 if not given
+        method (str): one of METHODS
+        trim (float): fraction dropped at each end by trimmed_mean
+        mad_threshold (float): deviations from the median kept by mad
+    Returns:
+        int: the aggregated price, rounded down, raises ValueError if there's none
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown aggregation method {method}, expected one of {METHODS}")
+    prices = [int(price) for price in prices]
+    weights = [1] * len(prices) if weights is None else list(weights)
+    if not prices:
+        raise ValueError(f"no price to aggregate with {method}")
+
+    if method == "median":
+        return _median(sorted(prices))
+    if method == "trimmed_mean":
+        ordered = sorted(prices)
+        cut = int(len(ordered) * trim)
+        end = len(ordered) - cut
+        kept = ordered[cut:end]
+        if not kept:
+            raise ValueError(f"no price left to aggregate after trimming {trim} at each end")
+        return sum(kept) // len(kept)
+    if method == "mad":
+        ordered = sorted(prices)
+        median = _median_fraction(ordered)
+        mad = _median_fraction(sorted(abs(price - median) for price in ordered))
+        limit = Fraction(mad_threshold) * Fraction(MAD_SCALE) * mad
+        return _median([price for price in ordered if abs(price - median) <= limit])
+    if method == "weighted_median":
+        return _weighted_median_price(prices, weights)
+
+    # weighted_mean, exact over the binary values of the weights
+    total = sum(Fraction(weight) for weight in weights)
+    if total <= 0:
+        raise ValueError(f"no weight to aggregate with {method}")
+    return sum(price * Fraction(weight) for price, weight in zip(prices, weights)) // total
+
+
+def _median(ordered: List[int]) -> int:
+    """the middle of sorted integer prices, the mean of the two middle ones rounded down for an even count"""
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) // 2
+
+
+def _weighted_median_price(prices: List[int], weights: List[float]) -> int:
+    """the lowest price where the cumulative weight reaches half of the total"""
+    pairs = sorted(zip(prices, weights), key=lambda pair: pair[0])
+    half = sum(Fraction(weight) for _, weight in pairs) / 2
+    cumulative = Fraction(0)
+    for price, weight in pairs:
+        cumulative += Fraction(weight)
+        if cumulative >= half:
+            return price
+    return pairs[-1][0]
+
+
+def _median_fraction(ordered: Sequence) -> Fraction:
+    """the median of sorted prices or deviations as a fraction, .5 for an even count is kept"""
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return Fraction(ordered[middle])
+    return Fraction(ordered[middle - 1] + ordered[middle], 2)
+
+
+def _trimmed_mean(prices: np.ndarray, trim: float) -> np.ndarray:
+    # nan sorts last, so every row's prices are its first `count` columns
+    ordered = np.sort(prices, axis=1)
+    count = (~np.isnan(prices)).sum(axis=1)
+    cut = np.floor(count * trim).astype(int)
+    column = np.arange(prices.shape[1])
+    kept = (column >= cut[:, None]) & (column < (count - cut)[:, None])
+    return np.where(kept, ordered, 0.0).sum(axis=1) / kept.sum(axis=1)
+
+
+def _mad_median(prices: np.ndarray, mad_threshold: float) -> np.ndarray:
+    median = np.nanmedian(prices, axis=1)[:, None]
+    deviation = np.abs(prices - median)
+    mad = np.nanmedian(deviation, axis=1)[:, None]
+    kept = deviation <= mad_threshold * MAD_SCALE * mad
+    return np.nanmedian(np.where(kept, prices, np.nan), axis=1)
+
+
+def _weighted_median(prices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    order = np.argsort(prices, axis=1)
+    ordered = np.take_along_axis(prices, order, axis=1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    half = cumulative[:, -1:] / 2
+    middle = np.argmax(cumulative >= half, axis=1)
+    return np.take_along_axis(ordered, middle[:, None], axis=1)[:, 0]
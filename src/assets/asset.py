@@ -2,25 +2,65 @@
 Asset class
 """
 import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
-import requests
+from src.assets.aggregation import aggregate
+from src.assets.aggregation import MAD_THRESHOLD
+from src.assets.aggregation import TRIM
+from src.assets.fixed_point import DECIMALS
+from src.assets.fixed_point import encode_value
+from src.assets.fixed_point import parse_fixed
+from src.utils.extract import compile_path
+from src.utils.source_cache import DEFAULT_STALE_TTL
+from src.utils.source_cache import DEFAULT_TTL
+from src.utils.source_cache import get_source_cache
+
+# seconds a source is given to respond, unless its config sets a `timeout`
+FETCH_TIMEOUT = 5
 
 
 class Asset:
-    def __init__(self, query_id, sources: Dict):
+    def __init__(
+        self,
+        query_id,
+        sources: Dict,
+        fetch_timeout: float = FETCH_TIMEOUT,
+        aggregation: Optional[Dict] = None,
+        decimals: int = DECIMALS,
+    ):
         """
         Inputs:
             asset (str): name of asset as represe
+            fetch_timeout (float): default deadline in seconds for each source
+            aggregation (dict): `method` the source prices are aggregated with (median by default),
+                and its `trim` or `mad_threshold`, see src.assets.aggregation
+            decimals (int): decimals of the prices reported, see src.assets.fixed_point
         """
         self.query_id = (query_id,)
         self.price = (0,)
         self.string_price = ("0",)
         self.timestamp = (0,)
-        self.last_pushed_price = (0,)
+        self.last_pushed_price = 0
         self.time_last_pushed = 0
-        self.precision = 1e6
+        self.decimals = decimals
+        self.precision = 10**decimals
+        self.encoded_price = encode_value(0)
         self.sources = sources
+        self.fetch_timeout = fetch_timeout
+        self.aggregation = dict(aggregation or {})
+        self.aggregation.setdefault("method", "median")
+        self.aggregation.setdefault("trim", TRIM)
+        self.aggregation.setdefault("mad_threshold", MAD_THRESHOLD)
+
+        # sources on a shared endpoint (coingecko simple/price) are fetched in one request for every asset
+        for source in sources.values():
+            if "url" in source:
+                get_source_cache().register(source["url"])
 
     def add_api_endpoint(self, api):
         self.api_list.append(api)
@@ -28,23 +68,66 @@ class Asset:
     def update_price(self):
         self.timestamp = int(time.time())
         self.price = int(self.medianize())
+        # encoded once, as sent in the report and stored as last_value
+        self.encoded_price = encode_value(self.price)
 
     def medianize(self):
         """
         Medianizes price of an asset from a selection of centralized exchange APIs
         """
-        final_results = []
-
         if not self.sources:
             raise ValueError("Cannot medianize prices with data sources. No APIs added for asset.")
 
-        for source in self.sources.keys():
-            price = self.fetch_price_from_sources(self.sources[source])
-            final_results.append(price)
+        final_results = self.fetch_source_prices()
+
+        if not final_results:
+            raise ValueError("Cannot medianize prices. No data source responded before its deadline.")
+
+        weights = [self.sources[name].get("weight", 1) for name in final_results]
+        return aggregate(list(final_results.values()), weights, **self.aggregation)
 
-        # sort final results
-        final_results.sort()
-        return final_results[len(final_results) // 2]
+    def fetch_prices(self) -> List[int]:
+        """Fetches prices from all sources in parallel, see fetch_source_prices"""
+        return list(self.fetch_source_prices().values())
+
+    def fetch_source_prices(self) -> Dict[str, int]:
+        """
+        Fetches prices from all sources in parallel, by source name
+
+        each source has its own deadline (`timeout` in its config, else `fetch_timeout`).
+        sources that fail or miss their deadline are left out, so this returns
+        after the slowest allowed source rather than after all of them in sequence
+        """
+        deadlines = {name: source.get("timeout", self.fetch_timeout) for name, source in self.sources.items()}
+
+        executor = ThreadPoolExecutor(max_workers=len(self.sources))
+        futures = {executor.submit(self._timed_fetch, source): name for name, source in self.sources.items()}
+        done, not_done = wait(futures, timeout=max(deadlines.values()))
+        # don't block on sources that missed the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        prices = {}
+        for future in done:
+            name = futures[future]
+            if future.exception() is not None:
+                print(f"failed to fetch price from {name}: {future.exception()}")
+                continue
+            price, elapsed = future.result()
+            if elapsed > deadlines[name]:
+                print(f"dropped price from {name}: responded after {elapsed:.2f}s")
+                continue
+            prices[name] = price
+
+        for future in not_done:
+            print(f"dropped price from {futures[future]}: no response after {deadlines[futures[future]]}s")
+
+        return prices
+
+    def _timed_fetch(self, source: Dict) -> Tuple[int, float]:
+        """fetches a price and the seconds it took to arrive"""
+        start = time.monotonic()
+        price = self.fetch_price_from_sources(source)
+        return price, time.monotonic() - start
 
     def fetch_price_from_sources(self, source: Dict) -> int:
         """
@@ -53,15 +136,19 @@ class Asset:
         Input: (list of str) public api endpoint with any necessary json parsing keywords
         """
 
-        # Request JSON from public api endpoint
-        rsp = requests.get(source["url"]).json()
+        # Request JSON from public api endpoint, or reuse a recent response to the same url
+        rsp = get_source_cache().get_json(
+            source["url"],
+            timeout=source.get("timeout", self.fetch_timeout),
+            ttl=source.get("ttl", DEFAULT_TTL),
+            stale_ttl=source.get("stale_ttl", DEFAULT_STALE_TTL),
+        )
 
-        # Parse through json with pre-written keywords
-        for keyword in source["keywords"]:
-            rsp = rsp[keyword]
+        # Parse through json with pre-written keywords, compiled on the first fetch of the path
+        rsp = compile_path(source["keywords"])(rsp)
 
-        # return price (last remaining element of the json)
-        return int(float(rsp) * self.precision)
+        # return price (last remaining element of the json), scaled to the asset's decimals without a float
+        return parse_fixed(rsp, self.decimals)
 
     def __str__(self):
         return f"""Asset: {self.name} query_id: {self.query_id} price: {self.price} timestamp: {self.timestamp}"""
@@ -0,0 +1,56 @@
+"""
+Fixed-point prices
+
+source prices are parsed from their text straight into integers scaled by
+10**decimals (the query_id's precision), never through a float, so every
+source truncates the same way. the value reported is encoded once to the 8
+byte big-endian uint64 the feed contract stores as last_value:
+
+    parse_fixed("30100.123456789", 6) == 30100123456
+    encode_value(30100123456) == (30100123456).to_bytes(8, "big")
+"""
+from decimal import Decimal
+from decimal import ROUND_DOWN
+from typing import Union
+
+# decimals of a query_id's values unless its feed in config.yml sets `decimals`
+DECIMALS = 6
+
+UINT64_MAX = 2**64 - 1
+
+
+def parse_fixed(value: Union[str, int, float, Decimal], decimals: int = DECIMALS) -> int:
+    """
+    Scales a price to an integer of `decimals` decimals, rounding toward zero
+
+    Args:
+        value: the price as a source returns it, a decimal string or a json number
+        decimals (int): decimals kept
+    Returns:
+        int: value * 10**decimals, truncated
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"not a price: {value!r}")
+    if isinstance(value, int):
+        return value * 10**decimals
+    # a float's repr is the shortest text that reads back as it, i.e. the number in the json
+    text = repr(value) if isinstance(value, float) else str(value).strip()
+
+    if "e" not in text and "E" not in text:
+        whole, _, fraction = text.partition(".")
+        digits = (fraction + "0" * decimals)[:decimals]
+        if whole.lstrip("+-").isdigit() and (not fraction or fraction.isdigit()):
+            return int(whole + digits)
+
+    try:
+        scaled = Decimal(text).scaleb(decimals).to_integral_value(rounding=ROUND_DOWN)
+        return int(scaled)
+    except (ArithmeticError, ValueError):
+        raise ValueError(f"not a price: {value!r}") from None
+
+
+def encode_value(value: int) -> bytes:
+    """the 8 byte big-endian encoding of a value, as the feed contract stores it"""
+    if not 0 <= value <= UINT64_MAX:
+        raise ValueError(f"value {value} doesn't fit in a uint64")
+    return value.to_bytes(8, "big")
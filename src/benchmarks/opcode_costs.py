@@ -0,0 +1,119 @@
+"""
+Opcode costs of the contract methods
+
+profiles stake, tip and report on the AVM simulator, report once for every
+number of fresh feeds the medianizer's get_values has to sort (1 to --feed-count), and
+prints the cost of every app call, pyteal helper and TEAL line, with the
+pooled budget each group has left. compare the --json output of two commits
+to see which contract changes save budget (and the fees of extra app calls):
+
+    python -m src.benchmarks.opcode_costs
+    python -m src.benchmarks.opcode_costs --json -o costs.json
+    python -m src.benchmarks.opcode_costs --median-strategy network
+    python -m src.benchmarks.opcode_costs --median-strategy network --feed-count 6
+"""
+import argparse
+import json
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+from algosdk import account
+
+from src.benchmarks.report_path import deploy_simulated
+from src.benchmarks.report_path import TIMESTAMP_OFFSET
+from src.contracts.medianizer_contract import FEED_COUNT
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.profiler import Profiler
+
+
+def profile(scenario: Callable[[], Any], names: Dict[bytes, str], scripts: Scripts) -> Profiler:
+    """runs a scenario with a fresh profiler tracing the simulator"""
+    profiler = Profiler(names)
+    scripts.client.ledger.tracer = profiler
+    try:
+        scenario()
+    finally:
+        scripts.client.ledger.tracer = None
+    return profiler
+
+
+def run(
+    query_id: str = "BTCUSD",
+    timestamp_freshness: int = 3600,
+    median_strategy: str = "legacy",
+    feed_count: int = FEED_COUNT,
+) -> Dict[str, Profiler]:
+    """
+    Profiles every scenario on a fresh simulator
+
+    Args:
+        median_strategy (str): median subroutine the medianizer is compiled with
+        feed_count (int): number of feeds to deploy
+
+    Returns:
+        dict: scenario name to its profile
+    """
+    scripts = deploy_simulated(query_id, timestamp_freshness, median_strategy, feed_count)
+    ledger = scripts.client.ledger
+    names = {
+        ledger.apps[scripts.feed_app_id].approval.bytecode: "feed",
+        ledger.apps[scripts.medianizer_app_id].approval.bytecode: "medianizer",
+    }
+
+    scripts.tipper = Account(account.generate_account()[0])
+    ledger.fund(scripts.tipper.addr, 10**12)
+
+    # a staked reporter on every feed, the first one is profiled
+    reporters = [scripts]
+    for feed_id in scripts.feeds[1:]:
+        reporter = Account(account.generate_account()[0])
+        ledger.fund(reporter.addr, 10**12)
+        feed = Scripts(
+            scripts.client, reporter, reporter, scripts.governance_address, feed_id, scripts.medianizer_app_id
+        )
+        feed.feeds = scripts.feeds
+        reporters.append(feed)
+
+    profiles = {"stake": profile(reporters[1].stake, names, scripts)}
+    for feed in reporters[2:]:
+        feed.stake()
+    profiles["tip"] = profile(lambda: reporters[0].tip(1_000_000), names, scripts)
+
+    query = query_id.encode()
+    for fresh in range(1, feed_count + 1):
+        ledger.advance(timestamp_freshness + 1)
+        for feed in reporters[1:fresh]:
+            feed.report(query, 1000 + fresh, ledger.timestamp - TIMESTAMP_OFFSET)
+        profiles[f"report ({fresh} fresh)"] = profile(
+            lambda: reporters[0].report(query, 2000, ledger.timestamp - TIMESTAMP_OFFSET), names, scripts
+        )
+
+    return profiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the opcode costs of the contracts")
+    parser.add_argument("-qid", "--query-id", type=str, default="BTCUSD", help="query_id to deploy the feeds with")
+    parser.add_argument(
+        "-ms", "--median-strategy", type=str, default="legacy", help="median subroutine to compile the medianizer with"
+    )
+    parser.add_argument("-fc", "--feed-count", type=int, default=FEED_COUNT, help="number of feeds to deploy")
+    parser.add_argument("-n", "--hot-lines", type=int, default=10, help="most expensive TEAL lines to list")
+    parser.add_argument("--json", action="store_true", help="print the full profiles as JSON")
+    parser.add_argument("-o", "--output", type=str, help="also write the JSON profiles to this file")
+    args = parser.parse_args()
+
+    profiles = run(args.query_id, median_strategy=args.median_strategy, feed_count=args.feed_count)
+    as_dict = {scenario: profiler.asDict() for scenario, profiler in profiles.items()}
+    if args.json:
+        print(json.dumps(as_dict, indent=2))
+    else:
+        for scenario, profiler in profiles.items():
+            print(f"== {scenario}")
+            print(profiler.report(args.hot_lines))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(as_dict, f, indent=2)
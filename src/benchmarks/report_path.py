@@ -0,0 +1,273 @@
+"""
+Benchmarks of the report hot path
+
+times every step of reporting a value, the steps FeedReporter.poll and
+Scripts.report take: fetch (Asset.update_price), build (Scripts.report_txn),
+sign, submit, confirm (waitForTransaction) and read (getAppGlobalState of the
+medianizer).
+
+prices come from the recorded responses in src/benchmarks/fixtures, served
+over local HTTP through the shared session, and transactions go to the
+in-process AVM simulator, so runs are repeatable and measure our own code
+rather than exchange or node latency (--latency-scale 1 replays the recorded
+exchange latencies). results are printed as JSON tagged with the git commit:
+
+    python -m src.benchmarks.report_path -i 200 -o before.json
+    python -m src.benchmarks.report_path -i 200 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from algosdk import account
+from algosdk.future.transaction import Multisig
+
+from src.assets.asset import Asset
+from src.contracts import contracts
+from src.contracts import medianizer_contract
+from src.contracts.medianizer_contract import FEED_COUNT
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.simulator import Ledger
+from src.utils.testing.simulator import SimulatedAlgod
+from src.utils.util import getAppGlobalState
+from src.utils.util import waitForTransaction
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+STAGES = ["fetch", "build", "sign", "submit", "confirm", "read"]
+
+# same offset the reporter timestamps values with
+TIMESTAMP_OFFSET = 50
+
+
+def load_fixtures(query_id: str) -> Dict[str, Dict[str, Any]]:
+    """recorded source configs and responses of a query_id"""
+    with open(FIXTURES_DIR / f"{query_id}.json") as f:
+        return json.load(f)
+
+
+class RecordedHTTPServer:
+    """serves recorded exchange responses on localhost, one path per source"""
+
+    def __init__(self, fixtures: Dict[str, Dict[str, Any]], latency_scale: float = 0) -> None:
+        """
+        Args:
+            fixtures (dict): recorded sources, see load_fixtures
+            latency_scale (float): fraction of each recorded latency to wait before responding
+        """
+        bodies = {f"/{name}": json.dumps(fixture["body"]).encode() for name, fixture in fixtures.items()}
+        delays = {f"/{name}": fixture.get("latency", 0) * latency_scale for name, fixture in fixtures.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive, so the shared session's connection pool is exercised like in production
+            protocol_version = "HTTP/1.1"
+            # headers and body are written separately, don't let them wait on delayed acks
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                body = bodies.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                time.sleep(delays[self.path])
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.fixtures = fixtures
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "RecordedHTTPServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        """the recorded source configs, pointed at this server"""
+        port = self.server.server_address[1]
+        return {
+            # not cached, so every iteration measures the requests
+            name: {"url": f"http://127.0.0.1:{port}/{name}", "keywords": fixture["keywords"], "ttl": 0, "stale_ttl": 0}
+            for name, fixture in self.fixtures.items()
+        }
+
+
+def deploy_simulated(
+    query_id: str, timestamp_freshness: int = 3600, median_strategy: str = "legacy", feed_count: int = FEED_COUNT
+) -> Scripts:
+    """deploys feeds and a medianizer on a fresh simulator, returns scripts for a staked reporter"""
+    client = SimulatedAlgod(Ledger())
+    for program in (
+        contracts.approval_program(feed_count),
+        contracts.clear_state_program(),
+        medianizer_contract.approval_program(median_strategy, feed_count),
+        medianizer_contract.clear_state_program(),
+    ):
+        client.ledger.registerContract(program)
+
+    signers = [Account(account.generate_account()[0]) for _ in range(2)]
+    reporter = Account(account.generate_account()[0])
+    governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in signers])
+    for address in (reporter.addr, governance.address()):
+        client.ledger.fund(address, 10**12)
+
+    deployer = Scripts(
+        client, None, None, governance.address(), contract_count=feed_count, median_strategy=median_strategy
+    )
+    feeds, medianizer_id = deployer.deploy_batched(
+        query_id, "benchmark", timestamp_freshness, [signer.getPrivateKey() for signer in signers]
+    )
+
+    scripts = Scripts(client, None, reporter, governance.address(), feeds[0], medianizer_id)
+    scripts.feeds = feeds
+    scripts.stake()
+    return scripts
+
+
+def run(iterations: int, query_id: str = "BTCUSD", latency_scale: float = 0) -> Dict[str, List[float]]:
+    """
+    Reports `iterations` times, timing each stage
+
+    Returns:
+        dict: seconds each stage took, per iteration
+    """
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    with RecordedHTTPServer(load_fixtures(query_id), latency_scale) as server:
+        asset = Asset(query_id=query_id, sources=server.sources())
+        scripts = deploy_simulated(query_id)
+        client = scripts.client
+
+        # the first report warms up connections and caches and isn't counted
+        for i in range(iterations + 1):
+            timings = {}
+
+            start = time.perf_counter()
+            asset.update_price()
+            timings["fetch"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            txn = scripts.report_txn(query_id.encode(), asset.encoded_price, int(time.time() - TIMESTAMP_OFFSET))
+            timings["build"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            signed = txn.sign(scripts.reporter.getPrivateKey())
+            timings["sign"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            txid = client.send_transaction(signed)
+            timings["submit"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            waitForTransaction(client, txid)
+            timings["confirm"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            state = getAppGlobalState(client, scripts.medianizer_app_id)
+            timings["read"] = time.perf_counter() - start
+
+            if state[b"median"] != asset.price:
+                raise RuntimeError(f"medianizer holds {state[b'median']}, reported {asset.price}")
+            if i > 0:
+                for stage, seconds in timings.items():
+                    samples[stage].append(seconds)
+
+    return samples
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """milliseconds per stage: mean, median, p95, min and max"""
+    totals = [sum(stage_samples) for stage_samples in zip(*samples.values())]
+    summary = {}
+    for stage, values in list(samples.items()) + [("total", totals)]:
+        ordered = sorted(values)
+        summary[stage] = {
+            "mean_ms": statistics.mean(ordered) * 1000,
+            "median_ms": statistics.median(ordered) * 1000,
+            "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+            "min_ms": ordered[0] * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    """the commit the benchmark ran on, None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=FIXTURES_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(iterations: int, query_id: str = "BTCUSD", latency_scale: float = 0) -> Dict[str, Any]:
+    """runs the benchmark and returns its results with the metadata needed to compare runs"""
+    return {
+        "commit": git_commit(),
+        "time": int(time.time()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "query_id": query_id,
+        "iterations": iterations,
+        "latency_scale": latency_scale,
+        "stages": summarize(run(iterations, query_id, latency_scale)),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> str:
+    """a table of the median time of every stage against a baseline run"""
+    lines = [f"{'stage':<10}{'baseline ms':>14}{'current ms':>14}{'change':>10}"]
+    for stage, stats in result["stages"].items():
+        before = baseline["stages"].get(stage, {}).get("median_ms")
+        after = stats["median_ms"]
+        if not before:
+            lines.append(f"{stage:<10}{'-':>14}{after:>14.3f}{'-':>10}")
+            continue
+        lines.append(f"{stage:<10}{before:>14.3f}{after:>14.3f}{(after - before) / before:>+10.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the report hot path")
+    parser.add_argument("-i", "--iterations", type=int, default=100, help="reports to time")
+    parser.add_argument("-qid", "--query-id", type=str, default="BTCUSD", help="query_id with recorded fixtures")
+    parser.add_argument(
+        "--latency-scale", type=float, default=0, help="fraction of the recorded exchange latency to replay"
+    )
+    parser.add_argument("-o", "--output", type=str, help="also write the results to this file")
+    parser.add_argument("--compare", type=str, help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    result = benchmark(args.iterations, args.query_id, args.latency_scale)
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(result, json.load(f)))
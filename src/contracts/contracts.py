@@ -1,9 +1,10 @@
 from pyteal import *
 
+from .medianizer_contract import MAX_FEED_COUNT
 from .methods import *
 
 
-def approval_program():
+def approval_program(feed_count: int = FEED_COUNT, multi_query: bool = False, history_size: int = 0):
 
     """
     - tipper creates contract
@@ -15,11 +16,20 @@ def approval_program():
     - tipper (ideally governance?) approves or rejects report
     - contract sends reward to reporter
     - governance can slash a reporter/report
+
+    Args:
+        feed_count (int): number of feeds reporting to the same medianizer, up to MAX_FEED_COUNT
+        multi_query (bool): report to a medianizer serving many query_ids, see multi_medianizer_contract
+        history_size (int): number of past reports to keep on chain, up to MAX_HISTORY_SIZE, 0 keeps none
     """
+    if not 1 <= feed_count <= MAX_FEED_COUNT:
+        raise ValueError(f"feed_count must be between 1 and {MAX_FEED_COUNT}, got {feed_count}")
+    if not 0 <= history_size <= MAX_HISTORY_SIZE:
+        raise ValueError(f"history_size must be between 0 and {MAX_HISTORY_SIZE}, got {history_size}")
 
     program = Cond(
         [Txn.application_id() == Int(0), create()],
-        [Txn.on_completion() == OnComplete.NoOp, handle_method()],
+        [Txn.on_completion() == OnComplete.NoOp, handle_method(feed_count, multi_query, history_size)],
         [Txn.on_completion() == OnComplete.DeleteApplication, Return(is_governance)],
         [Txn.on_completion() == OnComplete.UpdateApplication, Return(is_governance)],
         # [Txn.on_completion() == OnComplete.CloseOut, close()]
@@ -1,3 +1,7 @@
+from typing import Callable
+from typing import List
+from typing import Tuple
+
 from pyteal import *
 
 """
@@ -5,30 +9,234 @@ Medianizer for feed i.e. BTC/USD
 
 """
 
+# feeds a medianizer takes values from by default
+FEED_COUNT = 5
+
+# a report references every feed and the medianizer as foreign apps, plus the governance
+# account it pays, within the 8 foreign references algod allows per app call
+MAX_FEED_COUNT = 6
+
+
+def Medianizer(a, b, c, d, e):
+    """
+    function for getting the middle value
+
+    sorts values one at a time
+    until all values are sorted
+
+    if number of values is odd, middle num is picked
+    else divides middle two values and divides by 2
+    """
+
+    tmp = ScratchVar(TealType.uint64)
+
+    sort_1 = Seq(
+        tmp.store(a),
+        If(And(b > a, b > c, b > d, b > e))
+        .Then(Seq(a.slot.store(b), b.slot.store(tmp.load())))
+        .ElseIf(And(c > b, c > a, c > d, c > e))
+        .Then(Seq(a.slot.store(c), c.slot.store(tmp.load())))
+        .ElseIf(And(d > b, d > a, d > c, d > e))
+        .Then(Seq(a.slot.store(d), d.slot.store(tmp.load())))
+        .ElseIf(And(e > b, e > a, e > c, e > d))
+        .Then(Seq(a.slot.store(e), e.slot.store(tmp.load()))),
+    )
+
+    sort_2 = Seq(
+        tmp.store(b),
+        If(And(c > b, c > d, c > e))
+        .Then(Seq(b.slot.store(c), c.slot.store(tmp.load())))
+        .ElseIf(And(d > b, d > c, d > e))
+        .Then(Seq(b.slot.store(d), d.slot.store(tmp.load())))
+        .ElseIf(And(e > b, e > c, e > d))
+        .Then(Seq(b.slot.store(e), e.slot.store(tmp.load()))),
+    )
+    sort_3 = Seq(
+        tmp.store(c),
+        If(And(d > c, d > e))
+        .Then(Seq(c.slot.store(d), d.slot.store(tmp.load())))
+        .ElseIf(And(e > c, e > d))
+        .Then(Seq(c.slot.store(e), e.slot.store(tmp.load()))),
+    )
+
+    sort_4 = Seq(tmp.store(d), If(e > d).Then(Seq(d.slot.store(e), e.slot.store(tmp.load()))))
+
+    i = ScratchVar(TealType.uint64)
+    value_count = Seq(
+        i.store(Int(0)),
+        If(a > Int(0), i.store(i.load() + Int(1))),
+        If(b > Int(0), i.store(i.load() + Int(1))),
+        If(c > Int(0), i.store(i.load() + Int(1))),
+        If(d > Int(0), i.store(i.load() + Int(1))),
+        If(e > Int(0), i.store(i.load() + Int(1))),
+    )
+
+    middle_value = Seq(
+        If(i.load() == Int(5))
+        .Then(c.slot.load())
+        .ElseIf(i.load() == Int(4))
+        .Then(Div((b.slot.load() + c.slot.load()), Int(2)))
+        .ElseIf(i.load() == Int(3))
+        .Then(b.slot.load())
+        .ElseIf(i.load() == Int(2))
+        .Then(Div((a.slot.load() + b.slot.load()), Int(2)))
+        .ElseIf(i.load() == Int(1))
+        .Then(a.slot.load())
+    )
+    return Seq(sort_1, sort_2, sort_3, sort_4, value_count, middle_value)
+
+
+def sorting_network(n: int) -> List[Tuple[int, int]]:
+    """
+    compare-and-swap pairs of Batcher's odd-even merge sort for n values,
+    the fewest possible for n <= 6 (1, 3, 5, 9 and 12 pairs)
+    """
+    pairs = []
+    p = 1
+    while p < n:
+        k = p
+        while k >= 1:
+            for j in range(k % p, n - k, 2 * k):
+                for i in range(min(k, n - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        pairs.append((i + j, i + j + k))
+            k //= 2
+        p *= 2
+    return pairs
+
+
+def MedianizerNetwork(values: List[Expr]) -> Expr:
+    """
+    function for getting the middle value, same results as Medianizer
+
+    copies the values and sorts them in ascending order with a sorting network,
+    values of 0 (feeds without a fresh value) end up first, so the first value
+    that isn't 0 tells how many values there are
+
+    if number of values is odd, middle num is picked
+    else adds middle two values and divides by 2
+    """
+    n = len(values)
+    sorted_values = [ScratchVar(TealType.uint64) for _ in values]
+    tmp = ScratchVar(TealType.uint64)
+
+    def compare_swap(low, high):
+        return If(low.load() > high.load()).Then(
+            Seq(tmp.store(low.load()), low.store(high.load()), high.store(tmp.load()))
+        )
+
+    def middle_value(first):
+        """median of the sorted values from index first on"""
+        low = first + (n - first - 1) // 2
+        high = first + (n - first) // 2
+        if low == high:
+            return sorted_values[low].load()
+        return Div(sorted_values[low].load() + sorted_values[high].load(), Int(2))
+
+    # like Medianizer, fail when no feed has a fresh value
+    last = sorted_values[-1].load()
+    median = Seq(Assert(last), last)
+    if n > 1:
+        median = If(sorted_values[0].load()).Then(middle_value(0))
+        for first in range(1, n - 1):
+            median = median.ElseIf(sorted_values[first].load()).Then(middle_value(first))
+        median = median.Else(Seq(Assert(last), last))
+
+    return Seq(
+        *[sorted_value.store(value) for sorted_value, value in zip(sorted_values, values)],
+        *[compare_swap(sorted_values[i], sorted_values[j]) for i, j in sorting_network(n)],
+        median,
+    )
+
+
+def validate_price(feed_value: MaybeValue, value: ScratchVar, timestamp_freshness: Expr) -> Expr:
+    """
+    stores the value of a feed's last_value in value,
+    or 0 if the feed has no value or it's older than timestamp_freshness
+    """
+    return Seq(
+        If(feed_value.hasValue())
+        .Then(value.store(ExtractUint64(feed_value.value(), Int(8))))
+        .Else(value.store(Int(0))),
+        If(value.load() > Int(0)).Then(
+            Seq(
+                If(
+                    Minus(Global.latest_timestamp(), ExtractUint64(feed_value.value(), Int(0))) > (timestamp_freshness),
+                    value.store(Int(0)),
+                )
+            )
+        ),
+    )
+
+
+def median_timestamp_of(
+    median: Expr, feed_values: List[MaybeValue], values: List[ScratchVar], store: Callable[[Expr], Expr]
+) -> Expr:
+    """
+    stores (with store) the timestamp of the first feed whose value is the median,
+    or the latest timestamp if none is
+    """
+    set_median_timestamp = If(median == values[0].load()).Then(store(ExtractUint64(feed_values[0].value(), Int(0))))
+    for feed_value, value in zip(feed_values[1:], values[1:]):
+        set_median_timestamp = set_median_timestamp.ElseIf(median == value.load()).Then(
+            store(ExtractUint64(feed_value.value(), Int(0)))
+        )
+    return set_median_timestamp.Else(store(Global.latest_timestamp()))
+
+
+# median implementations the medianizer can be compiled with
+MEDIAN_STRATEGIES = ("legacy", "network")
+
+
+def median_subroutine(median_strategy: str, feed_count: int = FEED_COUNT):
+    """
+    a new median Subroutine for every program built,
+    so its scratch slots are allocated the same way on every build
+
+    Returns:
+        a function of feed_count values that calls the subroutine
+    """
+    if median_strategy not in MEDIAN_STRATEGIES:
+        raise ValueError(f"unknown median_strategy {median_strategy}, expected one of {list(MEDIAN_STRATEGIES)}")
+    if median_strategy == "legacy":
+        if feed_count != FEED_COUNT:
+            raise ValueError(f"the legacy median takes {FEED_COUNT} values, use the network median for {feed_count}")
+        return Subroutine(TealType.uint64)(Medianizer)
+
+    def call(*values):
+        # pyteal subroutines take a fixed number of arguments,
+        # so the subroutine reads the values from the caller's scratch slots instead
+        if len(values) != feed_count:
+            raise ValueError(f"expected {feed_count} values, got {len(values)}")
+        return Subroutine(TealType.uint64, name="MedianizerNetwork")(lambda: MedianizerNetwork(list(values)))()
+
+    return call
+
+
+def approval_program(median_strategy: str = "legacy", feed_count: int = FEED_COUNT):
+    """
+    Args:
+        median_strategy (str): median subroutine to compile with, one of MEDIAN_STRATEGIES
+        feed_count (int): number of feeds the medianizer takes values from, up to MAX_FEED_COUNT
+    """
+    if not 1 <= feed_count <= MAX_FEED_COUNT:
+        raise ValueError(f"feed_count must be between 1 and {MAX_FEED_COUNT}, got {feed_count}")
+    median = median_subroutine(median_strategy, feed_count)
+    feeds = range(1, feed_count + 1)
 
-def approval_program():
     timestamp_freshness = Bytes("timestamp_freshness")
     median_timestamp = Bytes("median_timestamp")
     median_price = Bytes("median")
     query_id = Bytes("query_id")
-    app_1 = Bytes("app_1")
-    app_2 = Bytes("app_2")
-    app_3 = Bytes("app_3")
-    app_4 = Bytes("app_4")
-    app_5 = Bytes("app_5")
+    # app_1, app_2, ... hold the addresses of the feeds
+    app_keys = [Bytes(f"app_{i}") for i in feeds]
 
     # this is the name of variable in feed contract to read from
     last_value = Bytes("last_value")
 
     governance = Bytes("governance")
     is_governance = Txn.sender() == App.globalGet(governance)
-    is_valid_feed = Or(
-        Txn.sender() == App.globalGet(app_1),
-        Txn.sender() == App.globalGet(app_2),
-        Txn.sender() == App.globalGet(app_3),
-        Txn.sender() == App.globalGet(app_4),
-        Txn.sender() == App.globalGet(app_5),
-    )
+    is_valid_feed = Or(*[Txn.sender() == App.globalGet(app_key) for app_key in app_keys])
 
     def create():
         """
@@ -55,23 +263,11 @@ def approval_program():
         0) will always equal "activate_contract"
 
         """
-        addr_1 = AppParam.address(Txn.applications[1])
-        addr_2 = AppParam.address(Txn.applications[2])
-        addr_3 = AppParam.address(Txn.applications[3])
-        addr_4 = AppParam.address(Txn.applications[4])
-        addr_5 = AppParam.address(Txn.applications[5])
+        addresses = [AppParam.address(Txn.applications[i]) for i in feeds]
         return Seq(
             Assert(is_governance),
-            addr_1,
-            addr_2,
-            addr_3,
-            addr_4,
-            addr_5,
-            App.globalPut(app_1, addr_1.value()),
-            App.globalPut(app_2, addr_2.value()),
-            App.globalPut(app_3, addr_3.value()),
-            App.globalPut(app_4, addr_4.value()),
-            App.globalPut(app_5, addr_5.value()),
+            *addresses,
+            *[App.globalPut(app_key, address.value()) for app_key, address in zip(app_keys, addresses)],
             Approve(),
         )
 
@@ -105,173 +301,30 @@ def approval_program():
 
         """
 
-        feed_1_value = App.globalGetEx(Txn.applications[1], last_value)
-        feed_2_value = App.globalGetEx(Txn.applications[2], last_value)
-        feed_3_value = App.globalGetEx(Txn.applications[3], last_value)
-        feed_4_value = App.globalGetEx(Txn.applications[4], last_value)
-        feed_5_value = App.globalGetEx(Txn.applications[5], last_value)
-
-        var1 = ScratchVar(TealType.uint64)
-        var2 = ScratchVar(TealType.uint64)
-        var3 = ScratchVar(TealType.uint64)
-        var4 = ScratchVar(TealType.uint64)
-        var5 = ScratchVar(TealType.uint64)
+        feed_values = [App.globalGetEx(Txn.applications[i], last_value) for i in feeds]
+        values = [ScratchVar(TealType.uint64) for _ in feeds]
 
         validate_prices = Seq(
-            If(feed_1_value.hasValue())
-            .Then(var1.store(ExtractUint64(feed_1_value.value(), Int(8))))
-            .Else(var1.store(Int(0))),
-            If(var1.load() > Int(0)).Then(
-                Seq(
-                    If(
-                        Minus(Global.latest_timestamp(), ExtractUint64(feed_1_value.value(), Int(0)))
-                        > (App.globalGet(timestamp_freshness)),
-                        var1.store(Int(0)),
-                    )
-                )
-            ),
-            If(feed_2_value.hasValue())
-            .Then(var2.store(ExtractUint64(feed_2_value.value(), Int(8))))
-            .Else(var2.store(Int(0))),
-            If(var2.load() > Int(0)).Then(
-                Seq(
-                    If(
-                        Minus(Global.latest_timestamp(), ExtractUint64(feed_2_value.value(), Int(0)))
-                        > (App.globalGet(timestamp_freshness)),
-                        var2.store(Int(0)),
-                    )
-                )
-            ),
-            If(feed_3_value.hasValue())
-            .Then(var3.store(ExtractUint64(feed_3_value.value(), Int(8))))
-            .Else(var3.store(Int(0))),
-            If(var3.load() > Int(0)).Then(
-                Seq(
-                    If(
-                        Minus(Global.latest_timestamp(), ExtractUint64(feed_3_value.value(), Int(0)))
-                        > (App.globalGet(timestamp_freshness)),
-                        var3.store(Int(0)),
-                    )
-                )
-            ),
-            If(feed_4_value.hasValue())
-            .Then(var4.store(ExtractUint64(feed_4_value.value(), Int(8))))
-            .Else(var4.store(Int(0))),
-            If(var4.load() > Int(0)).Then(
-                Seq(
-                    If(
-                        Minus(Global.latest_timestamp(), ExtractUint64(feed_4_value.value(), Int(0)))
-                        > (App.globalGet(timestamp_freshness)),
-                        var4.store(Int(0)),
-                    )
-                )
-            ),
-            If(feed_5_value.hasValue())
-            .Then(var5.store(ExtractUint64(feed_5_value.value(), Int(8))))
-            .Else(var5.store(Int(0))),
-            If(var5.load() > Int(0)).Then(
-                Seq(
-                    If(
-                        Minus(Global.latest_timestamp(), ExtractUint64(feed_5_value.value(), Int(0)))
-                        > (App.globalGet(timestamp_freshness)),
-                        var5.store(Int(0)),
-                    )
-                )
-            ),
+            *[
+                validate_price(feed_value, value, App.globalGet(timestamp_freshness))
+                for feed_value, value in zip(feed_values, values)
+            ]
         )
 
         return Seq(
             Assert(is_valid_feed),
-            feed_1_value,
-            feed_2_value,
-            feed_3_value,
-            feed_4_value,
-            feed_5_value,
+            *feed_values,
             validate_prices,
-            App.globalPut(median_price, Medianizer(var1.load(), var2.load(), var3.load(), var4.load(), var5.load())),
-            If(App.globalGet(median_price) == var1.load())
-            .Then(App.globalPut(median_timestamp, ExtractUint64(feed_1_value.value(), Int(0))))
-            .ElseIf(App.globalGet(median_price) == var2.load())
-            .Then(App.globalPut(median_timestamp, ExtractUint64(feed_2_value.value(), Int(0))))
-            .ElseIf(App.globalGet(median_price) == var3.load())
-            .Then(App.globalPut(median_timestamp, ExtractUint64(feed_3_value.value(), Int(0))))
-            .ElseIf(App.globalGet(median_price) == var4.load())
-            .Then(App.globalPut(median_timestamp, ExtractUint64(feed_4_value.value(), Int(0))))
-            .ElseIf(App.globalGet(median_price) == var5.load())
-            .Then(App.globalPut(median_timestamp, ExtractUint64(feed_5_value.value(), Int(0))))
-            .Else(App.globalPut(median_timestamp, Global.latest_timestamp())),
+            App.globalPut(median_price, median(*[value.load() for value in values])),
+            median_timestamp_of(
+                App.globalGet(median_price),
+                feed_values,
+                values,
+                lambda timestamp: App.globalPut(median_timestamp, timestamp),
+            ),
             Approve(),
         )
 
-    @Subroutine(TealType.uint64)
-    def Medianizer(a, b, c, d, e):
-        """
-        function for getting the middle value
-
-        sorts values one at a time
-        until all values are sorted
-
-        if number of values is odd, middle num is picked
-        else divides middle two values and divides by 2
-        """
-
-        tmp = ScratchVar(TealType.uint64)
-
-        sort_1 = Seq(
-            tmp.store(a),
-            If(And(b > a, b > c, b > d, b > e))
-            .Then(Seq(a.slot.store(b), b.slot.store(tmp.load())))
-            .ElseIf(And(c > b, c > a, c > d, c > e))
-            .Then(Seq(a.slot.store(c), c.slot.store(tmp.load())))
-            .ElseIf(And(d > b, d > a, d > c, d > e))
-            .Then(Seq(a.slot.store(d), d.slot.store(tmp.load())))
-            .ElseIf(And(e > b, e > a, e > c, e > d))
-            .Then(Seq(a.slot.store(e), e.slot.store(tmp.load()))),
-        )
-
-        sort_2 = Seq(
-            tmp.store(b),
-            If(And(c > b, c > d, c > e))
-            .Then(Seq(b.slot.store(c), c.slot.store(tmp.load())))
-            .ElseIf(And(d > b, d > c, d > e))
-            .Then(Seq(b.slot.store(d), d.slot.store(tmp.load())))
-            .ElseIf(And(e > b, e > c, e > d))
-            .Then(Seq(b.slot.store(e), e.slot.store(tmp.load()))),
-        )
-        sort_3 = Seq(
-            tmp.store(c),
-            If(And(d > c, d > e))
-            .Then(Seq(c.slot.store(d), d.slot.store(tmp.load())))
-            .ElseIf(And(e > c, e > d))
-            .Then(Seq(c.slot.store(e), e.slot.store(tmp.load()))),
-        )
-
-        sort_4 = Seq(tmp.store(d), If(e > d).Then(Seq(d.slot.store(e), e.slot.store(tmp.load()))))
-
-        i = ScratchVar(TealType.uint64)
-        value_count = Seq(
-            i.store(Int(0)),
-            If(a > Int(0), i.store(i.load() + Int(1))),
-            If(b > Int(0), i.store(i.load() + Int(1))),
-            If(c > Int(0), i.store(i.load() + Int(1))),
-            If(d > Int(0), i.store(i.load() + Int(1))),
-            If(e > Int(0), i.store(i.load() + Int(1))),
-        )
-
-        middle_value = Seq(
-            If(i.load() == Int(5))
-            .Then(c.slot.load())
-            .ElseIf(i.load() == Int(4))
-            .Then(Div((b.slot.load() + c.slot.load()), Int(2)))
-            .ElseIf(i.load() == Int(3))
-            .Then(b.slot.load())
-            .ElseIf(i.load() == Int(2))
-            .Then(Div((a.slot.load() + b.slot.load()), Int(2)))
-            .ElseIf(i.load() == Int(1))
-            .Then(a.slot.load())
-        )
-        return Seq(sort_1, sort_2, sort_3, sort_4, value_count, middle_value)
-
     def handle_method():
         """
         calls the appropriate contract method if
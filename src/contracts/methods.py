@@ -1,5 +1,7 @@
 from pyteal import *
 
+from .medianizer_contract import FEED_COUNT
+
 stake_amount = Bytes("stake_amount")
 governance_address = Bytes("governance_address")
 query_id = Bytes("query_id")
@@ -10,9 +12,26 @@ timestamp_freshness = Bytes("timestamp_freshness")
 tip_amount = Bytes("tip_amount")
 lock_timestamp = Bytes("lock_timestamp")
 medianizer = Bytes("medianizer")
+history_count = Bytes("history_count")
 is_governance = Txn.sender() == App.globalGet(governance_address)
 is_reporter = Txn.sender() == App.globalGet(reporter)
 
+# history of reports kept by feeds built with a history_size: records of timestamp and value,
+# 8 bytes each like last_value, packed HISTORY_RECORDS_PER_KEY to a global state entry "history_" + key index byte
+HISTORY_KEY_PREFIX = b"history_"
+HISTORY_RECORD_SIZE = 16
+HISTORY_RECORDS_PER_KEY = 7
+HISTORY_ENTRY_SIZE = HISTORY_RECORD_SIZE * HISTORY_RECORDS_PER_KEY
+# algod allows 64 global state entries per app, the feed's own schema takes 19
+MAX_HISTORY_KEYS = 45
+MAX_HISTORY_SIZE = MAX_HISTORY_KEYS * HISTORY_RECORDS_PER_KEY
+
+
+def history_keys(history_size: int) -> int:
+    """global state entries a history of history_size reports takes"""
+    return -(-history_size // HISTORY_RECORDS_PER_KEY)
+
+
 """
 functions listed in alphabetical order
 
@@ -98,7 +117,42 @@ def change_medianizer():
     )
 
 
-def report():
+def record_history(record: Expr, history_size: int) -> Expr:
+    """
+    writes a report's record over the oldest of the last history_size records,
+    history_count counts every record written
+    """
+    position = ScratchVar(TealType.uint64)
+    key = ScratchVar(TealType.bytes)
+    offset = ScratchVar(TealType.uint64)
+    entry = App.globalGetEx(Int(0), key.load())
+    records = ScratchVar(TealType.bytes)
+
+    return Seq(
+        Assert(Len(record) == Int(HISTORY_RECORD_SIZE)),
+        position.store(App.globalGet(history_count) % Int(history_size)),
+        key.store(
+            Concat(
+                Bytes(HISTORY_KEY_PREFIX),
+                Extract(Itob(position.load() / Int(HISTORY_RECORDS_PER_KEY)), Int(7), Int(1)),
+            )
+        ),
+        offset.store(position.load() % Int(HISTORY_RECORDS_PER_KEY) * Int(HISTORY_RECORD_SIZE)),
+        entry,
+        records.store(If(entry.hasValue()).Then(entry.value()).Else(Bytes(bytes(HISTORY_ENTRY_SIZE)))),
+        App.globalPut(
+            key.load(),
+            Concat(
+                Substring(records.load(), Int(0), offset.load()),
+                record,
+                Substring(records.load(), offset.load() + Int(HISTORY_RECORD_SIZE), Int(HISTORY_ENTRY_SIZE)),
+            ),
+        ),
+        App.globalPut(history_count, App.globalGet(history_count) + Int(1)),
+    )
+
+
+def report(feed_count: int = FEED_COUNT, multi_query: bool = False, history_size: int = 0):
     """
     changes the current value recorded in the contract
     solidity equivalent: submitValue()
@@ -108,6 +162,15 @@ def report():
     1) query_id -- the ID of the data requested to be put on chain
     2) value -- the data submitted to the query (in base64)
     3) timestamp -- the timestamp of the data submission (in base64)
+
+    Txn applications:
+    1..feed_count) the feeds of the query_id, passed on to the medianizer
+    feed_count + 1) the medianizer
+
+    a multi_query feed reports to a medianizer of many query_ids (multi_medianizer_contract),
+    which checks the feed is registered for the query_id it passes
+
+    a feed with a history_size also keeps the last history_size reports, see record_history
     """
 
     last_timestamp = ScratchVar(TealType.bytes)
@@ -130,17 +193,21 @@ def report():
         )
 
     medianizer_query_id = App.globalGetEx(App.globalGet(medianizer), query_id)
+    medianizer_checks = [medianizer_query_id.hasValue(), App.globalGet(query_id) == medianizer_query_id.value()]
+    get_values_args = [Bytes("get_values")]
+    if multi_query:
+        medianizer_checks = []
+        get_values_args = [Bytes("get_values"), App.globalGet(query_id)]
 
     return Seq(
         [
-            medianizer_query_id,
+            *([] if multi_query else [medianizer_query_id]),
             Assert(
                 And(
                     Minus(Global.latest_timestamp(), Btoi(Txn.application_args[3]))
                     < App.globalGet(timestamp_freshness),
-                    Txn.applications[6] == App.globalGet(medianizer),
-                    medianizer_query_id.hasValue(),
-                    App.globalGet(query_id) == medianizer_query_id.value(),
+                    Txn.applications[feed_count + 1] == App.globalGet(medianizer),
+                    *medianizer_checks,
                     App.globalGet(reporter) == Txn.sender(),
                     App.globalGet(staking_status) == Int(1),
                     App.globalGet(query_id) == Txn.application_args[1],
@@ -149,6 +216,7 @@ def report():
             add_value(),
             add_timestamp(),
             App.globalPut(Bytes("last_value"), Concat(last_timestamp.load(), last_value.load())),
+            *([record_history(App.globalGet(Bytes("last_value")), history_size)] if history_size else []),
             # inner transaction builder triggered when reports submits a value
             InnerTxnBuilder.Begin(),
             InnerTxnBuilder.SetFields(
@@ -157,15 +225,9 @@ def report():
                     # and pick median
                     TxnField.type_enum: TxnType.ApplicationCall,
                     TxnField.application_id: App.globalGet(medianizer),
-                    TxnField.application_args: [Bytes("get_values")],
-                    TxnField.applications: [
-                        # applications array for feed ids for passing to medianizer
-                        Txn.applications[1],
-                        Txn.applications[2],
-                        Txn.applications[3],
-                        Txn.applications[4],
-                        Txn.applications[5],
-                    ],
+                    TxnField.application_args: get_values_args,
+                    # applications array for feed ids for passing to medianizer
+                    TxnField.applications: [Txn.applications[i] for i in range(1, feed_count + 1)],
                 }
             ),
             InnerTxnBuilder.Next(),
@@ -344,7 +406,7 @@ def withdraw():
     )
 
 
-def handle_method():
+def handle_method(feed_count: int = FEED_COUNT, multi_query: bool = False, history_size: int = 0):
     """
     calls the appropriate contract method if
     a NoOp transaction is sent to the contract
@@ -355,7 +417,7 @@ def handle_method():
         [contract_method == Bytes("change_medianizer"), change_medianizer()],
         [contract_method == Bytes("stake"), stake()],
         [contract_method == Bytes("tip"), tip()],
-        [contract_method == Bytes("report"), report()],
+        [contract_method == Bytes("report"), report(feed_count, multi_query, history_size)],
         [contract_method == Bytes("slash_reporter"), slash_reporter()],
         [contract_method == Bytes("withdraw"), withdraw()],
         [contract_method == Bytes("request_withdraw"), request_withdraw()],
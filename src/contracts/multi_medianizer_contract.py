@@ -0,0 +1,196 @@
+from pyteal import *
+
+from .medianizer_contract import FEED_COUNT
+from .medianizer_contract import MAX_FEED_COUNT
+from .medianizer_contract import median_subroutine
+from .medianizer_contract import median_timestamp_of
+from .medianizer_contract import validate_price
+
+"""
+Medianizer for many feeds i.e. BTC/USD, ETH/USD, ...
+
+one app holds the median of every query_id, in a global state entry per query_id:
+
+key: "q:" + query_id
+value: app ids of the query_id's feeds, median, median timestamp (8 bytes each)
+
+"""
+
+QUERY_KEY_PREFIX = b"q:"
+
+# algod allows 64 global state entries per app, governance and timestamp_freshness take two
+MAX_QUERIES = 62
+
+
+def query_key(query_id: bytes) -> bytes:
+    """global state key of a query_id's entry"""
+    return QUERY_KEY_PREFIX + query_id
+
+
+def approval_program(median_strategy: str = "legacy", feed_count: int = FEED_COUNT):
+    """
+    Args:
+        median_strategy (str): median subroutine to compile with, one of MEDIAN_STRATEGIES
+        feed_count (int): number of feeds of every query_id, up to MAX_FEED_COUNT
+    """
+    if not 1 <= feed_count <= MAX_FEED_COUNT:
+        raise ValueError(f"feed_count must be between 1 and {MAX_FEED_COUNT}, got {feed_count}")
+    median = median_subroutine(median_strategy, feed_count)
+    feeds = range(1, feed_count + 1)
+
+    timestamp_freshness = Bytes("timestamp_freshness")
+    governance = Bytes("governance")
+    is_governance = Txn.sender() == App.globalGet(governance)
+
+    # this is the name of variable in feed contract to read from
+    last_value = Bytes("last_value")
+
+    key = Concat(Bytes(QUERY_KEY_PREFIX), Txn.application_args[1])
+    entry = App.globalGetEx(Int(0), key)
+    feed_ids = Int(8 * feed_count)
+
+    def create():
+        """
+        constructor for medianizer contract
+
+        args:
+        0) time interval that checks age of values
+
+        """
+        return Seq(
+            App.globalPut(governance, Txn.sender()),
+            App.globalPut(timestamp_freshness, Btoi(Txn.application_args[0])),
+            Approve(),
+        )
+
+    def add_query():
+        """
+        Only governance adds a query_id and the application(aka feed) ids
+        that report its values, replacing the feeds of a query_id already added
+
+        Txn args:
+        0) will always equal "add_query"
+        1) query_id
+
+        Txn applications:
+        1..feed_count) the feeds of the query_id
+        """
+        return Seq(
+            Assert(And(is_governance, Txn.application_args.length() == Int(2))),
+            App.globalPut(key, Concat(*[Itob(Txn.applications[i]) for i in feeds], Itob(Int(0)), Itob(Int(0)))),
+            Approve(),
+        )
+
+    def remove_query():
+        """
+        Only governance removes a query_id, freeing its entry
+
+        Txn args:
+        0) will always equal "remove_query"
+        1) query_id
+        """
+        return Seq(
+            Assert(And(is_governance, Txn.application_args.length() == Int(2))),
+            App.globalDel(key),
+            Approve(),
+        )
+
+    def change_governance():
+        """
+        changes governance application id
+
+        Txn args:
+        0) will always equal "change_governance" (in order to route to this method)
+        1) application id -- new governance application id
+        """
+
+        return Seq(
+            [
+                Assert(
+                    And(is_governance, Txn.application_args.length() == Int(2), Len(Txn.application_args[1]) == Int(32))
+                ),
+                App.globalPut(governance, Txn.application_args[1]),
+                Approve(),
+            ]
+        )
+
+    def get_values():
+        """
+        Gets values and timestamp of last report from the feeds of a query_id
+        and checks timestamp age against timestamp_freshness then passes
+        values to medinizer function to get the median and stores it in the query_id's entry
+
+        Txn args:
+        0) will always equal "get_values"
+        1) query_id
+
+        Txn applications:
+        1..feed_count) the feeds of the query_id, in the order they were added
+        """
+
+        feed_values = [App.globalGetEx(Txn.applications[i], last_value) for i in feeds]
+        values = [ScratchVar(TealType.uint64) for _ in feeds]
+        median_price = ScratchVar(TealType.uint64)
+        median_timestamp = ScratchVar(TealType.uint64)
+
+        is_query_feeds = And(*[Txn.applications[i] == ExtractUint64(entry.value(), Int(8 * (i - 1))) for i in feeds])
+        is_valid_feed = Or(*[Global.caller_app_id() == Txn.applications[i] for i in feeds])
+
+        validate_prices = Seq(
+            *[
+                validate_price(feed_value, value, App.globalGet(timestamp_freshness))
+                for feed_value, value in zip(feed_values, values)
+            ]
+        )
+
+        return Seq(
+            entry,
+            Assert(And(entry.hasValue(), is_query_feeds, is_valid_feed)),
+            *feed_values,
+            validate_prices,
+            median_price.store(median(*[value.load() for value in values])),
+            median_timestamp_of(median_price.load(), feed_values, values, median_timestamp.store),
+            App.globalPut(
+                key,
+                Concat(
+                    Extract(entry.value(), Int(0), feed_ids), Itob(median_price.load()), Itob(median_timestamp.load())
+                ),
+            ),
+            Approve(),
+        )
+
+    def handle_method():
+        """
+        calls the appropriate contract method if
+        a NoOp transaction is sent to the contract
+        """
+        contract_method = Txn.application_args[0]
+        return Cond(
+            [contract_method == Bytes("add_query"), add_query()],
+            [contract_method == Bytes("remove_query"), remove_query()],
+            [contract_method == Bytes("change_governance"), change_governance()],
+            [contract_method == Bytes("get_values"), get_values()],
+        )
+
+    program = Cond(
+        [Txn.application_id() == Int(0), create()],
+        [Txn.on_completion() == OnComplete.NoOp, handle_method()],
+        [Txn.on_completion() == OnComplete.DeleteApplication, Return(is_governance)],
+        [Txn.on_completion() == OnComplete.UpdateApplication, Return(is_governance)],
+    )
+    return program
+
+
+def clear_state_program():
+    return Approve()
+
+
+if __name__ == "__main__":
+    with open("build/multi_medianizer_approval.teal", "w") as f:
+        compiled = compileTeal(approval_program(), mode=Mode.Application, version=MAX_TEAL_VERSION)
+        f.write(compiled)
+
+    with open("build/multi_medianizer_clear_state.teal", "w") as f:
+        compiled = compileTeal(clear_state_program(), mode=Mode.Application, version=MAX_TEAL_VERSION)
+        f.write(compiled)
+    print("Multi-query medianizer compiled!")
@@ -1,7 +1,10 @@
 """DataSource class"""
 from typing import Dict
 
-import requests
+from src.utils.extract import compile_path
+from src.utils.source_cache import DEFAULT_STALE_TTL
+from src.utils.source_cache import DEFAULT_TTL
+from src.utils.source_cache import get_source_cache
 
 
 class DataSource:
@@ -19,11 +22,15 @@ class DataSource:
         """
 
         # Request JSON from public api endpoint
-        rsp = requests.get(api_info["url"]).json()
+        rsp = get_source_cache().get_json(
+            api_info["url"],
+            timeout=api_info.get("timeout"),
+            ttl=api_info.get("ttl", DEFAULT_TTL),
+            stale_ttl=api_info.get("stale_ttl", DEFAULT_STALE_TTL),
+        )
 
-        # Parse through json with pre-written keywords
-        for keyword in api_info["keywords"]:
-            rsp = rsp[keyword]
+        # Parse through json with pre-written keywords, compiled on the first fetch of the path
+        rsp = compile_path(api_info["keywords"])(rsp)
 
         # return price (last remaining element of the json)
         price = float(rsp)
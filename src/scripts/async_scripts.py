@@ -0,0 +1,274 @@
+"""
+asyncio counterpart of Scripts
+
+AsyncScripts builds the same transactions as Scripts (its *_txn builders) and
+sends them and waits for them on an async algod client (src.utils.async_algod),
+so one event loop drives the reports of many feeds and reporter keys at once:
+
+    algod = getAsyncClient(client)
+    feeds = [AsyncScripts(client, None, reporter, governance, feed_id, medianizer_id, algod=algod) for ...]
+    await asyncio.gather(*(feed.report(query_id, value, timestamp) for feed in feeds))
+
+scripts sharing an async client share its connections, suggested params and round waits.
+"""
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from algosdk.atomic_transaction_composer import MultisigTransactionSigner
+from algosdk.future import transaction
+from algosdk.future.transaction import Multisig
+from algosdk.logic import get_application_address
+from algosdk.v2client.algod import AlgodClient
+
+from src.scripts.scripts import MAX_GROUP_SIZE
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.async_algod import getAsyncClient
+from src.utils.async_algod import waitForTransactionAsync
+from src.utils.util import decodeState
+
+
+class AsyncScripts:
+    """the contract methods of Scripts as coroutines"""
+
+    def __init__(
+        self,
+        client: AlgodClient,
+        tipper: Account,
+        reporter: Account,
+        governance_address: Union[Account, Multisig],
+        feed_app_id: Optional[int] = None,
+        medianizer_app_id: Optional[int] = None,
+        contract_count: Optional[int] = 1,
+        median_strategy: str = "legacy",
+        multi_query: bool = False,
+        history_size: int = 0,
+        algod: Optional[Any] = None,
+    ) -> None:
+        """
+        Args:
+            client (AlgodClient): the algorand node, used to compile contracts
+            algod: async client of the node (src.utils.async_algod) shared with other scripts,
+                one for `client` if not given
+            others: see Scripts
+        """
+        self.scripts = Scripts(
+            client,
+            tipper,
+            reporter,
+            governance_address,
+            feed_app_id,
+            medianizer_app_id,
+            contract_count,
+            median_strategy=median_strategy,
+            multi_query=multi_query,
+            history_size=history_size,
+        )
+        self.algod = algod or getAsyncClient(client)
+        # transactions are built with the params the async client fetched
+        self.scripts.params = self.algod.params
+
+    def __getattr__(self, name: str) -> Any:
+        # app ids, accounts and settings are kept by the wrapped Scripts
+        return getattr(self.scripts, name)
+
+    @property
+    def feeds(self) -> List[int]:
+        return self.scripts.feeds
+
+    @feeds.setter
+    def feeds(self, feeds: List[int]) -> None:
+        self.scripts.feeds = feeds
+
+    async def send(self, signed: List[Any], wait_rounds: int = 10) -> Dict[str, Any]:
+        """sends signed transactions (an atomic group if there are several) and waits for the last one"""
+        await self.algod.send_transactions(signed)
+        return await waitForTransactionAsync(self.algod, signed[-1].get_txid(), wait_rounds)
+
+    async def stake(self, stake_amount: Optional[int] = None) -> Dict[str, Any]:
+        """stakes the reporter on the feed, see Scripts.stake"""
+        if stake_amount is None:
+            info = await self.algod.application_info(self.feed_app_id)
+            stake_amount = decodeState(info["params"]["global-state"])[b"stake_amount"]
+
+        await self.algod.params.refresh()
+        txns = self.scripts.stake_txns(stake_amount)
+        return await self.send([txn.sign(self.reporter.getPrivateKey()) for txn in txns])
+
+    async def tip(self, tip_amount: int) -> Dict[str, Any]:
+        """tips the feed, see Scripts.tip"""
+        await self.algod.params.refresh()
+        txns = self.scripts.tip_txns(tip_amount)
+        return await self.send([txn.sign(self.tipper.getPrivateKey()) for txn in txns])
+
+    async def report(self, query_id: bytes, value: bytes, timestamp: int) -> Dict[str, Any]:
+        """reports a value to the feed, see Scripts.report"""
+        await self.algod.params.refresh()
+        txn = self.scripts.report_txn(query_id, value, timestamp)
+        return await self.send([txn.sign(self.reporter.getPrivateKey())], wait_rounds=30)
+
+    async def request_withdraw(self) -> Dict[str, Any]:
+        """locks the reporter before it can withdraw its stake, see Scripts.request_withdraw"""
+        await self.algod.params.refresh()
+        txn = self.scripts.request_withdraw_txn()
+        return await self.send([txn.sign(self.reporter.getPrivateKey())])
+
+    async def withdraw(self) -> Dict[str, Any]:
+        """sends the reporter its stake back, see Scripts.withdraw"""
+        await self.algod.params.refresh()
+        txn = self.scripts.withdraw_txn()
+        return await self.send([txn.sign(self.reporter.getPrivateKey())])
+
+    async def execute_grouped(
+        self, txns: List[transaction.Transaction], multisigaccounts_sk: List[Any], wait_rounds: int, batch: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Sign governance transactions with the multisig and send them, see Scripts.execute_grouped
+
+        Returns:
+            the confirmed info of every transaction, in the order of `txns`
+        """
+        multisig_public_keys = [Account(i).getAddress() for i in multisigaccounts_sk]
+        multisig = Multisig(version=1, threshold=2, addresses=multisig_public_keys)
+        signer = MultisigTransactionSigner(multisig, multisigaccounts_sk)
+
+        group_size = MAX_GROUP_SIZE if batch else 1
+        infos = []
+        for start in range(0, len(txns), group_size):
+            group = txns[start:][:group_size]
+            if len(group) > 1:
+                transaction.assign_group_id(group)
+            await self.send(signer.sign_transactions(group, list(range(len(group)))), wait_rounds)
+            infos += await asyncio.gather(*(self.algod.pending_transaction_info(txn.get_txid()) for txn in group))
+        return infos
+
+    async def governance_txns(self, build: Any, *args: Any) -> Any:
+        """builds governance transactions with fresh params, compiling the contracts off the event loop"""
+        await asyncio.gather(
+            asyncio.to_thread(self.scripts.get_contracts, self.scripts.client),
+            asyncio.to_thread(self.scripts.get_contracts_medianizer, self.scripts.client),
+            self.algod.params.refresh(),
+        )
+        return build(*args)
+
+    async def deploy_tellor_flex(
+        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[str], batch=False
+    ) -> List[int]:
+        """creates contract_count feeds, see Scripts.deploy_tellor_flex"""
+        txns = await self.governance_txns(
+            lambda: [
+                self.scripts.feed_create_txn(query_id, query_data, timestamp_freshness, i)
+                for i in range(self.contract_count)
+            ]
+        )
+        infos = await self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4, batch=batch)
+        self.feeds += [info["application-index"] for info in infos]
+        print("Created new apps:", self.feeds)
+        return self.feeds
+
+    async def deploy_medianizer(self, timestamp_freshness: int, query_id: bytes, multisigaccounts_sk: List[int]) -> int:
+        """creates the medianizer, see Scripts.deploy_medianizer"""
+        txn = await self.governance_txns(self.scripts.medianizer_create_txn, timestamp_freshness, query_id)
+        [info] = await self.execute_grouped([txn], multisigaccounts_sk, 4)
+        self.set_medianizer(info["application-index"])
+        print(f"Created medianizer app: {self.medianizer_app_id}")
+        return self.medianizer_app_id
+
+    async def deploy_batched(
+        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[Any]
+    ) -> Tuple[List[int], int]:
+        """creates and wires up every contract of a query_id in two atomic groups, see Scripts.deploy_batched"""
+        if self.contract_count + 1 > MAX_GROUP_SIZE:
+            raise ValueError(f"can't create {self.contract_count} feeds and a medianizer in one group")
+
+        def create_txns() -> List[transaction.Transaction]:
+            txns = [
+                self.scripts.feed_create_txn(query_id, query_data, timestamp_freshness, i)
+                for i in range(self.contract_count)
+            ]
+            return txns + [self.scripts.medianizer_create_txn(timestamp_freshness, query_id)]
+
+        infos = await self.execute_grouped(await self.governance_txns(create_txns), multisigaccounts_sk, 4)
+        app_ids = [info["application-index"] for info in infos]
+        self.feeds += app_ids[:-1]
+        self.set_medianizer(app_ids[-1])
+        print("Created new apps:", self.feeds)
+        print(f"Created medianizer app: {self.medianizer_app_id}")
+
+        await self.algod.params.refresh()
+        txns = [self.scripts.activate_contract_txn()] + [self.scripts.change_medianizer_txn(i) for i in self.feeds]
+        await self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4)
+        print("Medianizer active and set on feeds")
+
+        return self.feeds, self.medianizer_app_id
+
+    async def deploy_multi_medianizer(self, timestamp_freshness: int, multisigaccounts_sk: List[Any]) -> int:
+        """creates a medianizer shared by many query_ids, see Scripts.deploy_multi_medianizer"""
+        txn = await self.governance_txns(self.scripts.multi_medianizer_create_txn, timestamp_freshness)
+        [info] = await self.execute_grouped([txn], multisigaccounts_sk, 4)
+        self.set_medianizer(info["application-index"])
+        print(f"Created multi-query medianizer app: {self.medianizer_app_id}")
+        return self.medianizer_app_id
+
+    async def deploy_query(
+        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[Any]
+    ) -> List[int]:
+        """creates the feeds of a query_id on the multi-query medianizer, see Scripts.deploy_query"""
+        if not self.multi_query:
+            raise ValueError("deploy_query needs scripts built with multi_query=True")
+        if self.contract_count > MAX_GROUP_SIZE:
+            raise ValueError(f"can't create {self.contract_count} feeds in one group")
+
+        txns = await self.governance_txns(
+            lambda: [
+                self.scripts.feed_create_txn(query_id, query_data, timestamp_freshness, i, self.medianizer_app_id)
+                for i in range(self.contract_count)
+            ]
+        )
+        infos = await self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4)
+        self.feeds = [info["application-index"] for info in infos]
+        print(f"Created new {query_id} apps:", self.feeds)
+
+        await self.algod.params.refresh()
+        txn = self.scripts.add_query_txn(query_id.encode(), self.feeds)
+        await self.execute_grouped([txn], multisigaccounts_sk, wait_rounds=4)
+        print(f"{query_id} added to medianizer {self.medianizer_app_id}")
+        return self.feeds
+
+    async def remove_query(self, query_id: bytes, multisigaccounts_sk: List[Any]) -> List[Dict[str, Any]]:
+        """removes a query_id from the multi-query medianizer, see Scripts.remove_query"""
+        await self.algod.params.refresh()
+        return await self.execute_grouped([self.scripts.remove_query_txn(query_id)], multisigaccounts_sk, 4)
+
+    async def activate_contract(self, multisigaccounts_sk: List[Any]) -> List[Dict[str, Any]]:
+        """registers the feeds on the medianizer, see Scripts.activate_contract"""
+        await self.algod.params.refresh()
+        return await self.execute_grouped([self.scripts.activate_contract_txn()], multisigaccounts_sk, 4)
+
+    async def change_medianizer(self, multisigaccounts_sk: List[Any], batch: bool = False) -> List[Dict[str, Any]]:
+        """points every feed at the medianizer, see Scripts.change_medianizer"""
+        await self.algod.params.refresh()
+        txns = [self.scripts.change_medianizer_txn(i) for i in self.feeds]
+        return await self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=3, batch=batch)
+
+    async def change_governance(
+        self, new_gov_address: str, multisigaccounts_sk: List[Any], batch: bool = False
+    ) -> List[Dict[str, Any]]:
+        """changes the governance of every app of the query_id, see Scripts.change_governance"""
+        await self.algod.params.refresh()
+        txns = self.scripts.change_governance_txns(new_gov_address)
+        return await self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=3, batch=batch)
+
+    async def slash_reporter(self, multisigaccounts_sk: List[Any]) -> List[Dict[str, Any]]:
+        """governance slashes the reporter of the feed, see Scripts.slash_reporter"""
+        await self.algod.params.refresh()
+        return await self.execute_grouped([self.scripts.slash_reporter_txn()], multisigaccounts_sk, 3)
+
+    def set_medianizer(self, medianizer_app_id: int) -> None:
+        self.scripts.medianizer_app_id = medianizer_app_id
+        self.scripts.medianizer_app_address = get_application_address(medianizer_app_id)
@@ -9,6 +9,7 @@ from algosdk.future.transaction import Multisig
 from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
+from src.contracts.medianizer_contract import FEED_COUNT
 from src.scripts.scripts import Scripts
 from src.utils.account import Account
 from src.utils.configs import get_configs
@@ -16,12 +17,23 @@ from src.utils.testing.resources import fundAccount
 from src.utils.testing.resources import getTemporaryAccount
 
 
-def deploy(query_id: str, query_data: str, timestamp_freshness: int, network: str):
+def deploy(
+    query_id: str,
+    query_data: str,
+    timestamp_freshness: int,
+    network: str,
+    median_strategy: str = "legacy",
+    feed_count: int = FEED_COUNT,
+    history_size: int = 0,
+):
     """
     quick deployment scheme, works on:
     - local private network
     - algorand public testnet
     """
+    # checked by the feed's create() too, but at a pc that moves with feed_count
+    if timestamp_freshness < 120:
+        raise ValueError("timestamp freshness (-tf) must be >= 120")
 
     load_dotenv()
     if network == "testnet":
@@ -74,11 +86,17 @@ def deploy(query_id: str, query_data: str, timestamp_freshness: int, network: st
         raise Exception("invalid network selected")
 
     s = Scripts(
-        client=client, tipper=tipper, reporter=reporter, governance_address=governance.address(), contract_count=5
+        client=client,
+        tipper=tipper,
+        reporter=reporter,
+        governance_address=governance.address(),
+        contract_count=feed_count,
+        median_strategy=median_strategy,
+        history_size=history_size,
     )
 
     try:
-        tellor_flex_app_id = s.deploy_tellor_flex(
+        tellor_flex_app_id, medianizer_app_id = s.deploy_batched(
             query_id=query_id,
             query_data=query_data,
             multisigaccounts_sk=multisig_accounts_sk,
@@ -87,18 +105,10 @@ def deploy(query_id: str, query_data: str, timestamp_freshness: int, network: st
     except AlgodHTTPError as e:
         if "pc=763" in str(e):
             raise ValueError("timestamp freshness (-tf) must be >= 120")
+        raise
 
-    medianizer_app_id = s.deploy_medianizer(
-        timestamp_freshness=timestamp_freshness, multisigaccounts_sk=multisig_accounts_sk, query_id=query_id
-    )
-
-    activate_medianizer = s.activate_contract(multisigaccounts_sk=multisig_accounts_sk)
-
-    change_medianizer = s.change_medianizer(multisigaccounts_sk=multisig_accounts_sk)
     print(f"TellorFlex App deployed on {network}. App id: {tellor_flex_app_id}")
     print(f"Medianizer App deployed on {network}. App id: {medianizer_app_id}")
-    print(f"Medianizer activate, Txn id: {activate_medianizer}")
-    print(f"Set Medianizer on feeds, Txn id: {change_medianizer}")
     # print("please update config.yaml with new app_id.")
 
 
@@ -108,4 +118,7 @@ deploy(
     query_data=config.query_data,
     timestamp_freshness=config.timestamp_freshness,
     network=config.network,
+    median_strategy=config.get("median_strategy", "legacy"),
+    feed_count=config.get("feed_count", FEED_COUNT),
+    history_size=config.get("history_size", 0),
 )
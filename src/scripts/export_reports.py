@@ -0,0 +1,329 @@
+"""
+export the history of report calls to feed contracts from the indexer
+
+streams every `report` app call of a set of feeds, page by page following the
+indexer's next tokens, decodes its app args (query_id, value, timestamp) and
+writes it to CSV or Parquet (with pyarrow installed). only one page (or one
+Parquet part) is held in memory, and the position reached in every feed is
+saved to a checkpoint once the rows before it are written, so an interrupted
+export picks up where it stopped when run again with the same checkpoint, and
+a finished one exports the reports made since its last exported round:
+
+    python -m src.scripts.export_reports -n testnet -qid ALGOUSD -o algousd.csv
+    python -m src.scripts.export_reports -a 107231817 107231826 -f parquet -o algousd/
+"""
+import argparse
+import base64
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import yaml
+from algosdk.error import IndexerHTTPError
+from algosdk.v2client.indexer import IndexerClient
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+INDEXERS = {
+    "testnet": "https://testnet-idx.algonode.cloud",
+    "mainnet": "https://mainnet-idx.algonode.cloud",
+    "devnet": "http://localhost:8980",
+}
+
+# transactions per indexer page, the most the indexer returns
+PAGE_SIZE = 1000
+
+# rows per Parquet part file
+ROWS_PER_PART = 50_000
+
+# attempts per indexer page, waiting twice as long after every failure
+RETRIES = 5
+
+COLUMNS = ["app_id", "round", "round_time", "txid", "sender", "query_id", "value", "timestamp"]
+
+
+def decode_report(txn: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    the report a transaction submitted, None if it isn't a report call
+
+    values are decoded as integers when they're 8 bytes (as Scripts.report sends them),
+    other values are kept as hex
+    """
+    call = txn.get("application-transaction")
+    if not call:
+        return None
+    args = [base64.b64decode(arg) for arg in call.get("application-args", [])]
+    if len(args) != 4 or args[0] != b"report":
+        return None
+
+    value = args[2]
+    return {
+        "app_id": call["application-id"],
+        "round": txn["confirmed-round"],
+        "round_time": txn.get("round-time"),
+        "txid": txn["id"],
+        "sender": txn["sender"],
+        "query_id": args[1].decode(errors="replace"),
+        "value": int.from_bytes(value, "big") if len(value) == 8 else value.hex(),
+        "timestamp": int.from_bytes(args[3], "big"),
+    }
+
+
+class Checkpoint:
+    """the position an export reached in every feed, saved as json"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Args:
+            path (str): file to load the checkpoint from and save it to, kept in memory only if not given
+        """
+        self.path = path
+        # app id -> next token of the next page to export (None once every page found is exported)
+        # and the last round exported, later runs search the rounds after it
+        self.feeds: Dict[str, Dict[str, Any]] = {}
+        # rows written, Parquet parts written and the size of the CSV file they were written to
+        self.rows = 0
+        self.parts = 0
+        self.offset = 0
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.feeds = saved["feeds"]
+            self.rows = saved["rows"]
+            self.parts = saved["parts"]
+            self.offset = saved["offset"]
+
+    def advance(self, position: Tuple[int, Optional[str], int], rows: int) -> None:
+        """moves past a page once its rows are written, see iter_report_pages"""
+        app_id, next_page, last_round = position
+        self.feeds[str(app_id)] = {"next_page": next_page, "last_round": last_round}
+        self.rows += rows
+
+    def next_page(self, app_id: int) -> Optional[str]:
+        return self.feeds.get(str(app_id), {}).get("next_page")
+
+    def last_round(self, app_id: int) -> int:
+        """the last round exported of a feed, 0 if none was"""
+        return self.feeds.get(str(app_id), {}).get("last_round", 0)
+
+    def save(self) -> None:
+        """writes the checkpoint atomically, a crash leaves the previous one in place"""
+        if self.path is None:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"feeds": self.feeds, "rows": self.rows, "parts": self.parts, "offset": self.offset}, f)
+        os.replace(tmp, self.path)
+
+
+def search_page(indexer: IndexerClient, app_id: int, next_page: Optional[str], **search: Any) -> Dict[str, Any]:
+    """one page of the app calls of a feed, retried on indexer errors"""
+    for attempt in range(RETRIES):
+        try:
+            return indexer.search_transactions(
+                application_id=app_id, txn_type="appl", limit=PAGE_SIZE, next_page=next_page, **search
+            )
+        except IndexerHTTPError:
+            if attempt == RETRIES - 1:
+                raise
+            time.sleep(2**attempt)
+
+
+def iter_report_pages(
+    indexer: IndexerClient, app_ids: List[int], checkpoint: Optional[Checkpoint] = None, **search: Any
+) -> Iterator[Tuple[List[Dict[str, Any]], Tuple[int, Optional[str], int]]]:
+    """
+    Stream the reports to every feed, one indexer page at a time
+
+    Args:
+        indexer (IndexerClient): the indexer to search
+        app_ids (List[int]): the feeds to export
+        checkpoint (Checkpoint): where to start from in every feed, not changed
+        search: filters passed on to search_transactions, e.g. min_round, max_round
+    Yields:
+        the decoded reports of a page, oldest first within each feed, and the position after the page:
+        the feed, the next token of its next page and its last round exported,
+        to Checkpoint.advance once the reports are written
+    """
+    checkpoint = checkpoint or Checkpoint()
+    for app_id in app_ids:
+        next_page = checkpoint.next_page(app_id)
+        last_round = checkpoint.last_round(app_id)
+        feed_search = dict(search)
+        if next_page is None and last_round:
+            # every page found before was exported, only the rounds since are searched
+            feed_search["min_round"] = max(search.get("min_round") or 0, last_round + 1)
+        while True:
+            page = search_page(indexer, app_id, next_page, **feed_search)
+            txns = page.get("transactions", [])
+            reports = [report for report in map(decode_report, txns) if report is not None]
+            next_page = page.get("next-token") if txns else None
+            last_round = max([last_round] + [txn["confirmed-round"] for txn in txns])
+            yield reports, (app_id, next_page, last_round)
+            if next_page is None:
+                break
+
+
+def iter_reports(
+    indexer: IndexerClient, app_ids: List[int], checkpoint: Optional[Checkpoint] = None, **search: Any
+) -> Iterator[Dict[str, Any]]:
+    """the reports to every feed one by one, see iter_report_pages"""
+    for reports, _ in iter_report_pages(indexer, app_ids, checkpoint, **search):
+        yield from reports
+
+
+def export_csv(indexer: IndexerClient, app_ids: List[int], path: str, checkpoint: Checkpoint, **search: Any) -> int:
+    """
+    Append the reports to every feed to a CSV file, saving the checkpoint after every page
+
+    rows written after the checkpoint was last saved (by a run that was interrupted) are dropped first,
+    so they aren't written twice
+
+    Returns:
+        int: rows written by this run
+    """
+    if checkpoint.offset == 0 and not checkpoint.feeds and os.path.exists(path) and os.path.getsize(path) > 0:
+        raise ValueError(
+            f"{path} exists but its checkpoint doesn't, remove it or pass the checkpoint it was written with"
+        )
+
+    written = 0
+    with open(path, "a+", newline="") as f:
+        f.truncate(checkpoint.offset)
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        if checkpoint.offset == 0:
+            writer.writeheader()
+        for reports, position in iter_report_pages(indexer, app_ids, checkpoint, **search):
+            writer.writerows(reports)
+            f.flush()
+            os.fsync(f.fileno())
+            written += len(reports)
+            checkpoint.offset = f.tell()
+            checkpoint.advance(position, len(reports))
+            checkpoint.save()
+    return written
+
+
+def export_parquet(
+    indexer: IndexerClient, app_ids: List[int], directory: str, checkpoint: Checkpoint, **search: Any
+) -> int:
+    """
+    Write the reports to every feed to Parquet part files of about ROWS_PER_PART rows in a directory,
+    saving the checkpoint after every part
+
+    values are a uint64 column, the hex of values that aren't 8 bytes is in a nullable value_hex column
+
+    Returns:
+        int: rows written by this run
+    """
+    if pyarrow is None:
+        raise ImportError("exporting Parquet needs pyarrow, pip install pyarrow (or export CSV)")
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    written = 0
+    rows: List[Dict[str, Any]] = []
+    positions: List[Tuple[int, Optional[str], int]] = []
+
+    def write_part() -> None:
+        table = pyarrow.Table.from_pylist([_parquet_row(row) for row in rows], schema=_parquet_schema())
+        pyarrow.parquet.write_table(table, os.path.join(directory, f"part-{checkpoint.parts:05d}.parquet"))
+        checkpoint.parts += 1
+        for position in positions:
+            checkpoint.advance(position, 0)
+        checkpoint.rows += len(rows)
+        checkpoint.save()
+
+    for reports, position in iter_report_pages(indexer, app_ids, checkpoint, **search):
+        rows += reports
+        positions.append(position)
+        if len(rows) >= ROWS_PER_PART:
+            write_part()
+            written += len(rows)
+            rows, positions = [], []
+
+    if rows:
+        write_part()
+        written += len(rows)
+    elif positions:
+        # the last pages had no reports, there's nothing to write but the position
+        for position in positions:
+            checkpoint.advance(position, 0)
+        checkpoint.save()
+    return written
+
+
+def _parquet_row(report: Dict[str, Any]) -> Dict[str, Any]:
+    # value is a uint64 column, values that aren't 8 byte integers go to the value_hex column instead
+    value = report["value"]
+    if isinstance(value, int):
+        return {**report, "value_hex": None}
+    return {**report, "value": None, "value_hex": value}
+
+
+def _parquet_schema() -> Any:
+    return pyarrow.schema(
+        [
+            ("app_id", pyarrow.uint64()),
+            ("round", pyarrow.uint64()),
+            ("round_time", pyarrow.uint64()),
+            ("txid", pyarrow.string()),
+            ("sender", pyarrow.string()),
+            ("query_id", pyarrow.string()),
+            ("value", pyarrow.uint64()),
+            ("timestamp", pyarrow.uint64()),
+            ("value_hex", pyarrow.string()),
+        ]
+    )
+
+
+def feed_app_ids(query_id: str, network: str) -> List[int]:
+    """the feeds of a query_id on a network, from config.yml"""
+    with open("config.yml") as f:
+        config = yaml.safe_load(f)
+    feeds = (config["feeds"].get(query_id, {}).get("app_ids") or {}).get("feeds") or {}
+    if not feeds.get(network):
+        raise ValueError(f"no feeds of {query_id} on {network} in config.yml")
+    return list(feeds[network])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the reports to feed contracts from the indexer")
+    parser.add_argument("-n", "--network", type=str, default="testnet", help="testnet, mainnet or devnet")
+    parser.add_argument("-qid", "--query-id", type=str, help="export the feeds of this query_id in config.yml")
+    parser.add_argument("-a", "--app-ids", type=int, nargs="+", help="feed app ids to export")
+    parser.add_argument("-o", "--output", type=str, required=True, help="CSV file, or directory of Parquet parts")
+    parser.add_argument("-f", "--format", type=str, default="csv", choices=["csv", "parquet"], help="output format")
+    parser.add_argument("-c", "--checkpoint", type=str, help="checkpoint file, <output>.checkpoint.json by default")
+    parser.add_argument("--min-round", type=int, help="first round to export")
+    parser.add_argument("--max-round", type=int, help="last round to export")
+    parser.add_argument("--indexer", type=str, help="indexer address, the network's public indexer by default")
+    parser.add_argument("--indexer-token", type=str, default="", help="indexer api token")
+    args = parser.parse_args()
+
+    if args.app_ids:
+        app_ids = args.app_ids
+    elif args.query_id:
+        app_ids = feed_app_ids(args.query_id, args.network)
+    else:
+        parser.error("pass the feeds to export with -a or -qid")
+
+    indexer = IndexerClient(args.indexer_token, args.indexer or INDEXERS[args.network])
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output.rstrip('/')}.checkpoint.json")
+    search = {"min_round": args.min_round, "max_round": args.max_round}
+
+    export = export_parquet if args.format == "parquet" else export_csv
+    written = export(indexer, app_ids, args.output, checkpoint, **search)
+    print(f"exported {written} reports of {app_ids} to {args.output}, {checkpoint.rows} in total")
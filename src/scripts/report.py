@@ -2,24 +2,37 @@ import os
 import sys
 from time import time
 from typing import Dict
+from typing import Optional
 
 from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
 from src.assets.asset import Asset
+from src.assets.fixed_point import DECIMALS
+from src.scripts.reporter import FeedReporter
 from src.scripts.scripts import Scripts
 from src.utils.account import Account
 from src.utils.configs import get_configs
+from src.utils.state import StateReader
 from src.utils.util import getBalances
 
 
 def report(
-    app_id: int, medianizer_id: int, feed_ids: list, query_id: str, network: str, governance_address: str, sources: Dict
+    app_id: int,
+    medianizer_id: int,
+    feed_ids: list,
+    query_id: str,
+    network: str,
+    governance_address: str,
+    sources: Dict,
+    aggregation: Optional[Dict] = None,
+    decimals: int = DECIMALS,
+    deviation_threshold: Optional[float] = None,
 ):
     load_dotenv()
 
     # create data feed
-    asset = Asset(query_id=query_id, sources=sources)
+    asset = Asset(query_id=query_id, sources=sources, aggregation=aggregation, decimals=decimals)
 
     asset.update_price()
     value = asset.price
@@ -51,7 +64,18 @@ def report(
         feed_app_id=app_id,
     )
     s.feeds = feed_ids
-    s.report(query_id=query_id, value=value, timestamp=int(time() - 50))
+
+    if deviation_threshold:
+        # skip values close to the feed's last_value while it's fresh, see FeedReporter.should_report
+        feed_state = StateReader(client).feeds([app_id])[app_id]
+        gate = FeedReporter(
+            query_id, asset, s, feed_state.timestampFreshness, deviation_threshold, last_report=feed_state.lastReport
+        )
+        if gate.should_report(value, time()) is None:
+            print(f"skipped value '{value}': within {deviation_threshold}bps of {feed_state.lastValue}")
+            return
+
+    s.report(query_id=query_id, value=asset.encoded_price, timestamp=int(time() - 50))
 
     print(f"submitted value '{value}' to query id '{query_id}'")
     # print(f"algo explorer link: {}")
@@ -73,4 +97,7 @@ if __name__ == "__main__":
         network=config.network,
         governance_address=config.governance_address,
         sources=config.apis[config.query_id],
+        aggregation=config.feeds[config.query_id].get("aggregation") or config.get("aggregation"),
+        decimals=config.feeds[config.query_id].get("decimals", DECIMALS),
+        deviation_threshold=config.feeds[config.query_id].get("deviation_threshold", config.get("deviation_threshold")),
     )
@@ -0,0 +1,123 @@
+"""
+pipelined report submission
+
+a report call only depends on its price through two app args, the value and its
+timestamp. everything else (suggested params, the foreign apps of the feeds and
+the medianizer, the governance account) is built ahead of time into a template,
+so once a price arrives the call is only patched, signed and sent:
+
+    pipeline = ReportPipeline(scripts, b"BTCUSD")
+    future = pipeline.submit(encode_value(price), timestamp)
+    confirmed = future.result()
+
+signing, sending and waiting for the confirmation run on a worker pool kept apart
+from price fetching, and the next template is prepared there right after a send
+"""
+import copy
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Optional
+from typing import Union
+
+from algosdk.future import transaction
+
+from src.utils.params import MAX_AGE
+from src.utils.util import PendingTxnResponse
+from src.utils.util import waitForTransaction
+
+# threads signing, sending and confirming reports, shared by the feeds of a reporter
+SUBMIT_WORKERS = 4
+
+# rounds a pipelined report is waited for
+CONFIRM_TIMEOUT = 30
+
+# the value and timestamp a template is built with, the same sizes as the ones patched in so the fee holds
+PLACEHOLDER_VALUE = bytes(8)
+PLACEHOLDER_TIMESTAMP = 0
+
+
+class ReportPipeline:
+    """reports of one feed app, prepared before their price and signed and sent on a worker pool"""
+
+    def __init__(
+        self,
+        scripts: Any,
+        query_id: Union[str, bytes],
+        executor: Optional[ThreadPoolExecutor] = None,
+        max_age: float = MAX_AGE,
+    ) -> None:
+        """
+        Args:
+            scripts (Scripts): scripts pointed at the reporter's feed app
+            query_id (str | bytes): the query_id reported to
+            executor (ThreadPoolExecutor): pool the reports are submitted on, a pool of SUBMIT_WORKERS if not given
+            max_age (float): seconds a template is used before it's rebuilt with fresh params
+        """
+        self.scripts = scripts
+        self.query_id = query_id.encode() if isinstance(query_id, str) else query_id
+        self.max_age = max_age
+        # a pool passed in is shared with other feeds and left open by close()
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=SUBMIT_WORKERS, thread_name_prefix="report")
+
+        self._template: Optional[transaction.ApplicationNoOpTxn] = None
+        self._prepared_at = 0.0
+        self._lock = threading.Lock()
+
+    def prepare(self) -> transaction.ApplicationNoOpTxn:
+        """builds the template report call, everything but the value and timestamp"""
+        template = self.scripts.report_txn(self.query_id, PLACEHOLDER_VALUE, PLACEHOLDER_TIMESTAMP)
+        with self._lock:
+            self._template = template
+            self._prepared_at = time.monotonic()
+        return template
+
+    def prepare_async(self) -> Future:
+        """rebuilds the template on the worker pool, e.g. while the next price is fetched"""
+        return self._executor.submit(self.prepare)
+
+    def template(self) -> transaction.ApplicationNoOpTxn:
+        """the prepared template, rebuilt here only if there's none or its params are too old"""
+        with self._lock:
+            template = self._template
+            fresh = time.monotonic() - self._prepared_at < self.max_age
+        if template is None or not fresh:
+            template = self.prepare()
+        return template
+
+    def fill(self, value: bytes, timestamp: int) -> transaction.ApplicationNoOpTxn:
+        """
+        the report call of a price, a copy of the template with its args patched
+
+        Args:
+            value (bytes): the 8 byte encoded value
+            timestamp (int): the timestamp of the value
+        """
+        if len(value) != len(PLACEHOLDER_VALUE):
+            raise ValueError(f"expected an encoded value of {len(PLACEHOLDER_VALUE)} bytes, got {len(value)}")
+        txn = copy.copy(self.template())
+        txn.app_args = [b"report", self.query_id, value, timestamp.to_bytes(8, "big")]
+        return txn
+
+    def submit(self, value: bytes, timestamp: int) -> Future:
+        """
+        patches a price into the template and signs, sends and confirms it on the worker pool
+
+        Returns:
+            Future: resolves to the confirmed PendingTxnResponse, or raises if the report failed
+        """
+        return self._executor.submit(self._send, self.fill(value, timestamp))
+
+    def _send(self, txn: transaction.ApplicationNoOpTxn) -> PendingTxnResponse:
+        signed = txn.sign(self.scripts.reporter.getPrivateKey())
+        self.scripts.client.send_transaction(signed)
+        # the next report starts from a fresh template, built while this one confirms
+        self.prepare()
+        return waitForTransaction(self.scripts.client, signed.get_txid(), CONFIRM_TIMEOUT, self.scripts.watcher)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,317 @@
+"""
+long-running reporter for every feed in config.yml
+
+loads each query_id under `feeds:` that has app ids on the selected network once,
+keeps the algod client, price sources and Scripts objects warm, and reports
+to every feed from one process on a schedule driven by its timestamp_freshness
+
+with a `deviation_threshold` (basis points) set, prices are polled every
+`poll_interval` seconds and a report is only sent when the price moved more than
+the threshold from the feed's last_value, or when last_value is about to go stale
+(the heartbeat). the decision is made against the feed's last report as read once
+from chain and then kept in the Asset (last_pushed_price, time_last_pushed)
+
+with `pipeline` set, each feed's report call is prepared while its price is fetched
+and only patched with the value once it's known, then signed, sent and confirmed on
+a worker pool shared by the feeds (see report_pipeline), so the next feed's price is
+fetched without waiting for the previous report
+"""
+import heapq
+import os
+import sys
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from algosdk.v2client.algod import AlgodClient
+from box import Box
+from dotenv import load_dotenv
+
+from src.assets.asset import Asset
+from src.assets.fixed_point import DECIMALS
+from src.scripts.report_pipeline import ReportPipeline
+from src.scripts.report_pipeline import SUBMIT_WORKERS
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.configs import get_configs
+from src.utils.state import StateReader
+from src.utils.testing.setup import getAlgodClient
+from src.utils.watcher import BlockWatcher
+
+# seconds before a value goes stale that the next report is sent
+# (covers the timestamp offset of a report plus its confirmation time)
+REPORT_BUFFER = 90
+
+# reports are timestamped this many seconds in the past
+# so they are never ahead of the latest block timestamp
+TIMESTAMP_OFFSET = 50
+
+# seconds between price checks of a feed gated by a deviation_threshold, unless poll_interval is set
+POLL_INTERVAL = 30
+
+
+class FeedReporter:
+    """everything needed to report to one query_id, built once and reused"""
+
+    def __init__(
+        self,
+        query_id: str,
+        asset: Asset,
+        scripts: Scripts,
+        timestamp_freshness: int,
+        deviation_threshold: Optional[float] = None,
+        poll_interval: int = POLL_INTERVAL,
+        last_report: Optional[Tuple[int, int]] = None,
+        pipeline: Optional[ReportPipeline] = None,
+    ) -> None:
+        """
+        Args:
+            query_id (str): the query_id reported to
+            asset (Asset): the price sources of the query_id
+            scripts (Scripts): scripts pointed at the reporter's feed app
+            timestamp_freshness (int): seconds a reported value stays valid on chain
+            deviation_threshold (float): basis points the price has to move to be reported before the heartbeat,
+                every poll is reported if not set
+            poll_interval (int): seconds between price checks when gated by deviation_threshold
+            last_report (tuple): timestamp and value of the feed's last report on chain, if any
+            pipeline (ReportPipeline): submits reports from a prepared call on a worker pool,
+                reports are sent and confirmed before submit() returns if not set
+        """
+        self.query_id = query_id
+        self.asset = asset
+        self.scripts = scripts
+        self.timestamp_freshness = timestamp_freshness
+        self.deviation_threshold = deviation_threshold
+        self.poll_interval = poll_interval
+        self.pipeline = pipeline
+        if last_report is not None:
+            self.asset.time_last_pushed, self.asset.last_pushed_price = last_report
+
+    @property
+    def interval(self) -> int:
+        """seconds between reports"""
+        return max(self.timestamp_freshness - REPORT_BUFFER, 1)
+
+    @property
+    def gated(self) -> bool:
+        return bool(self.deviation_threshold)
+
+    def heartbeat_due(self, now: float) -> float:
+        """seconds until the last report has to be replaced before it goes stale, 0 if it's due"""
+        if not self.asset.time_last_pushed:
+            return 0
+        # time_last_pushed is the on-chain timestamp, TIMESTAMP_OFFSET before the report was sent
+        return max(self.asset.time_last_pushed + TIMESTAMP_OFFSET + self.interval - now, 0)
+
+    def should_report(self, value: int, now: float) -> Optional[str]:
+        """why a price has to be reported, None if it can be skipped"""
+        if not self.gated:
+            return "scheduled"
+        if self.heartbeat_due(now) == 0:
+            return "heartbeat"
+        last = self.asset.last_pushed_price
+        if not last:
+            return "no value on chain"
+        if abs(value - last) * 10_000 > self.deviation_threshold * last:
+            return f"moved {abs(value - last) * 10_000 / last:.1f}bps"
+        return None
+
+    def next_poll(self, now: float) -> float:
+        """seconds until the price is checked again"""
+        if not self.gated:
+            return self.interval
+        return max(min(self.poll_interval, self.heartbeat_due(now)), 1)
+
+    def poll(self) -> Optional[int]:
+        """
+        fetches a fresh price and submits it if it passes the gate
+
+        Returns:
+            the value submitted, None if it was skipped
+        """
+        if self.pipeline is not None:
+            # the report call is prepared while the price is fetched
+            self.pipeline.prepare_async()
+        self.asset.update_price()
+        reason = self.should_report(self.asset.price, time.time())
+        if reason is None:
+            print(f"skipped {self.query_id}: {self.asset.price} is within {self.deviation_threshold}bps")
+            return None
+        return self.submit(reason)
+
+    def submit(self, reason: str = "scheduled") -> int:
+        """submits the last fetched price to the feed app"""
+        value = self.asset.price
+        timestamp = int(time.time() - TIMESTAMP_OFFSET)
+        previous = (self.asset.time_last_pushed, self.asset.last_pushed_price)
+        if self.pipeline is None:
+            self.scripts.report(query_id=self.query_id, value=self.asset.encoded_price, timestamp=timestamp)
+        # the local copy of the feed's last_value the gate compares against,
+        # set before a pipelined report is handed off so a failure can restore it
+        self.asset.last_pushed_price = value
+        self.asset.time_last_pushed = timestamp
+        if self.pipeline is not None:
+            try:
+                future = self.pipeline.submit(self.asset.encoded_price, timestamp)
+            except Exception:
+                self.asset.time_last_pushed, self.asset.last_pushed_price = previous
+                raise
+            future.add_done_callback(lambda future: self.rollback(future, previous, (timestamp, value)))
+        print(f"submitted value '{value}' to query id '{self.query_id}' on app {self.scripts.feed_app_id} ({reason})")
+        return value
+
+    def rollback(self, future: Future, previous: Tuple[int, int], pushed: Tuple[int, int]) -> None:
+        """restores the last report a failed pipelined report replaced, so the gate reports again"""
+        error = future.exception()
+        if error is None:
+            return
+        print(f"failed to report {self.query_id}: {error}")
+        # unless a later report replaced it already
+        if (self.asset.time_last_pushed, self.asset.last_pushed_price) == pushed:
+            self.asset.time_last_pushed, self.asset.last_pushed_price = previous
+
+
+class Reporter:
+    """schedules reports for every configured query_id from one process"""
+
+    def __init__(self, client: AlgodClient, reporter: Account, config: Box, network: str) -> None:
+        """
+        Args:
+            client (AlgodClient): the algorand node used for all feeds
+            reporter (Account): the staked reporter account
+            config (Box): parsed config.yml
+            network (str): the network whose app ids are used
+        """
+        self.client = client
+        self.reporter = reporter
+        self.config = config
+        self.network = network
+        self.error_waittime = config.get("error_waittime", 20)
+        # one block stream confirms the reports of every feed
+        self.watcher = BlockWatcher(client)
+        # reads the feeds of a query_id at once when looking for the reporter's feed
+        self.state_reader = StateReader(client)
+        # signs, sends and confirms the reports of every feed when pipelined
+        self.executor = (
+            ThreadPoolExecutor(max_workers=SUBMIT_WORKERS, thread_name_prefix="report")
+            if config.get("pipeline")
+            else None
+        )
+
+        self.feeds = self.load_feeds()
+
+    def load_feeds(self) -> Dict[str, FeedReporter]:
+        """builds a FeedReporter for each query_id with app ids and price sources on this network"""
+        feeds = {}
+
+        for query_id, feed in self.config.feeds.items():
+            app_ids = feed.get("app_ids")
+            if app_ids is None:
+                continue
+
+            feed_ids = (app_ids.get("feeds") or {}).get(self.network)
+            medianizer_id = (app_ids.get("medianizer") or {}).get(self.network)
+            sources = self.config.apis.get(query_id)
+            if not feed_ids or not medianizer_id or not sources:
+                print(f"skipping {query_id}: no apps or price sources on {self.network}")
+                continue
+
+            feed_app_id = self.find_feed_app(feed_ids)
+            if feed_app_id is None:
+                print(f"skipping {query_id}: {self.reporter.addr} isn't the reporter on any of {feed_ids}")
+                continue
+
+            scripts = Scripts(
+                client=self.client,
+                tipper=None,
+                reporter=self.reporter,
+                governance_address=self.config.governance_address,
+                feed_app_id=feed_app_id,
+                medianizer_app_id=medianizer_id,
+                watcher=self.watcher,
+            )
+            scripts.feeds = list(feed_ids)
+
+            # the feed's last report seeds the local copy the deviation gate compares against
+            feed_state = self.state_reader.feeds([feed_app_id])[feed_app_id]
+            timestamp_freshness = feed.get("timestamp_freshness")
+            if timestamp_freshness is None:
+                timestamp_freshness = feed_state.timestampFreshness
+
+            feeds[query_id] = FeedReporter(
+                query_id=query_id,
+                asset=Asset(
+                    query_id=query_id,
+                    sources=sources,
+                    aggregation=feed.get("aggregation") or self.config.get("aggregation"),
+                    decimals=feed.get("decimals", DECIMALS),
+                ),
+                scripts=scripts,
+                timestamp_freshness=timestamp_freshness,
+                deviation_threshold=feed.get("deviation_threshold", self.config.get("deviation_threshold")),
+                poll_interval=feed.get("poll_interval", self.config.get("poll_interval", POLL_INTERVAL)),
+                last_report=feed_state.lastReport,
+                pipeline=ReportPipeline(scripts, query_id, self.executor) if self.executor is not None else None,
+            )
+            print(f"loaded {query_id}: feed app {feed_app_id}, reporting every {feeds[query_id].interval}s")
+
+        return feeds
+
+    def find_feed_app(self, feed_ids: List[int]) -> Optional[int]:
+        """returns the feed app id the reporter is staked on, or the one picked with --feed-index"""
+        feed_index = self.config.get("feed_index")
+        if feed_index is not None:
+            return feed_ids[feed_index]
+
+        for feed_id, feed in self.state_reader.feeds(feed_ids).items():
+            if feed.reporterAddress == self.reporter.addr:
+                return feed_id
+
+        return None
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        """
+        checks each feed when it is due and reports its price if it passes the gate,
+        forever or for `iterations` checks
+
+        a failed report is retried after `error_waittime` seconds
+        """
+        if not self.feeds:
+            raise ValueError(f"no feeds to report to on {self.network}")
+
+        schedule = [(time.time(), query_id) for query_id in self.feeds]
+        heapq.heapify(schedule)
+
+        done = 0
+        while iterations is None or done < iterations:
+            due, query_id = heapq.heappop(schedule)
+            time.sleep(max(due - time.time(), 0))
+
+            feed = self.feeds[query_id]
+            try:
+                feed.poll()
+                next_due = time.time() + feed.next_poll(time.time())
+            except Exception as e:
+                print(f"failed to report {query_id}: {e}")
+                next_due = time.time() + self.error_waittime
+
+            heapq.heappush(schedule, (next_due, query_id))
+            done += 1
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    # read config
+    config = get_configs(sys.argv[1:])
+
+    client = getAlgodClient(config.network)
+    print("current network: ", config.network)
+    reporter = Account.FromMnemonic(os.getenv("REPORTER_MNEMONIC"))
+    print("reporter address:", reporter.addr)
+
+    Reporter(client=client, reporter=reporter, config=config, network=config.network).run()
@@ -1,5 +1,6 @@
 import time
 from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
@@ -18,17 +19,29 @@ from src.contracts.contracts import approval_program
 from src.contracts.contracts import clear_state_program
 from src.contracts.medianizer_contract import approval_program as approval_medianizer
 from src.contracts.medianizer_contract import clear_state_program as clear_medianizer
+from src.contracts.methods import history_keys
+from src.contracts.multi_medianizer_contract import approval_program as approval_multi_medianizer
+from src.contracts.multi_medianizer_contract import clear_state_program as clear_multi_medianizer
+from src.contracts.multi_medianizer_contract import MAX_QUERIES
+from src.contracts.multi_medianizer_contract import query_key
 from src.utils.account import Account
-from src.utils.util import fullyCompileContract
+from src.utils.artifacts import compileCached
+from src.utils.params import getParamsProvider
+from src.utils.state import StateReader
+from src.utils.util import decodeHistory
 from src.utils.util import getAppGlobalState
 from src.utils.util import waitForTransaction
+from src.utils.watcher import BlockWatcher
 
 
-APPROVAL_PROGRAM = b""
-CLEAR_STATE_PROGRAM = b""
+# (feed_count, multi_query, history_size) -> compiled feed approval and clear state programs
+FEED_PROGRAMS: Dict[Tuple[int, bool, int], Tuple[bytes, bytes]] = {}
 
-MEDIANIZER_APPROVAL_PROGRAM = b""
-MEDIANIZER_CLEAR_STATE_PROGRAM = b""
+# (median_strategy, feed_count, multi_query) -> compiled medianizer approval and clear state programs
+MEDIANIZER_PROGRAMS: Dict[Tuple[str, int, bool], Tuple[bytes, bytes]] = {}
+
+# most transactions algod accepts in one atomic group
+MAX_GROUP_SIZE = 16
 
 
 class Scripts:
@@ -52,6 +65,10 @@ class Scripts:
         feed_app_id: Optional[int] = None,
         medianizer_app_id: Optional[int] = None,
         contract_count: Optional[int] = 1,
+        watcher: Optional[BlockWatcher] = None,
+        median_strategy: str = "legacy",
+        multi_query: bool = False,
+        history_size: int = 0,
     ) -> None:
         """
         - connects to algorand node
@@ -62,6 +79,11 @@ class Scripts:
             tipper (src.utils.account.Account): an account that deploys the contract and requests data
             reporter (src.utils.account.Account): an account that stakes ALGO tokens and submits data
             governance_address (src.utils.account.Account): an account that decides the quality of the reporter's data
+            contract_count (int): number of feeds deployed per query_id, the contracts are built for that many feeds
+            watcher (src.utils.watcher.BlockWatcher): confirms transactions from a shared block stream (optional)
+            median_strategy (str): median subroutine new medianizers are compiled with, see medianizer_contract
+            multi_query (bool): feeds report to one medianizer shared by many query_ids, see multi_medianizer_contract
+            history_size (int): past reports new feeds keep on chain, see get_history
 
         """
 
@@ -72,6 +94,14 @@ class Scripts:
         self.feed_app_id = feed_app_id
         self.medianizer_app_id = medianizer_app_id
         self.contract_count = contract_count
+        self.watcher = watcher
+        self.median_strategy = median_strategy
+        self.multi_query = multi_query
+        self.history_size = history_size
+        # suggested params shared by every transaction sent to this algod node
+        self.params = getParamsProvider(client)
+        # reads the state of many apps at once, see get_current_feeds
+        self.state_reader = StateReader(client)
 
         self.feeds = []
 
@@ -82,7 +112,9 @@ class Scripts:
 
     def get_contracts(self, client: AlgodClient) -> Tuple[bytes, bytes]:
         """
-        Get the compiled TEAL contracts for the tellor contract.
+        Get the compiled TEAL contracts for the tellor contract,
+        built for a medianizer of contract_count feeds.
+        Compiled programs are cached on disk, see src.utils.artifacts
 
         Args:
             client: An algod client that has the ability to compile TEAL programs.
@@ -90,18 +122,26 @@ class Scripts:
             A tuple of 2 byte strings. The first is the approval program, and the
             second is the clear state program.
         """
-        global APPROVAL_PROGRAM
-        global CLEAR_STATE_PROGRAM
-
-        if len(APPROVAL_PROGRAM) == 0:
-            APPROVAL_PROGRAM = fullyCompileContract(client, approval_program())
-            CLEAR_STATE_PROGRAM = fullyCompileContract(client, clear_state_program())
+        key = (self.contract_count, self.multi_query, self.history_size)
+        if key not in FEED_PROGRAMS:
+            FEED_PROGRAMS[key] = (
+                compileCached(
+                    client,
+                    approval_program,
+                    feed_count=self.contract_count,
+                    multi_query=self.multi_query,
+                    history_size=self.history_size,
+                ),
+                compileCached(client, clear_state_program),
+            )
 
-        return APPROVAL_PROGRAM, CLEAR_STATE_PROGRAM
+        return FEED_PROGRAMS[key]
 
     def get_contracts_medianizer(self, client: AlgodClient) -> Tuple[bytes, bytes]:
         """
-        Get the compiled TEAL contracts for the tellor contract.
+        Get the compiled TEAL contracts for the medianizer contract
+        of contract_count feeds, the multi-query medianizer if multi_query is set.
+        Compiled programs are cached on disk, see src.utils.artifacts
 
         Args:
             client: An algod client that has the ability to compile TEAL programs.
@@ -109,14 +149,19 @@ class Scripts:
             A tuple of 2 byte strings. The first is the approval program, and the
             second is the clear state program.
         """
-        global MEDIANIZER_APPROVAL_PROGRAM
-        global MEDIANIZER_CLEAR_STATE_PROGRAM
-
-        if len(MEDIANIZER_APPROVAL_PROGRAM) == 0:
-            MEDIANIZER_APPROVAL_PROGRAM = fullyCompileContract(client, approval_medianizer())
-            MEDIANIZER_CLEAR_STATE_PROGRAM = fullyCompileContract(client, clear_medianizer())
+        key = (self.median_strategy, self.contract_count, self.multi_query)
+        if key not in MEDIANIZER_PROGRAMS:
+            approval, clear = (
+                (approval_multi_medianizer, clear_multi_medianizer)
+                if self.multi_query
+                else (approval_medianizer, clear_medianizer)
+            )
+            MEDIANIZER_PROGRAMS[key] = (
+                compileCached(client, approval, median_strategy=self.median_strategy, feed_count=self.contract_count),
+                compileCached(client, clear),
+            )
 
-        return MEDIANIZER_APPROVAL_PROGRAM, MEDIANIZER_CLEAR_STATE_PROGRAM
+        return MEDIANIZER_PROGRAMS[key]
 
     def get_medianized_value(self):
 
@@ -124,20 +169,57 @@ class Scripts:
 
         return state["median"]
 
-    def get_current_feeds(self):
+    def get_query_median(self, query_id: bytes) -> Tuple[int, int]:
+        """
+        Read the median of a query_id from a multi-query medianizer
 
+        Returns:
+            the median and its timestamp, 0 and 0 until the query_id is reported
+        """
         state = getAppGlobalState(self.client, self.medianizer_app_id)
+        entry = state[query_key(query_id)]
+        return int.from_bytes(entry[-16:-8], "big"), int.from_bytes(entry[-8:], "big")
 
-        current_data = {}
+    def get_current_feeds(self) -> Dict[int, Dict[str, int]]:
+        """
+        Read the last report of every feed
+
+        Returns:
+            dict: feed app id to the timestamp and value of its last report, feeds without reports are left out
+        """
+        return {
+            feed_app_id: {"timestamp": feed.lastTimestamp, "value": feed.lastValue}
+            for feed_app_id, feed in self.state_reader.feeds(self.feeds).items()
+            if feed.lastValue is not None
+        }
+
+    def get_history(
+        self, start: int = 0, end: Optional[int] = None, feed_app_id: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Read the reports a feed built with a history_size keeps on chain, in one read of its global state
 
-        for i in range(5):
-            feed_app_id = state["app_" + i]
-            feed_state = getAppGlobalState(self.client, feed_app_id)
-            current_data[feed_app_id]["values"] = feed_state["values"]
-            current_data[feed_app_id]["timestamps"] = feed_state["timestamps"]
+        Args:
+            start (int): earliest timestamp to return
+            end (int): latest timestamp to return, the latest report if not given
+            feed_app_id (int): the feed to read, this scripts' feed if not given
+        Returns:
+            List[Tuple[int, int]]: timestamp and value of the reports between start and end, oldest first
+        """
+        state = getAppGlobalState(self.client, feed_app_id or self.feed_app_id)
+        return [
+            (timestamp, value)
+            for timestamp, value in decodeHistory(state)
+            if timestamp >= start and (end is None or timestamp <= end)
+        ]
 
     def deploy_tellor_flex(
-        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[str]
+        self,
+        query_id: str,
+        query_data: str,
+        timestamp_freshness: int,
+        multisigaccounts_sk: List[str],
+        batch: bool = False,
     ) -> int:
         """
         Deploy a new tellor reporting contract.
@@ -149,145 +231,265 @@ class Scripts:
             governance_address: the account that can vote to dispute reports
             query_id: the ID of the data requested to be put on chain
             query_data: the in-depth specifications of the data requested
+            batch: create all contracts in one atomic group instead of one group each
         Returns:
             int: The ID of the newly created auction app.
         """
+        print("Deploying contracts from governance address: ", self.governance_address)
+
+        print(f"Forming {self.contract_count} {query_id} contracts")
+        txns = [self.feed_create_txn(query_id, query_data, timestamp_freshness, i) for i in range(self.contract_count)]
+        txid = self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4, batch=batch)
+        for i in txid:
+            res = self.client.pending_transaction_info(i)
+            app_id = res["application-index"]
+            self.feeds.append(app_id)
+
+        print("Created new apps:", self.feeds)
+        return self.feeds
+
+    def feed_create_txn(
+        self, query_id: str, query_data: str, timestamp_freshness: int, index: int, medianizer_id: int = 0
+    ) -> transaction.ApplicationCreateTxn:
+        """builds the app create transaction of the feed contract numbered `index`"""
         approval, clear = self.get_contracts(self.client)
 
-        globalSchema = transaction.StateSchema(num_uints=10, num_byte_slices=9)
+        globalSchema = transaction.StateSchema(num_uints=10, num_byte_slices=9 + history_keys(self.history_size))
         localSchema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
-        medianizer_id = 0
         app_args = [query_id.encode("utf-8"), query_data.encode("utf-8"), medianizer_id, timestamp_freshness]
 
+        return transaction.ApplicationCreateTxn(
+            sender=self.governance_address,
+            on_complete=transaction.OnComplete.NoOpOC,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=globalSchema,
+            local_schema=localSchema,
+            app_args=app_args,
+            sp=self.params.get(),
+            note=f"{query_id} Feed {index}".encode(),
+        )
+
+    def execute_grouped(
+        self, txns: List[transaction.Transaction], multisigaccounts_sk: List[Any], wait_rounds: int, batch: bool = True
+    ) -> List[str]:
+        """
+        Sign governance transactions with the multisig and send them
+
+        Args:
+            txns: transactions sent from the governance multisig
+            multisigaccounts_sk: private keys of the multisig signers
+            wait_rounds: rounds to wait for each group to be confirmed
+            batch: send up to MAX_GROUP_SIZE transactions per atomic group
+                (confirmed together in one round) instead of one group per transaction
+        Returns:
+            List[str]: the transaction ids, in the order of `txns`
+        """
         multisig_public_keys = [Account(i).getAddress() for i in multisigaccounts_sk]
         multisig = Multisig(version=1, threshold=2, addresses=multisig_public_keys)
+        signer = MultisigTransactionSigner(multisig, multisigaccounts_sk)
 
-        print("Deploying contracts from governance address: ", self.governance_address)
-
-        print(f"Forming {self.contract_count} {query_id} contracts")
-        for i in range(self.contract_count):
+        group_size = MAX_GROUP_SIZE if batch else 1
+        txn_ids = []
+        for start in range(0, len(txns), group_size):
+            end = start + group_size
             comp = AtomicTransactionComposer()
-            comp.add_transaction(
-                TransactionWithSigner(
-                    transaction.ApplicationCreateTxn(
-                        sender=self.governance_address,
-                        on_complete=transaction.OnComplete.NoOpOC,
-                        approval_program=approval,
-                        clear_program=clear,
-                        global_schema=globalSchema,
-                        local_schema=localSchema,
-                        app_args=app_args,
-                        sp=self.client.suggested_params(),
-                        note=f"{query_id} Feed {i}".encode(),
-                    ),
-                    MultisigTransactionSigner(multisig, multisigaccounts_sk),
-                )
-            )
-            txid = comp.execute(self.client, 4).tx_ids
-            for i in txid:
-                res = self.client.pending_transaction_info(i)
-                app_id = res["application-index"]
-                self.feeds.append(app_id)
-
-        print("Created new apps:", self.feeds)
-        return self.feeds
+            for txn in txns[start:end]:
+                comp.add_transaction(TransactionWithSigner(txn, signer))
+            txn_ids += comp.execute(self.client, wait_rounds).tx_ids
+            # the next group is built with a later first valid round, see src.utils.params
+            self.params.invalidate()
+        return txn_ids
 
     def deploy_medianizer(self, timestamp_freshness: int, query_id: bytes, multisigaccounts_sk: List[int]) -> int:
+        tx_id = self.execute_grouped(
+            [self.medianizer_create_txn(timestamp_freshness, query_id)], multisigaccounts_sk, 4
+        )
+        res = self.client.pending_transaction_info(tx_id[0])
+        self.medianizer_app_id = res["application-index"]
+        print(f"Created medianizer app: {self.medianizer_app_id}")
+        return self.medianizer_app_id
+
+    def medianizer_create_txn(self, timestamp_freshness: int, query_id: bytes) -> transaction.ApplicationCreateTxn:
+        """builds the app create transaction of the medianizer contract"""
         approval, clear = self.get_contracts_medianizer(self.client)
 
-        global_schema = transaction.StateSchema(num_uints=7, num_byte_slices=7)
+        # an address per feed, the governance address and the query_id
+        global_schema = transaction.StateSchema(num_uints=7, num_byte_slices=self.contract_count + 2)
         local_schema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
 
-        multisig_public_keys = [Account(i).getAddress() for i in multisigaccounts_sk]
-        multisig = Multisig(version=1, threshold=2, addresses=multisig_public_keys)
-
         app_args = [timestamp_freshness, query_id]
-        comp = AtomicTransactionComposer()
-        comp.add_transaction(
-            TransactionWithSigner(
-                transaction.ApplicationCreateTxn(
-                    sender=self.governance_address,
-                    sp=self.client.suggested_params(),
-                    on_complete=transaction.OnComplete.NoOpOC,
-                    approval_program=approval,
-                    clear_program=clear,
-                    global_schema=global_schema,
-                    local_schema=local_schema,
-                    app_args=app_args,
-                ),
-                MultisigTransactionSigner(multisig, multisigaccounts_sk),
-            )
+        return transaction.ApplicationCreateTxn(
+            sender=self.governance_address,
+            sp=self.params.get(),
+            on_complete=transaction.OnComplete.NoOpOC,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=global_schema,
+            local_schema=local_schema,
+            app_args=app_args,
         )
-        tx_id = comp.execute(self.client, 4).tx_ids
-        res = self.client.pending_transaction_info(tx_id[0])
-        self.medianizer_app_id = res["application-index"]
+
+    def deploy_batched(
+        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[Any]
+    ) -> Tuple[List[int], int]:
+        """
+        Deploy and wire up all contracts of a query_id in two atomic groups:
+        1) create the feed contracts and the medianizer
+        2) activate the medianizer and point every feed at it
+
+        Returns:
+            the feed app ids and the medianizer app id
+        """
+        if self.contract_count + 1 > MAX_GROUP_SIZE:
+            raise ValueError(f"can't create {self.contract_count} feeds and a medianizer in one group")
+
+        txns = [self.feed_create_txn(query_id, query_data, timestamp_freshness, i) for i in range(self.contract_count)]
+        txns.append(self.medianizer_create_txn(timestamp_freshness, query_id))
+        txn_ids = self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4)
+
+        app_ids = [self.client.pending_transaction_info(i)["application-index"] for i in txn_ids]
+        self.feeds += app_ids[:-1]
+        self.medianizer_app_id = app_ids[-1]
+        print("Created new apps:", self.feeds)
         print(f"Created medianizer app: {self.medianizer_app_id}")
+
+        txns = [self.activate_contract_txn()] + [self.change_medianizer_txn(i) for i in self.feeds]
+        self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4)
+        print("Medianizer active and set on feeds")
+
+        return self.feeds, self.medianizer_app_id
+
+    def deploy_multi_medianizer(self, timestamp_freshness: int, multisigaccounts_sk: List[Any]) -> int:
+        """
+        Deploy a medianizer shared by many query_ids, see multi_medianizer_contract.
+        query_ids are added to it with deploy_query
+
+        Returns:
+            int: the medianizer app id
+        """
+        tx_id = self.execute_grouped([self.multi_medianizer_create_txn(timestamp_freshness)], multisigaccounts_sk, 4)
+        self.medianizer_app_id = self.client.pending_transaction_info(tx_id[0])["application-index"]
+        self.medianizer_app_address = get_application_address(self.medianizer_app_id)
+        print(f"Created multi-query medianizer app: {self.medianizer_app_id}")
         return self.medianizer_app_id
 
-    def activate_contract(self, multisigaccounts_sk: List[Any]) -> List[int]:
+    def multi_medianizer_create_txn(self, timestamp_freshness: int) -> transaction.ApplicationCreateTxn:
+        """builds the app create transaction of the multi-query medianizer"""
+        approval, clear = self.get_contracts_medianizer(self.client)
 
-        multisig_public_keys = [Account(i).getAddress() for i in multisigaccounts_sk]
-        multisig = Multisig(version=1, threshold=2, addresses=multisig_public_keys)
+        # an entry per query_id and the governance address
+        global_schema = transaction.StateSchema(num_uints=1, num_byte_slices=MAX_QUERIES + 1)
+        local_schema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
 
-        comp = AtomicTransactionComposer()
-        comp.add_transaction(
-            TransactionWithSigner(
-                transaction.ApplicationNoOpTxn(
-                    sender=self.governance_address,
-                    sp=self.client.suggested_params(),
-                    index=self.medianizer_app_id,
-                    app_args=["activate_contract"],
-                    foreign_apps=self.feeds,
-                ),
-                MultisigTransactionSigner(multisig, multisigaccounts_sk),
-            )
+        return transaction.ApplicationCreateTxn(
+            sender=self.governance_address,
+            sp=self.params.get(),
+            on_complete=transaction.OnComplete.NoOpOC,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=global_schema,
+            local_schema=local_schema,
+            app_args=[timestamp_freshness],
+        )
+
+    def deploy_query(
+        self, query_id: str, query_data: str, timestamp_freshness: int, multisigaccounts_sk: List[Any]
+    ) -> List[int]:
+        """
+        Deploy the feeds of a query_id on the multi-query medianizer in two atomic groups:
+        1) create the feed contracts, pointed at the medianizer
+        2) add the query_id and its feeds to the medianizer
+
+        Returns:
+            the feed app ids, also kept in self.feeds to report with
+        """
+        if not self.multi_query:
+            raise ValueError("deploy_query needs scripts built with multi_query=True")
+        if self.contract_count > MAX_GROUP_SIZE:
+            raise ValueError(f"can't create {self.contract_count} feeds in one group")
+
+        txns = [
+            self.feed_create_txn(query_id, query_data, timestamp_freshness, i, self.medianizer_app_id)
+            for i in range(self.contract_count)
+        ]
+        txn_ids = self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=4)
+        self.feeds = [self.client.pending_transaction_info(i)["application-index"] for i in txn_ids]
+        print(f"Created new {query_id} apps:", self.feeds)
+
+        self.execute_grouped([self.add_query_txn(query_id.encode(), self.feeds)], multisigaccounts_sk, wait_rounds=4)
+        print(f"{query_id} added to medianizer {self.medianizer_app_id}")
+
+        return self.feeds
+
+    def add_query_txn(self, query_id: bytes, feeds: List[int]) -> transaction.ApplicationNoOpTxn:
+        """builds the transaction adding a query_id and its feeds to the multi-query medianizer"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address,
+            index=self.medianizer_app_id,
+            app_args=["add_query", query_id],
+            foreign_apps=feeds,
+            sp=self.params.get(),
         )
-        tx_id = comp.execute(self.client, 4).tx_ids
+
+    def remove_query(self, query_id: bytes, multisigaccounts_sk: List[Any]) -> List[str]:
+        """removes a query_id from the multi-query medianizer, its feeds can't report to it anymore"""
+        return self.execute_grouped([self.remove_query_txn(query_id)], multisigaccounts_sk, wait_rounds=4)
+
+    def remove_query_txn(self, query_id: bytes) -> transaction.ApplicationNoOpTxn:
+        """builds the transaction removing a query_id from the multi-query medianizer"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address,
+            index=self.medianizer_app_id,
+            app_args=["remove_query", query_id],
+            sp=self.params.get(),
+        )
+
+    def activate_contract(self, multisigaccounts_sk: List[Any]) -> List[int]:
+        tx_id = self.execute_grouped([self.activate_contract_txn()], multisigaccounts_sk, 4)
         print(f"Medianizer active, tx hash: {tx_id}")
         return tx_id
 
-    def change_medianizer(self, multisigaccounts_sk: List[Any]) -> List[int]:
-
-        multisig_public_keys = [Account(i).getAddress() for i in multisigaccounts_sk]
-        multisig = Multisig(version=1, threshold=2, addresses=multisig_public_keys)
+    def activate_contract_txn(self) -> transaction.ApplicationNoOpTxn:
+        """builds the call that registers the feeds on the medianizer"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address,
+            sp=self.params.get(),
+            index=self.medianizer_app_id,
+            app_args=["activate_contract"],
+            foreign_apps=self.feeds,
+        )
 
-        txn_ids = []
-        for i in self.feeds:
-            comp = AtomicTransactionComposer()
-            comp.add_transaction(
-                TransactionWithSigner(
-                    transaction.ApplicationNoOpTxn(
-                        sender=self.governance_address,
-                        sp=self.client.suggested_params(),
-                        index=i,
-                        app_args=["change_medianizer", self.medianizer_app_id],
-                    ),
-                    MultisigTransactionSigner(multisig, multisigaccounts_sk),
-                )
-            )
-            tx_id = comp.execute(self.client, 3).tx_ids
-            txn_ids.append(tx_id[0])
-        return txn_ids
+    def change_medianizer(self, multisigaccounts_sk: List[Any], batch: bool = False) -> List[int]:
+        """points every feed at the medianizer, in one atomic group if `batch`"""
+        txns = [self.change_medianizer_txn(i) for i in self.feeds]
+        return self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=3, batch=batch)
+
+    def change_medianizer_txn(self, feed_app_id: int) -> transaction.ApplicationNoOpTxn:
+        """builds the call that points a feed at the medianizer"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address,
+            sp=self.params.get(),
+            index=feed_app_id,
+            app_args=["change_medianizer", self.medianizer_app_id],
+        )
 
-    def change_governance(self, new_gov_address: str, multisigaccounts_sk: List[Any]) -> List[int]:
-        """updates governance contract across all apps of a query_id"""
-        txn_ids = []
-        for i in self.feeds + [self.medianizer_app_id]:
-            comp = AtomicTransactionComposer()
-            comp.add_transaction(
-                TransactionWithSigner(
-                    transaction.ApplicationNoOpTxn(
-                        sender=self.governance_address,
-                        sp=self.client.suggested_params(),
-                        index=i,
-                        app_args=["change_governance", new_gov_address],
-                    ),
-                    MultisigTransactionSigner(self.governance_address, multisigaccounts_sk),
-                )
+    def change_governance(self, new_gov_address: str, multisigaccounts_sk: List[Any], batch: bool = False) -> List[int]:
+        """updates governance contract across all apps of a query_id, in one atomic group if `batch`"""
+        txns = self.change_governance_txns(new_gov_address)
+        return self.execute_grouped(txns, multisigaccounts_sk, wait_rounds=3, batch=batch)
+
+    def change_governance_txns(self, new_gov_address: str) -> List[transaction.ApplicationNoOpTxn]:
+        """builds the calls that change the governance of every feed and of the medianizer"""
+        return [
+            transaction.ApplicationNoOpTxn(
+                sender=self.governance_address,
+                sp=self.params.get(),
+                index=i,
+                app_args=["change_governance", new_gov_address],
             )
-            tx_id = comp.execute(self.client, 3).tx_ids
-            txn_ids.append(tx_id[0])
-        return txn_ids
+            for i in self.feeds + [self.medianizer_app_id]
+        ]
 
     def stake(self, stake_amount=None) -> None:
         """
@@ -305,7 +507,18 @@ class Scripts:
         if stake_amount is None:
             stake_amount = appGlobalState[b"stake_amount"]
 
-        suggestedParams = self.client.suggested_params()
+        payTxn, stakeInTx = self.stake_txns(stake_amount)
+
+        signedPayTxn = payTxn.sign(self.reporter.getPrivateKey())
+        signedAppCallTxn = stakeInTx.sign(self.reporter.getPrivateKey())
+
+        self.client.send_transactions([signedPayTxn, signedAppCallTxn])
+
+        waitForTransaction(self.client, stakeInTx.get_txid(), watcher=self.watcher)
+
+    def stake_txns(self, stake_amount: int) -> List[transaction.Transaction]:
+        """builds the group paying the stake to the feed and calling stake()"""
+        suggestedParams = self.params.get()
 
         payTxn = transaction.PaymentTxn(
             sender=self.reporter.getAddress(),
@@ -318,21 +531,25 @@ class Scripts:
             sender=self.reporter.getAddress(),
             index=self.feed_app_id,
             app_args=[b"stake"],
-            sp=self.client.suggested_params(),
+            sp=suggestedParams,
         )
 
-        transaction.assign_group_id([payTxn, stakeInTx])
+        return transaction.assign_group_id([payTxn, stakeInTx])
 
-        signedPayTxn = payTxn.sign(self.reporter.getPrivateKey())
-        signedAppCallTxn = stakeInTx.sign(self.reporter.getPrivateKey())
+    def tip(self, tip_amount: int) -> None:
 
-        self.client.send_transactions([signedPayTxn, signedAppCallTxn])
+        payTxn, no_op_txn = self.tip_txns(tip_amount)
 
-        waitForTransaction(self.client, stakeInTx.get_txid())
+        signed_pay_txn = payTxn.sign(self.tipper.getPrivateKey())
+        signed_no_op_txn = no_op_txn.sign(self.tipper.getPrivateKey())
 
-    def tip(self, tip_amount: int) -> None:
+        self.client.send_transactions([signed_pay_txn, signed_no_op_txn])
+
+        waitForTransaction(self.client, no_op_txn.get_txid(), watcher=self.watcher)
 
-        suggestedParams = self.client.suggested_params()
+    def tip_txns(self, tip_amount: int) -> List[transaction.Transaction]:
+        """builds the group paying a tip to the feed and calling tip()"""
+        suggestedParams = self.params.get()
 
         payTxn = transaction.PaymentTxn(
             sender=self.tipper.getAddress(), receiver=self.feed_app_address, amt=tip_amount, sp=suggestedParams
@@ -342,14 +559,7 @@ class Scripts:
             sender=self.tipper.getAddress(), index=self.feed_app_id, app_args=[b"tip"], sp=suggestedParams
         )
 
-        transaction.assign_group_id([payTxn, no_op_txn])
-
-        signed_pay_txn = payTxn.sign(self.tipper.getPrivateKey())
-        signed_no_op_txn = no_op_txn.sign(self.tipper.getPrivateKey())
-
-        self.client.send_transactions([signed_pay_txn, signed_no_op_txn])
-
-        waitForTransaction(self.client, no_op_txn.get_txid())
+        return transaction.assign_group_id([payTxn, no_op_txn])
 
     def report(self, query_id: bytes, value: bytes, timestamp: int):
         """
@@ -362,23 +572,27 @@ class Scripts:
 
         print("reporter address:", self.reporter.addr)
 
+        print(self.reporter.addr)
+        submitValueTxn = self.report_txn(query_id, value, timestamp)
+
+        signedSubmitValueTxn = submitValueTxn.sign(self.reporter.getPrivateKey())
+        self.client.send_transaction(signedSubmitValueTxn)
+        waitForTransaction(self.client, signedSubmitValueTxn.get_txid(), timeout=30, watcher=self.watcher)
+
+    def report_txn(self, query_id: bytes, value: bytes, timestamp: int) -> transaction.ApplicationNoOpTxn:
+        """builds the report() call of the reporter"""
         if isinstance(self.governance_address, Multisig):
             self.governance_address = self.governance_address.address()
 
-        print(self.reporter.addr)
-        submitValueTxn = transaction.ApplicationNoOpTxn(
+        return transaction.ApplicationNoOpTxn(
             sender=self.reporter.getAddress(),
             accounts=[self.governance_address],
             index=self.feed_app_id,
             app_args=[b"report", query_id, value, timestamp],
             foreign_apps=self.feeds + [self.medianizer_app_id],
-            sp=self.client.suggested_params(),
+            sp=self.params.get(),
         )
 
-        signedSubmitValueTxn = submitValueTxn.sign(self.reporter.getPrivateKey())
-        self.client.send_transaction(signedSubmitValueTxn)
-        waitForTransaction(self.client, signedSubmitValueTxn.get_txid(), timeout=30)
-
     # def transfer(self, _from: str, _to: str, amount: int, multisigaccounts_sk: List[Any] = None):
     #     """
     #     transfer ALGO tokens
@@ -395,22 +609,12 @@ class Scripts:
         """
 
         if ff_time == 0:
-            txn = transaction.ApplicationNoOpTxn(
-                sender=self.reporter.getAddress(),
-                index=self.feed_app_id,
-                app_args=[b"withdraw"],
-                sp=self.client.suggested_params(),
-            )
+            txn = self.withdraw_txn()
             signedTxn = txn.sign(self.reporter.getPrivateKey())
             self.client.send_transaction(signedTxn)
-            waitForTransaction(self.client, signedTxn.get_txid())
+            waitForTransaction(self.client, signedTxn.get_txid(), watcher=self.watcher)
         else:
-            txn = transaction.ApplicationNoOpTxn(
-                sender=self.reporter.getAddress(),
-                index=self.feed_app_id,
-                app_args=[b"withdraw"],
-                sp=self.client.suggested_params(),
-            )
+            txn = self.withdraw_txn()
             signedTxn = txn.sign(self.reporter.getPrivateKey())
             dr_request = create_dryrun(self.client, [signedTxn], latest_timestamp=time.time() + ff_time)
             dr_response = self.client.dryrun(dr_request)
@@ -419,30 +623,38 @@ class Scripts:
                 if txn.app_call_rejected():
                     print(txn.app_trace(dr_result.StackPrinterConfig(max_value_width=0)))
 
+    def withdraw_txn(self) -> transaction.ApplicationNoOpTxn:
+        """builds the withdraw() call of the reporter"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.reporter.getAddress(),
+            index=self.feed_app_id,
+            app_args=[b"withdraw"],
+            sp=self.params.get(),
+        )
+
     def request_withdraw(self):
         """
         locks reporter for 1 day before being allowed to withdraw stake
         """
-        txn = transaction.ApplicationNoOpTxn(
+        txn = self.request_withdraw_txn()
+        signedTxn = txn.sign(self.reporter.getPrivateKey())
+        self.client.send_transaction(signedTxn)
+        waitForTransaction(self.client, signedTxn.get_txid(), watcher=self.watcher)
+
+    def request_withdraw_txn(self) -> transaction.ApplicationNoOpTxn:
+        """builds the request_withdraw() call of the reporter"""
+        return transaction.ApplicationNoOpTxn(
             sender=self.reporter.getAddress(),
             index=self.feed_app_id,
             app_args=[b"request_withdraw"],
-            sp=self.client.suggested_params(),
+            sp=self.params.get(),
         )
-        signedTxn = txn.sign(self.reporter.getPrivateKey())
-        self.client.send_transaction(signedTxn)
-        waitForTransaction(self.client, signedTxn.get_txid())
 
     def withdraw_dry(self, txns: List = None, timestamp: int = 0):
         """
         locks reporter for 1 day before being allowed to withdraw stake
         """
-        txn = transaction.ApplicationNoOpTxn(
-            sender=self.reporter.getAddress(),
-            index=self.feed_app_id,
-            app_args=[b"withdraw"],
-            sp=self.client.suggested_params(),
-        )
+        txn = self.withdraw_txn()
         signedTxn = txn.sign(self.reporter.getPrivateKey())
         dryrun = transaction.create_dryrun(client=self.client, txns=[signedTxn], latest_timestamp=timestamp)
         dryrun_response = self.client.dryrun(dryrun)
@@ -459,15 +671,17 @@ class Scripts:
 
         comp = AtomicTransactionComposer()
         comp.add_transaction(
-            TransactionWithSigner(
-                transaction.ApplicationNoOpTxn(
-                    sender=self.governance_address,
-                    sp=self.client.suggested_params(),
-                    index=self.feed_app_id,
-                    app_args=["slash_reporter"],
-                ),
-                MultisigTransactionSigner(multisig, multisigaccounts_sk),
-            )
+            TransactionWithSigner(self.slash_reporter_txn(), MultisigTransactionSigner(multisig, multisigaccounts_sk))
         )
         txn_id = comp.execute(self.client, 3).tx_ids
+        self.params.invalidate()
         return txn_id
+
+    def slash_reporter_txn(self) -> transaction.ApplicationNoOpTxn:
+        """builds the slash_reporter() call of governance"""
+        return transaction.ApplicationNoOpTxn(
+            sender=self.governance_address,
+            sp=self.params.get(),
+            index=self.feed_app_id,
+            app_args=["slash_reporter"],
+        )
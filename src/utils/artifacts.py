@@ -0,0 +1,123 @@
+"""
+On-disk cache of compiled TEAL programs
+
+artifacts are content addressed: the key hashes the pyteal contract sources,
+the local assembler's source, the pyteal and TEAL versions and the arguments the
+program is built with,
+so a cache hit skips both building the pyteal AST and the algod compile call.
+on a miss TEAL is assembled locally, algod is only used for programs
+the local assembler doesn't support
+
+`python -m src.utils.artifacts` builds every contract offline and prints its hash
+"""
+import hashlib
+import os
+from base64 import b64decode
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from algosdk.v2client.algod import AlgodClient
+from pyteal import compileTeal
+from pyteal import Expr
+from pyteal import Mode
+from pyteal.compiler.compiler import MAX_TEAL_VERSION
+
+from src.utils.assembler import assemble
+from src.utils.assembler import AssemblerError
+
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent / "contracts"
+
+# bytecode assembled by an older version of the local assembler isn't reused
+ASSEMBLER_PATH = Path(__file__).resolve().parent / "assembler.py"
+
+# override with the TEAL_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "build" / "teal_cache"
+
+
+def cacheDir() -> Path:
+    return Path(os.environ.get("TEAL_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def contractSourcesHash() -> str:
+    """hash of every pyteal source file in src/contracts"""
+    digest = hashlib.sha256()
+    for path in sorted(CONTRACTS_DIR.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def artifactKey(build: Callable[..., Expr], version: int = MAX_TEAL_VERSION, **kwargs: Any) -> str:
+    """content address of the program returned by build(**kwargs)"""
+    digest = hashlib.sha256()
+    digest.update(contractSourcesHash().encode())
+    digest.update(hashlib.sha256(ASSEMBLER_PATH.read_bytes()).hexdigest().encode())
+    digest.update(f"{build.__module__}.{build.__qualname__}".encode())
+    digest.update(repr(sorted(kwargs.items())).encode())
+    digest.update(f"teal={version} pyteal={package_version('pyteal')}".encode())
+    return digest.hexdigest()
+
+
+def compileCached(
+    client: Optional[AlgodClient], build: Callable[..., Expr], version: int = MAX_TEAL_VERSION, **kwargs: Any
+) -> bytes:
+    """
+    Get the bytecode of a pyteal program, compiling it only on a cache miss
+
+    Args:
+        client (AlgodClient): compiles the TEAL if the local assembler can't (optional)
+        build (callable): returns the pyteal program, e.g. contracts.approval_program
+        version (int): TEAL version to compile to
+        kwargs: arguments passed to build
+    Returns:
+        bytes: the compiled program
+    """
+    key = artifactKey(build, version, **kwargs)
+    directory = cacheDir()
+    binary_path = directory / f"{key}.bin"
+
+    if binary_path.exists():
+        return binary_path.read_bytes()
+
+    teal = compileTeal(build(**kwargs), mode=Mode.Application, version=version)
+    program = assembleTeal(client, teal)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    _writeAtomic(directory / f"{key}.teal", teal.encode())
+    _writeAtomic(binary_path, program)
+
+    return program
+
+
+def assembleTeal(client: Optional[AlgodClient], teal: str) -> bytes:
+    """assembles TEAL locally, falling back to algod's compile endpoint"""
+    try:
+        return assemble(teal)
+    except AssemblerError:
+        if client is None:
+            raise
+        return b64decode(client.compile(teal)["result"])
+
+
+def _writeAtomic(path: Path, data: bytes) -> None:
+    """writes a file so concurrent readers never see it half written"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    from src.contracts import contracts
+    from src.contracts import medianizer_contract
+
+    for build in (
+        contracts.approval_program,
+        contracts.clear_state_program,
+        medianizer_contract.approval_program,
+        medianizer_contract.clear_state_program,
+    ):
+        program = compileCached(None, build)
+        print(f"{build.__module__}.{build.__qualname__}: {hashlib.sha256(program).hexdigest()} ({len(program)} bytes)")
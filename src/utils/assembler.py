@@ -0,0 +1,557 @@
+"""
+Offline TEAL assembler
+
+turns TEAL source into the same bytecode as algod's /v2/teal/compile for the
+opcodes our pyteal contracts emit, so programs can be built and hashed
+without a node. it follows go-algorand's assembler for TEAL v4+:
+`int`/`byte` constants used more than once go into intcblock/bytecblock,
+ordered by how often they are used (ties keep first-use order), and
+constants used once become pushint/pushbytes.
+
+anything outside the supported subset raises AssemblerError,
+callers fall back to algod in that case.
+"""
+import base64
+import re
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from algosdk import encoding
+
+# opcodes without immediates
+SIMPLE_OPCODES = {
+    "err": 0x00,
+    "sha256": 0x01,
+    "keccak256": 0x02,
+    "sha512_256": 0x03,
+    "+": 0x08,
+    "-": 0x09,
+    "/": 0x0A,
+    "*": 0x0B,
+    "<": 0x0C,
+    ">": 0x0D,
+    "<=": 0x0E,
+    ">=": 0x0F,
+    "&&": 0x10,
+    "||": 0x11,
+    "==": 0x12,
+    "!=": 0x13,
+    "!": 0x14,
+    "len": 0x15,
+    "itob": 0x16,
+    "btoi": 0x17,
+    "%": 0x18,
+    "|": 0x19,
+    "&": 0x1A,
+    "^": 0x1B,
+    "~": 0x1C,
+    "mulw": 0x1D,
+    "addw": 0x1E,
+    "divmodw": 0x1F,
+    "intc_0": 0x22,
+    "intc_1": 0x23,
+    "intc_2": 0x24,
+    "intc_3": 0x25,
+    "bytec_0": 0x28,
+    "bytec_1": 0x29,
+    "bytec_2": 0x2A,
+    "bytec_3": 0x2B,
+    "gloads": 0x3B,
+    "gaids": 0x3D,
+    "loads": 0x3E,
+    "stores": 0x3F,
+    "return": 0x43,
+    "assert": 0x44,
+    "pop": 0x48,
+    "dup": 0x49,
+    "dup2": 0x4A,
+    "swap": 0x4C,
+    "select": 0x4D,
+    "concat": 0x50,
+    "substring3": 0x52,
+    "getbit": 0x53,
+    "setbit": 0x54,
+    "getbyte": 0x55,
+    "setbyte": 0x56,
+    "extract3": 0x58,
+    "extract_uint16": 0x59,
+    "extract_uint32": 0x5A,
+    "extract_uint64": 0x5B,
+    "balance": 0x60,
+    "app_opted_in": 0x61,
+    "app_local_get": 0x62,
+    "app_local_get_ex": 0x63,
+    "app_global_get": 0x64,
+    "app_global_get_ex": 0x65,
+    "app_local_put": 0x66,
+    "app_global_put": 0x67,
+    "app_local_del": 0x68,
+    "app_global_del": 0x69,
+    "min_balance": 0x78,
+    "retsub": 0x89,
+    "shl": 0x90,
+    "shr": 0x91,
+    "sqrt": 0x92,
+    "bitlen": 0x93,
+    "exp": 0x94,
+    "expw": 0x95,
+    "bsqrt": 0x96,
+    "divw": 0x97,
+    "log": 0xB0,
+    "itxn_begin": 0xB1,
+    "itxn_submit": 0xB3,
+    "itxn_next": 0xB6,
+}
+
+BRANCH_OPCODES = {"bnz": 0x40, "bz": 0x41, "b": 0x42, "callsub": 0x88}
+
+TXN_FIELDS = {
+    name: i
+    for i, name in enumerate(
+        [
+            "Sender",
+            "Fee",
+            "FirstValid",
+            "FirstValidTime",
+            "LastValid",
+            "Note",
+            "Lease",
+            "Receiver",
+            "Amount",
+            "CloseRemainderTo",
+            "VotePK",
+            "SelectionPK",
+            "VoteFirst",
+            "VoteLast",
+            "VoteKeyDilution",
+            "Type",
+            "TypeEnum",
+            "XferAsset",
+            "AssetAmount",
+            "AssetSender",
+            "AssetReceiver",
+            "AssetCloseTo",
+            "GroupIndex",
+            "TxID",
+            "ApplicationID",
+            "OnCompletion",
+            "ApplicationArgs",
+            "NumAppArgs",
+            "Accounts",
+            "NumAccounts",
+            "ApprovalProgram",
+            "ClearStateProgram",
+            "RekeyTo",
+            "ConfigAsset",
+            "ConfigAssetTotal",
+            "ConfigAssetDecimals",
+            "ConfigAssetDefaultFrozen",
+            "ConfigAssetUnitName",
+            "ConfigAssetName",
+            "ConfigAssetURL",
+            "ConfigAssetMetadataHash",
+            "ConfigAssetManager",
+            "ConfigAssetReserve",
+            "ConfigAssetFreeze",
+            "ConfigAssetClawback",
+            "FreezeAsset",
+            "FreezeAssetAccount",
+            "FreezeAssetFrozen",
+            "Assets",
+            "NumAssets",
+            "Applications",
+            "NumApplications",
+            "GlobalNumUint",
+            "GlobalNumByteSlice",
+            "LocalNumUint",
+            "LocalNumByteSlice",
+            "ExtraProgramPages",
+            "Nonparticipation",
+            "Logs",
+            "NumLogs",
+            "CreatedAssetID",
+            "CreatedApplicationID",
+            "LastLog",
+            "StateProofPK",
+        ]
+    )
+}
+
+GLOBAL_FIELDS = {
+    name: i
+    for i, name in enumerate(
+        [
+            "MinTxnFee",
+            "MinBalance",
+            "MaxTxnLife",
+            "ZeroAddress",
+            "GroupSize",
+            "LogicSigVersion",
+            "Round",
+            "LatestTimestamp",
+            "CurrentApplicationID",
+            "CreatorAddress",
+            "CurrentApplicationAddress",
+            "GroupID",
+            "OpcodeBudget",
+            "CallerApplicationID",
+            "CallerApplicationAddress",
+        ]
+    )
+}
+
+APP_PARAMS_FIELDS = {
+    name: i
+    for i, name in enumerate(
+        [
+            "AppApprovalProgram",
+            "AppClearStateProgram",
+            "AppGlobalNumUint",
+            "AppGlobalNumByteSlice",
+            "AppLocalNumUint",
+            "AppLocalNumByteSlice",
+            "AppExtraProgramPages",
+            "AppCreator",
+            "AppAddress",
+        ]
+    )
+}
+
+ASSET_HOLDING_FIELDS = {"AssetBalance": 0, "AssetFrozen": 1}
+
+ASSET_PARAMS_FIELDS = {
+    name: i
+    for i, name in enumerate(
+        [
+            "AssetTotal",
+            "AssetDecimals",
+            "AssetDefaultFrozen",
+            "AssetUnitName",
+            "AssetName",
+            "AssetURL",
+            "AssetMetadataHash",
+            "AssetManager",
+            "AssetReserve",
+            "AssetFreeze",
+            "AssetClawback",
+            "AssetCreator",
+        ]
+    )
+}
+
+ACCT_PARAMS_FIELDS = {"AcctBalance": 0, "AcctMinBalance": 1, "AcctAuthAddr": 2}
+
+# named constants accepted by `int`
+INT_CONSTANTS = {
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+
+# opcodes with immediates: opcode and the field table of each field immediate (None for plain uint8)
+FIELD_OPCODES = {
+    "txn": (0x31, [TXN_FIELDS]),
+    "global": (0x32, [GLOBAL_FIELDS]),
+    "gtxn": (0x33, [None, TXN_FIELDS]),
+    "load": (0x34, [None]),
+    "store": (0x35, [None]),
+    "txna": (0x36, [TXN_FIELDS, None]),
+    "gtxna": (0x37, [None, TXN_FIELDS, None]),
+    "gtxns": (0x38, [TXN_FIELDS]),
+    "gtxnsa": (0x39, [TXN_FIELDS, None]),
+    "gload": (0x3A, [None, None]),
+    "gaid": (0x3C, [None]),
+    "dig": (0x4B, [None]),
+    "cover": (0x4E, [None]),
+    "uncover": (0x4F, [None]),
+    "substring": (0x51, [None, None]),
+    "extract": (0x57, [None, None]),
+    "asset_holding_get": (0x70, [ASSET_HOLDING_FIELDS]),
+    "asset_params_get": (0x71, [ASSET_PARAMS_FIELDS]),
+    "app_params_get": (0x72, [APP_PARAMS_FIELDS]),
+    "acct_params_get": (0x73, [ACCT_PARAMS_FIELDS]),
+    "itxn_field": (0xB2, [TXN_FIELDS]),
+    "itxn": (0xB4, [TXN_FIELDS]),
+    "itxna": (0xB5, [TXN_FIELDS, None]),
+    "txnas": (0xC0, [TXN_FIELDS]),
+    "gtxnas": (0xC1, [None, TXN_FIELDS]),
+    "gtxnsas": (0xC2, [TXN_FIELDS]),
+    "itxnas": (0xC5, [TXN_FIELDS]),
+}
+
+INTC, INTC_0, BYTEC, BYTEC_0 = 0x21, 0x22, 0x27, 0x28
+INTCBLOCK, BYTECBLOCK, PUSHBYTES, PUSHINT = 0x20, 0x26, 0x80, 0x81
+
+# lowest version algod optimizes constant blocks for
+OPTIMIZE_CONSTANTS_VERSION = 4
+
+
+class AssemblerError(Exception):
+    """the program uses something this assembler doesn't support"""
+
+
+def varuint(value: int) -> bytes:
+    """unsigned LEB128, as used for TEAL immediates and constant blocks"""
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def tokenize(line: str) -> List[str]:
+    """splits a TEAL line on whitespace, keeping quoted strings whole and dropping comments"""
+    tokens = []
+    for match in re.finditer(r'"(?:\\.|[^"\\])*"|//.*|\S+', line):
+        token = match.group(0)
+        if token.startswith("//"):
+            break
+        tokens.append(token)
+    return tokens
+
+
+def parseInt(token: str) -> int:
+    """parses an integer the way go's strconv.ParseUint(s, 0, 64) does"""
+    if token in INT_CONSTANTS:
+        return INT_CONSTANTS[token]
+    if len(token) > 1 and token[0] == "0" and token[1].isdigit():
+        value = int(token, 8)
+    else:
+        value = int(token, 0)
+    if not 0 <= value < 2**64:
+        raise AssemblerError(f"int out of range: {token}")
+    return value
+
+
+def parseString(token: str) -> bytes:
+    """decodes a double quoted TEAL string literal"""
+    body = token[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != "\\":
+            out += char.encode()
+            i += 1
+            continue
+        escape = body[i + 1]
+        if escape == "x":
+            start, end = i + 2, i + 4
+            out.append(int(body[start:end], 16))
+            i += 4
+            continue
+        if escape not in 'nrt\\"':
+            raise AssemblerError(f"invalid escape sequence in {token}")
+        out += {"n": b"\n", "r": b"\r", "t": b"\t", "\\": b"\\", '"': b'"'}[escape]
+        i += 2
+    return bytes(out)
+
+
+def parseBytes(args: List[str]) -> bytes:
+    """parses the argument(s) of a `byte` pseudo-op"""
+    first = args[0]
+    if first.startswith('"'):
+        return parseString(first)
+    if first.startswith("0x"):
+        return bytes.fromhex(first[2:])
+    for prefixes, decode in ((("base64", "b64"), base64.b64decode), (("base32", "b32"), _b32decode)):
+        for prefix in prefixes:
+            if first == prefix:
+                return decode(args[1])
+            if first.startswith(prefix + "(") and first.endswith(")"):
+                start = len(prefix) + 1
+                return decode(first[start:-1])
+    raise AssemblerError(f"unsupported byte constant: {' '.join(args)}")
+
+
+def _b32decode(text: str) -> bytes:
+    return base64.b32decode(text + "=" * (-len(text) % 8))
+
+
+class _Const:
+    """a reference to an int or byte constant, encoded once the constant blocks are known"""
+
+    def __init__(self, kind: str, value: Union[int, bytes]) -> None:
+        self.kind = kind
+        self.value = value
+
+
+class _Branch:
+    """a branch or callsub, encoded once label positions are known"""
+
+    def __init__(self, opcode: int, label: str) -> None:
+        self.opcode = opcode
+        self.label = label
+
+
+Instruction = Union[bytes, _Const, _Branch]
+
+
+def _parse(teal: str) -> Tuple[int, List[Instruction], Dict[str, int], List[int]]:
+    """parses TEAL into its version, instructions, the index of each label and the line of each instruction"""
+    version = 1
+    program: List[Instruction] = []
+    labels: Dict[str, int] = {}
+    lines: List[int] = []
+
+    for number, line in enumerate(teal.splitlines(), start=1):
+        tokens = tokenize(line)
+        if not tokens:
+            continue
+        op, args = tokens[0], tokens[1:]
+
+        if op == "#pragma":
+            if args[:1] != ["version"]:
+                raise AssemblerError(f"line {number}: unsupported pragma")
+            version = int(args[1])
+            continue
+        if op.endswith(":") and not args:
+            labels[op[:-1]] = len(program)
+            continue
+
+        try:
+            program.append(_instruction(op, args))
+            lines.append(number)
+        except (KeyError, IndexError, ValueError) as e:
+            raise AssemblerError(f"line {number}: can't assemble `{line.strip()}` ({e!r})")
+
+    if version < OPTIMIZE_CONSTANTS_VERSION:
+        raise AssemblerError(f"TEAL version {version} is not supported, only {OPTIMIZE_CONSTANTS_VERSION}+")
+
+    return version, program, labels, lines
+
+
+def _instruction(op: str, args: List[str]) -> Instruction:
+    """encodes one TEAL line, leaving constants and branches to be resolved"""
+    if op == "int":
+        return _Const("int", parseInt(args[0]))
+    if op == "byte":
+        return _Const("byte", parseBytes(args))
+    if op == "addr":
+        return _Const("byte", encoding.decode_address(args[0]))
+    if op == "pushint":
+        return bytes([PUSHINT]) + varuint(parseInt(args[0]))
+    if op == "pushbytes":
+        value = parseBytes(args)
+        return bytes([PUSHBYTES]) + varuint(len(value)) + value
+    if op in BRANCH_OPCODES:
+        return _Branch(BRANCH_OPCODES[op], args[0])
+    if op in SIMPLE_OPCODES and not args:
+        return bytes([SIMPLE_OPCODES[op]])
+    if op == "txn" and len(args) == 2:
+        op = "txna"
+    if op in FIELD_OPCODES:
+        opcode, fields = FIELD_OPCODES[op]
+        if len(args) != len(fields):
+            raise ValueError(f"{op} expects {len(fields)} immediates")
+        immediates = [table[arg] if table is not None else parseInt(arg) for table, arg in zip(fields, args)]
+        if any(value > 255 for value in immediates):
+            raise ValueError("immediate out of range")
+        return bytes([opcode, *immediates])
+    raise AssemblerError(f"unsupported opcode: {op}")
+
+
+def _constantBlock(program: List[Instruction], kind: str) -> List[Union[int, bytes]]:
+    """constants used more than once, most used first, ties in order of first use"""
+    counts: Dict[Union[int, bytes], int] = {}
+    for ins in program:
+        if isinstance(ins, _Const) and ins.kind == kind:
+            counts[ins.value] = counts.get(ins.value, 0) + 1
+    ordered = sorted(counts, key=lambda value: -counts[value])
+    return [value for value in ordered if counts[value] > 1]
+
+
+def _encodeConst(ref: _Const, intc: Dict[int, int], bytec: Dict[bytes, int]) -> bytes:
+    """encodes a constant as a block reference, or push if it isn't in the block"""
+    block = intc if ref.kind == "int" else bytec
+    index: Optional[int] = block.get(ref.value)
+    if index is None:
+        if ref.kind == "int":
+            return bytes([PUSHINT]) + varuint(ref.value)
+        return bytes([PUSHBYTES]) + varuint(len(ref.value)) + ref.value
+    short, long = (INTC_0, INTC) if ref.kind == "int" else (BYTEC_0, BYTEC)
+    if index < 4:
+        return bytes([short + index])
+    return bytes([long, index])
+
+
+class Assembly(NamedTuple):
+    """an assembled program and where each source line ended up in it"""
+
+    program: bytes
+    # pc of the instruction on each TEAL source line (1-based line numbers)
+    pcs: Dict[int, int]
+    # number of intcblock/bytecblock instructions executed before the first source instruction
+    constant_blocks: int
+
+
+def assemble(teal: str) -> bytes:
+    """
+    Assemble TEAL source into program bytes
+
+    Args:
+        teal (str): TEAL source, e.g. from pyteal's compileTeal
+    Returns:
+        bytes: the program, identical to algod's compile result
+    Raises:
+        AssemblerError: if the program uses anything this assembler doesn't support
+    """
+    return assembleWithSourceMap(teal).program
+
+
+def assembleWithSourceMap(teal: str) -> Assembly:
+    """assembles TEAL, also returning the pc of every source line"""
+    version, program, labels, lines = _parse(teal)
+
+    ints = _constantBlock(program, "int")
+    byteslices = _constantBlock(program, "byte")
+    intc = {value: i for i, value in enumerate(ints)}
+    bytec = {value: i for i, value in enumerate(byteslices)}
+
+    # every instruction's size is known once constants are resolved, so one pass places the labels
+    encoded: List[Union[bytes, _Branch]] = [
+        _encodeConst(ins, intc, bytec) if isinstance(ins, _Const) else ins for ins in program
+    ]
+    offsets = []
+    pc = 0
+    for ins in encoded:
+        offsets.append(pc)
+        pc += 3 if isinstance(ins, _Branch) else len(ins)
+    offsets.append(pc)
+
+    body = bytearray()
+    for i, ins in enumerate(encoded):
+        if isinstance(ins, _Branch):
+            if ins.label not in labels:
+                raise AssemblerError(f"reference to undefined label {ins.label}")
+            offset = offsets[labels[ins.label]] - (offsets[i] + 3)
+            if not -0x8000 <= offset <= 0x7FFF:
+                raise AssemblerError(f"branch to {ins.label} is too far")
+            body += bytes([ins.opcode]) + offset.to_bytes(2, "big", signed=True)
+        else:
+            body += ins
+
+    header = bytearray(varuint(version))
+    if ints:
+        header += bytes([INTCBLOCK]) + varuint(len(ints)) + b"".join(varuint(value) for value in ints)
+    if byteslices:
+        header += bytes([BYTECBLOCK]) + varuint(len(byteslices))
+        header += b"".join(varuint(len(value)) + value for value in byteslices)
+
+    pcs = {line: len(header) + offset for line, offset in zip(lines, offsets)}
+    return Assembly(bytes(header + body), pcs, bool(ints) + bool(byteslices))
@@ -0,0 +1,267 @@
+"""
+Asyncio clients for the algod calls the scripts make
+
+AsyncAlgodClient talks to algod over one pooled httpx.AsyncClient (HTTP/2 with
+h2, both in the requirements), so a single event loop can keep requests to dozens
+of feeds in flight over a few connections. for clients that aren't a real
+AlgodClient (e.g. the AVM simulator), or if httpx can't be imported,
+ThreadedAlgodClient runs the synchronous client's calls on a small shared thread
+pool behind the same async methods.
+
+both wait for rounds with one status_after_block call per round, shared by every
+coroutine waiting on a confirmation:
+
+    algod = getAsyncClient(client)
+    txid = await algod.send_raw_transaction(encoded)
+    confirmed = await waitForTransactionAsync(algod, txid)
+"""
+import asyncio
+import base64
+from abc import ABC
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from algosdk import constants
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.params import AsyncSuggestedParamsProvider
+
+try:
+    import h2  # noqa: F401
+    import httpx
+
+    HTTP2 = True
+except ImportError:
+    try:
+        import httpx
+    except ImportError:
+        httpx = None
+    HTTP2 = False
+
+# connections kept open to algod by an AsyncAlgodClient
+MAX_CONNECTIONS = 16
+
+# threads a ThreadedAlgodClient runs blocking calls on
+MAX_WORKERS = 8
+
+# seconds before a request to algod is given up, status_after_block waits up to a minute on algod's side
+REQUEST_TIMEOUT = 70
+
+
+class _AsyncAlgod(ABC):
+    """the algod calls waitForTransactionAsync and AsyncScripts make, and the round waiting shared by the clients"""
+
+    def __init__(self) -> None:
+        # suggested params shared by every transaction built for this client
+        self.params = AsyncSuggestedParamsProvider(self)
+        # round -> status after it, awaited by every coroutine waiting on that round
+        self._rounds: Dict[int, asyncio.Future] = {}
+
+    @abstractmethod
+    async def suggested_params(self) -> SuggestedParams:
+        """the suggested params of the node"""
+
+    @abstractmethod
+    async def send_raw_transaction(self, txn: str) -> str:
+        """sends base64 encoded signed transactions, returns the first txid"""
+
+    @abstractmethod
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        """the pending transaction info of a txid"""
+
+    @abstractmethod
+    async def status(self) -> Dict[str, Any]:
+        """the node status"""
+
+    @abstractmethod
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        """the node status once a round after block_num is reached"""
+
+    @abstractmethod
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        """the params and global state of an app"""
+
+    @abstractmethod
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        """the balance and state of an account"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """releases the connections or threads of the client"""
+
+    async def waitForRound(self, lastRound: int) -> Dict[str, Any]:
+        """the node status once the round after lastRound is reached, one request however many coroutines wait"""
+        future = self._rounds.get(lastRound)
+        if future is None:
+            future = asyncio.ensure_future(self.status_after_block(lastRound))
+            self._rounds[lastRound] = future
+            future.add_done_callback(lambda _: self._rounds.pop(lastRound, None))
+        return await asyncio.shield(future)
+
+    async def send_transactions(self, txns: List[Any]) -> str:
+        """sends signed transactions (an atomic group if there are several), returns the first txid"""
+        encoded = b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        return await self.send_raw_transaction(base64.b64encode(encoded).decode())
+
+
+class AsyncAlgodClient(_AsyncAlgod):
+    """the algod calls of the scripts over a pooled httpx.AsyncClient"""
+
+    def __init__(
+        self,
+        algod_token: str,
+        algod_address: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = MAX_CONNECTIONS,
+        transport: Optional[Any] = None,
+    ) -> None:
+        """
+        Args:
+            algod_token (str): algod api token
+            algod_address (str): algod address, e.g. http://localhost:4001
+            headers (dict): extra request headers, e.g. a provider's api key
+            max_connections (int): connections kept open to algod
+            transport: an httpx transport requests are sent through instead of the network, e.g. httpx.MockTransport
+        """
+        if httpx is None:
+            raise ImportError("AsyncAlgodClient needs httpx, pip install httpx (or use ThreadedAlgodClient)")
+        super().__init__()
+        self.algod_address = algod_address.rstrip("/")
+        self.headers = {"User-Agent": "py-algorand-sdk", constants.algod_auth_header: algod_token, **(headers or {})}
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http = httpx.AsyncClient(
+            http2=HTTP2, limits=limits, timeout=REQUEST_TIMEOUT, headers=self.headers, transport=transport
+        )
+
+    async def request(self, method: str, path: str, data: Optional[bytes] = None, **headers: str) -> Dict[str, Any]:
+        """sends a request to a /v2 path, raises AlgodHTTPError like AlgodClient on http errors"""
+        response = await self.http.request(method, f"{self.algod_address}/v2{path}", content=data, headers=headers)
+        if response.status_code >= 400:
+            try:
+                message = response.json()["message"]
+            except Exception:
+                message = response.text
+            raise AlgodHTTPError(message, response.status_code)
+        return response.json()
+
+    async def suggested_params(self) -> SuggestedParams:
+        res = await self.request("GET", "/transactions/params")
+        return SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def send_raw_transaction(self, txn: str) -> str:
+        data = base64.b64decode(txn)
+        res = await self.request("POST", "/transactions", data, **{"Content-Type": "application/x-binary"})
+        return res["txId"]
+
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        return await self.request("GET", f"/transactions/pending/{transaction_id}?format=json")
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.request("GET", "/status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        return await self.request("GET", f"/status/wait-for-block-after/{block_num}")
+
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        return await self.request("GET", f"/applications/{application_id}")
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self.request("GET", f"/accounts/{address}")
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+
+class ThreadedAlgodClient(_AsyncAlgod):
+    """the algod calls of the scripts, run on a thread pool by a synchronous client"""
+
+    def __init__(self, client: Any, max_workers: int = MAX_WORKERS) -> None:
+        """
+        Args:
+            client: an AlgodClient, or anything with its methods like the AVM simulator
+            max_workers (int): calls run at the same time
+        """
+        super().__init__()
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="algod")
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, getattr(self.client, method), *args)
+
+    async def suggested_params(self) -> SuggestedParams:
+        return await self._call("suggested_params")
+
+    async def send_raw_transaction(self, txn: str) -> str:
+        return await self._call("send_raw_transaction", txn)
+
+    async def pending_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
+        return await self._call("pending_transaction_info", transaction_id)
+
+    async def status(self) -> Dict[str, Any]:
+        return await self._call("status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        return await self._call("status_after_block", block_num)
+
+    async def application_info(self, application_id: int) -> Dict[str, Any]:
+        return await self._call("application_info", application_id)
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self._call("account_info", address)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def getAsyncClient(client: Any) -> _AsyncAlgod:
+    """an async client for the node a synchronous client talks to, over httpx if it's installed"""
+    if httpx is not None and type(client) is AlgodClient:
+        return AsyncAlgodClient(client.algod_token, client.algod_address, client.headers)
+    return ThreadedAlgodClient(client)
+
+
+async def waitForTransactionAsync(client: _AsyncAlgod, txID: str, timeout: int = 10) -> Dict[str, Any]:
+    """
+    Wait for a transaction to be confirmed, like waitForTransaction
+
+    Args:
+        client: an async algod client
+        txID (str): the transaction id
+        timeout (int): rounds to wait for
+    Returns:
+        dict: the confirmed pending transaction info, raises if it's rejected or not confirmed in time
+    """
+    lastRound = (await client.status())["last-round"]
+    startRound = lastRound
+
+    while lastRound < startRound + timeout:
+        pending_txn = await client.pending_transaction_info(txID)
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            # the next transaction is built with a later first valid round, see src.utils.params
+            client.params.invalidate()
+            return pending_txn
+
+        if pending_txn["pool-error"]:
+            raise Exception("Pool error: {}".format(pending_txn["pool-error"]))
+
+        await client.waitForRound(lastRound)
+        lastRound += 1
+
+    raise Exception("Transaction {} not confirmed after {} rounds".format(txID, timeout))
@@ -57,6 +57,33 @@ def get_configs(args: List[str]) -> Box:
         help="app_id of the medianizer contract",
     )
 
+    parser.add_argument(
+        "-ms",
+        "--median-strategy",
+        nargs=1,
+        required=False,
+        type=str,
+        help="median implementation to compile new medianizers with (legacy or network)",
+    )
+
+    parser.add_argument(
+        "-fc",
+        "--feed-count",
+        nargs=1,
+        required=False,
+        type=int,
+        help="number of feeds to deploy for the query_id (up to 6, more than 5 needs the network median)",
+    )
+
+    parser.add_argument(
+        "-hs",
+        "--history-size",
+        nargs=1,
+        required=False,
+        type=int,
+        help="number of past reports new feeds keep on chain (0 keeps only the last one)",
+    )
+
     parser.add_argument(
         "-amt",
         "--amount",
@@ -0,0 +1,84 @@
+"""
+Parsing price source responses
+
+responses are decoded from their raw bytes with orjson, a requirement (several
+times faster than the json module on kraken and coingecko payloads, which is
+only used where orjson can't be installed),
+and the keywords of a source are compiled once into a chain of item getters,
+so a fetch only runs the lookups of its path:
+
+    extract = compile_path(("result", "TBTCUSD", "c", 0))
+    price = extract(loads(response.content))
+
+keywords are dict keys, or list indices as ints (kraken's `c` / `0`) or digit strings.
+"""
+import json
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Tuple
+from typing import Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Keyword = Union[str, int]
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """decodes a json response body, with orjson if available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compile_path(keywords: Iterable[Keyword]) -> Callable[[Any], Any]:
+    """
+    Compiles the keywords of a source into a function that looks them up in a decoded response
+
+    Args:
+        keywords (Iterable): dict keys and list indices, in the order they're looked up
+    Returns:
+        a function of a decoded response to the value at the end of the path,
+        raising KeyError with the full path if a keyword isn't found
+    """
+    return _compile(tuple(keywords))
+
+
+@lru_cache(maxsize=None)
+def _compile(keywords: Tuple[Keyword, ...]) -> Callable[[Any], Any]:
+    steps = tuple(_step(keyword) for keyword in keywords)
+    lookup = steps[0] if len(steps) == 1 else _chain(steps)
+
+    def extract(document: Any) -> Any:
+        try:
+            return lookup(document)
+        except (KeyError, IndexError, TypeError) as e:
+            raise KeyError(f"{list(keywords)} not found in response: {e!r}") from None
+
+    return extract
+
+
+def _chain(steps: Tuple[Callable[[Any], Any], ...]) -> Callable[[Any], Any]:
+    def lookup(document: Any) -> Any:
+        for step in steps:
+            document = step(document)
+        return document
+
+    return lookup
+
+
+def _step(keyword: Keyword) -> Callable[[Any], Any]:
+    """the lookup of one keyword, digit strings also index lists"""
+    if isinstance(keyword, str) and keyword.lstrip("-").isdigit():
+        index = int(keyword)
+
+        def key_or_index(document: Any) -> Any:
+            return document[index] if isinstance(document, list) else document[keyword]
+
+        return key_or_index
+    return itemgetter(keyword)
@@ -19,6 +19,8 @@ from algosdk.v2client import algod
 from algosdk.v2client import indexer
 
 from src.utils.account import Account
+from src.utils.assembler import assemble
+from src.utils.assembler import AssemblerError
 
 INDEXER_TIMEOUT = 10  # 61 for devMode
 
@@ -211,9 +213,12 @@ def transaction_info(transaction_id):
 
 ## UTILITY
 def _compile_source(source):
-    """Compile and return teal binary code."""
-    compile_response = _algod_client().compile(source)
-    return base64.b64decode(compile_response["result"])
+    """Compile and return teal binary code, assembling locally when possible."""
+    try:
+        return assemble(source)
+    except AssemblerError:
+        compile_response = _algod_client().compile(source)
+        return base64.b64decode(compile_response["result"])
 
 
 def logic_signature(teal_source):
@@ -0,0 +1,126 @@
+"""
+Cached suggested transaction params
+
+suggested params only change when the valid round window moves on or the
+network fee changes, so they are fetched once and reused by every
+transaction built against the same algod node until they are about to expire.
+they are dropped once a transaction confirms (see invalidateParams), so the
+next transaction gets a later first valid round: two identical calls in a row,
+e.g. two tips of the same amount, would otherwise have the same txid and the
+second would be rejected as already in the ledger
+"""
+import asyncio
+import copy
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client.algod import AlgodClient
+
+# lower bound on seconds per round, used to estimate how far the chain moved since the last fetch
+MIN_ROUND_TIME = 2.5
+
+# params are refreshed when they are this many rounds from their last valid round
+MARGIN_ROUNDS = 10
+
+# params older than this many seconds are refreshed to pick up fee changes
+MAX_AGE = 15
+
+
+class SuggestedParamsProvider:
+    """Fetches suggested params once and hands out copies until they need refreshing"""
+
+    def __init__(self, client: AlgodClient, max_age: float = MAX_AGE, margin_rounds: int = MARGIN_ROUNDS) -> None:
+        """
+        Args:
+            client (AlgodClient): the algorand node to fetch params from
+            max_age (float): seconds before params are refetched regardless of their valid window
+            margin_rounds (int): refetch when the estimated round is this close to the last valid round
+        """
+        self.client = client
+        self.max_age = max_age
+        self.margin_rounds = margin_rounds
+
+        self._params: Optional[SuggestedParams] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> SuggestedParams:
+        """returns a copy of the cached params, refetching them first if they are expiring"""
+        with self._lock:
+            if self._params is None or self._expiring():
+                self._params = self.client.suggested_params()
+                self._fetched_at = time.monotonic()
+            return copy.copy(self._params)
+
+    def invalidate(self) -> None:
+        """drops the cached params, e.g. after a transaction was rejected for its fee or valid rounds"""
+        with self._lock:
+            self._params = None
+
+    def _expiring(self) -> bool:
+        """true if the params are too old or their valid window is about to close"""
+        age = time.monotonic() - self._fetched_at
+        if age > self.max_age:
+            return True
+
+        rounds_passed = int(age / MIN_ROUND_TIME) + 1
+        return self._params.first + rounds_passed + self.margin_rounds >= self._params.last
+
+
+class AsyncSuggestedParamsProvider(SuggestedParamsProvider):
+    """
+    The same cache filled by an async client (src.utils.async_algod):
+    `await refresh()` before building transactions, get() then hands out copies without a request
+    """
+
+    def __init__(self, client: Any, max_age: float = MAX_AGE, margin_rounds: int = MARGIN_ROUNDS) -> None:
+        super().__init__(client, max_age, margin_rounds)
+        self._refreshing: Optional[asyncio.Lock] = None
+
+    async def refresh(self) -> SuggestedParams:
+        """refetches the params if they are expiring or were invalidated, once however many coroutines ask"""
+        if self._refreshing is None:
+            self._refreshing = asyncio.Lock()
+        async with self._refreshing:
+            if self._params is None or self._expiring():
+                params = await self.client.suggested_params()
+                with self._lock:
+                    self._params = params
+                    self._fetched_at = time.monotonic()
+        return self.get()
+
+    def get(self) -> SuggestedParams:
+        """returns a copy of the params fetched by the last refresh"""
+        with self._lock:
+            if self._params is None:
+                raise RuntimeError("no suggested params yet, await refresh() first")
+            return copy.copy(self._params)
+
+
+_providers: Dict[Tuple[str, str], SuggestedParamsProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def getParamsProvider(client: AlgodClient) -> SuggestedParamsProvider:
+    """returns the provider shared by every client that talks to the same algod node"""
+    key = (client.algod_address, client.algod_token)
+
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = SuggestedParamsProvider(client)
+        return _providers[key]
+
+
+def invalidateParams(client: Any) -> None:
+    """drops the params shared for a node once a transaction built from them confirmed"""
+    key = (getattr(client, "algod_address", None), getattr(client, "algod_token", None))
+
+    with _providers_lock:
+        provider = _providers.get(key)
+    if provider is not None:
+        provider.invalidate()
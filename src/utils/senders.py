@@ -9,6 +9,7 @@ from algosdk.v2client.algod import AlgodClient
 from dotenv import load_dotenv
 
 from src.utils.account import Account
+from src.utils.params import getParamsProvider
 
 
 def send_multisig_tx(app_id: int, fn_name: str, app_args: Optional[List[Any]], foreign_apps: Optional[List[int]]):
@@ -50,7 +51,7 @@ def send_multisig_tx(app_id: int, fn_name: str, app_args: Optional[List[Any]], f
     algod_client = AlgodClient(algod_token, algod_address)
 
     # get suggested parameters
-    params = algod_client.suggested_params()
+    params = getParamsProvider(algod_client).get()
     # comment out the next two (2) lines to use suggested fees
     # params.flat_fee = True
     # params.fee = 1000
@@ -98,7 +99,7 @@ def send_no_op_tx(
     algod_client = AlgodClient(algod_token, algod_address)
 
     # get suggested parameters
-    params = algod_client.suggested_params()
+    params = getParamsProvider(algod_client).get()
     # comment out the next two (2) lines to use suggested fees
     # params.flat_fee = True
     # params.fee = 1000
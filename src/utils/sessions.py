@@ -0,0 +1,82 @@
+"""
+Shared HTTP session for price data sources
+
+one process-wide client keeps a connection pool per host, so repeated
+polls of the same exchange reuse keep-alive connections instead of
+doing a new TCP+TLS handshake on every request.
+HTTP/2 is used with httpx and h2 (in the requirements), requests (HTTP/1.1) if they
+can't be imported. both backends follow redirects.
+"""
+import threading
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
+POOL_CONNECTIONS = 16  # number of hosts to keep a connection pool for
+POOL_MAXSIZE = 8  # keep-alive connections kept open per host
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> Any:
+    """returns the process-wide http session, creating it on first use"""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+
+    return _session
+
+
+def _new_session() -> Any:
+    """builds an http/2 httpx client if available, else a pooled requests session"""
+    if httpx is not None:
+        limits = httpx.Limits(
+            max_connections=POOL_CONNECTIONS * POOL_MAXSIZE, max_keepalive_connections=POOL_CONNECTIONS * POOL_MAXSIZE
+        )
+        # requests follows redirects by default, httpx only when asked to
+        return httpx.Client(http2=True, limits=limits, follow_redirects=True)
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def http_get(url: str, timeout: Optional[float] = None, headers: Optional[Dict[str, str]] = None) -> Any:
+    """
+    GET a url over the shared session
+
+    Args:
+        url (str): the url to request
+        timeout (float): seconds to wait for the server before giving up
+        headers (dict): extra request headers, e.g. an algod api token
+    Returns:
+        the response (requests.Response or httpx.Response), raises on http errors
+    """
+    response = get_session().get(url, timeout=timeout, headers=headers)
+    response.raise_for_status()
+    return response
+
+
+def close_session() -> None:
+    """closes the shared session and its open connections"""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
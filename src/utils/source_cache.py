@@ -0,0 +1,185 @@
+"""
+Shared cache of price source responses
+
+every Asset of a reporter fetches its sources through one process-wide cache
+keyed by url, so pairs that poll the same endpoint share its response:
+
+- responses are fresh for `ttl` seconds and served without a request
+- for `stale_ttl` seconds after that, the stale response is served right away
+  while a single background request refreshes it (stale-while-revalidate)
+- only one request per url is in flight, concurrent callers wait for its response
+- coingecko simple/price urls (one id each in config.yml) are merged into one
+  multi-id request, which returns the prices of every id under their own keys,
+  so the keywords of every source still find their price in the merged response
+"""
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+
+from src.utils.extract import loads
+from src.utils.sessions import http_get
+
+# seconds a response is served without a request, unless a source's config sets a `ttl`
+DEFAULT_TTL = 10
+
+# seconds a response is still served (while it's refreshed) once it's no longer fresh, see `stale_ttl`
+DEFAULT_STALE_TTL = 20
+
+# background requests refreshing stale responses
+REVALIDATE_WORKERS = 4
+
+COINGECKO_HOST = "api.coingecko.com"
+COINGECKO_SIMPLE_PRICE = "/api/v3/simple/price"
+MERGED_PARAMS = ("ids", "vs_currencies")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _fetch_json(url: str, timeout: Optional[float]) -> Any:
+    return loads(http_get(url, timeout=timeout).content)
+
+
+class SourceCache:
+    def __init__(self, fetch: Callable[[str, Optional[float]], Any] = _fetch_json) -> None:
+        """
+        Args:
+            fetch (Callable): requests a url with a timeout and returns its decoded json
+        """
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        # url -> (monotonic time it was fetched, decoded response)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        # url -> response of the request in flight
+        self._inflight: Dict[str, Future] = {}
+        # coingecko endpoint and its other params -> ids and currencies of every source registered on it
+        self._merged: Dict[Tuple[str, str], Tuple[Set[str], Set[str]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=REVALIDATE_WORKERS, thread_name_prefix="source-cache")
+
+    def register(self, url: str) -> None:
+        """adds the ids of a coingecko simple/price url to the merged request of its endpoint"""
+        merged = _merge_key(url)
+        if merged is None:
+            return
+        params = dict(parse_qsl(urlsplit(url).query))
+        with self._lock:
+            ids, currencies = self._merged.setdefault(merged, (set(), set()))
+            ids.update(params["ids"].split(","))
+            currencies.update(params["vs_currencies"].split(","))
+
+    def request_url(self, url: str) -> str:
+        """the url actually requested for a source url, the merged request for registered coingecko urls"""
+        merged = _merge_key(url)
+        if merged is None:
+            return url
+        with self._lock:
+            if merged not in self._merged:
+                return url
+            ids, currencies = self._merged[merged]
+            endpoint, params = merged
+            query = params.split("&") if params else []
+            query += [
+                urlencode({"ids": ",".join(sorted(ids))}, safe=","),
+                urlencode({"vs_currencies": ",".join(sorted(currencies))}, safe=","),
+            ]
+        return f"{endpoint}?{'&'.join(query)}"
+
+    def get_json(
+        self, url: str, timeout: Optional[float] = None, ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL
+    ) -> Any:
+        """
+        Decoded json response of a url, from the cache when it's fresh enough
+
+        Args:
+            url (str): the source url
+            timeout (float): seconds to wait for the response when it has to be requested
+            ttl (float): seconds a response is served without a request
+            stale_ttl (float): seconds a response is served after ttl while it's refreshed in the background
+        Returns:
+            the decoded response, raises if the request fails
+        """
+        key = self.request_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[0] if entry is not None else None
+            if age is not None and age < ttl:
+                return entry[1]
+            future, owner = self._request(key)
+            if age is not None and age < ttl + stale_ttl:
+                if owner:
+                    self._executor.submit(self._resolve, key, timeout, future)
+                return entry[1]
+
+        if owner:
+            self._resolve(key, timeout, future)
+        return future.result(timeout)
+
+    def invalidate(self, urls: Optional[List[str]] = None) -> None:
+        """drops the cached responses of some urls, or of every url"""
+        keys = None if urls is None else [self.request_url(url) for url in urls]
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+            for key in keys or []:
+                self._entries.pop(key, None)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _request(self, key: str) -> Tuple[Future, bool]:
+        """the request in flight for a url, and whether the caller has to send it (called with the lock held)"""
+        if key in self._inflight:
+            return self._inflight[key], False
+        future = Future()
+        self._inflight[key] = future
+        return future, True
+
+    def _resolve(self, key: str, timeout: Optional[float], future: Future) -> None:
+        """sends a request, caches its response and hands it to every caller waiting on it"""
+        try:
+            response = self.fetch(key, timeout)
+        except Exception as e:
+            # failures aren't cached, a stale response stays until it expires
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._inflight.pop(key, None)
+        future.set_result(response)
+
+
+def _merge_key(url: str) -> Optional[Tuple[str, str]]:
+    """the endpoint and other params of a coingecko simple/price url, None for other urls"""
+    parts = urlsplit(url)
+    if parts.netloc != COINGECKO_HOST or parts.path != COINGECKO_SIMPLE_PRICE:
+        return None
+    params = parse_qsl(parts.query)
+    if not all(name in dict(params) for name in MERGED_PARAMS):
+        return None
+    others = urlencode(sorted((name, value) for name, value in params if name not in MERGED_PARAMS))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}", others
+
+
+def get_source_cache() -> SourceCache:
+    """returns the process-wide source cache, creating it on first use"""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SourceCache()
+
+    return _cache
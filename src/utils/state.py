@@ -0,0 +1,383 @@
+"""
+Bulk reads of feed and medianizer global state
+
+a StateReader fetches the global state of many apps at once, concurrently
+over the shared pooled http session (src.utils.sessions), and decodes it
+into FeedState and MedianizerState records, only the fields asked for
+(see decodeRecords). reads can be cached for a few
+seconds, so dashboards and health checks polling every feed of every
+query_id don't send the same requests over and over:
+
+    reader = StateReader(client, ttl=2)
+    feeds, medianizer = reader.readQuery(feed_ids, medianizer_id)
+"""
+import functools
+import threading
+import time
+from base64 import b64decode
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+from typing import TypeVar
+from typing import Union
+
+from algosdk import encoding
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.sessions import http_get
+from src.utils.util import decodeHistoryEntry
+from src.utils.util import decodeReport
+from src.utils.util import decodeState
+from src.utils.util import REPORT_RECORD
+
+State = Dict[bytes, Union[int, bytes]]
+
+# global state as algod returns it: base64 keys and typed values
+StateArray = List[Dict[str, Any]]
+
+# concurrent requests per reader
+MAX_WORKERS = 8
+
+# seconds to wait for algod to answer a read
+READ_TIMEOUT = 10
+
+
+@functools.lru_cache(maxsize=4096)
+def _address(value: Optional[bytes]) -> Optional[str]:
+    """an address stored as 32 bytes, None if it isn't set. the same few addresses repeat in every snapshot"""
+    if not value:
+        return None
+    return encoding.encode_address(value)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def decodeValue(value: Dict[str, Any]) -> Union[int, bytes]:
+    """a typed global state value as algod returns it, see decodeState"""
+    if value["type"] == 2:
+        return value.get("uint", 0)
+    if value["type"] == 1:
+        return b64decode(value.get("bytes", ""))
+    raise Exception(f"Unexpected state type: {value['type']}")
+
+
+class _Record:
+    """
+    global state of an app decoded into fields, see decodeRecords
+
+    KEYS maps the state keys of a contract to the field they're decoded into and how,
+    PREFIXES the keys numbered or named after data (e.g. app_1, app_2, ...) to their field,
+    DEFAULTS the value of every other field until it is decoded, fields set up in __init__ aside
+    """
+
+    __slots__ = ("appID",)
+
+    KEYS: Dict[bytes, Tuple[str, Callable[[Any], Any]]] = {}
+    PREFIXES: Dict[bytes, str] = {}
+    DEFAULTS: Dict[str, Any] = {}
+
+    def __init__(self, appID: int) -> None:
+        self.appID = appID
+        for field, default in self.DEFAULTS.items():
+            setattr(self, field, default)
+
+    def _addPrefixed(self, field: str, key: bytes, value: Union[int, bytes]) -> None:
+        """decodes a key of PREFIXES"""
+
+    def _finish(self) -> None:
+        """runs once every requested key is decoded"""
+
+
+class FeedState(_Record):
+    """global state of a feed contract"""
+
+    __slots__ = (
+        "queryID",
+        "queryData",
+        "governanceAddress",
+        "reporterAddress",
+        "medianizerID",
+        "stakingStatus",
+        "stakeAmount",
+        "tipAmount",
+        "timestampFreshness",
+        "lockTimestamp",
+        "lastReport",
+        "history",
+    )
+
+    KEYS = {
+        b"query_id": ("queryID", _identity),
+        b"query_data": ("queryData", _identity),
+        b"governance_address": ("governanceAddress", _address),
+        b"reporter_address": ("reporterAddress", _address),
+        b"medianizer": ("medianizerID", _identity),
+        b"staking_status": ("stakingStatus", _identity),
+        b"stake_amount": ("stakeAmount", _identity),
+        b"tip_amount": ("tipAmount", _identity),
+        b"timestamp_freshness": ("timestampFreshness", _identity),
+        b"lock_timestamp": ("lockTimestamp", _identity),
+        # the last report, None until the first one
+        b"last_value": ("lastReport", lambda value: decodeReport(value) if value else None),
+    }
+    # past reports of feeds built with a history_size, oldest first
+    PREFIXES = {b"history_": "history"}
+    DEFAULTS: Dict[str, Any] = {
+        "queryID": b"",
+        "queryData": b"",
+        "governanceAddress": None,
+        "reporterAddress": None,
+        "medianizerID": 0,
+        "stakingStatus": 0,
+        "stakeAmount": 0,
+        "tipAmount": 0,
+        "timestampFreshness": 0,
+        "lockTimestamp": 0,
+        "lastReport": None,
+    }
+
+    def __init__(self, appID: int) -> None:
+        super().__init__(appID)
+        self.history: List[Tuple[int, int]] = []
+
+    @property
+    def lastTimestamp(self) -> Optional[int]:
+        return self.lastReport[0] if self.lastReport else None
+
+    @property
+    def lastValue(self) -> Optional[int]:
+        return self.lastReport[1] if self.lastReport else None
+
+    def _addPrefixed(self, field: str, key: bytes, value: Union[int, bytes]) -> None:
+        # history_ and the entry's index byte, history_count is the number of reports written
+        if len(key) == len(b"history_") + 1:
+            self.history += decodeHistoryEntry(value)
+
+    def _finish(self) -> None:
+        self.history.sort()
+
+
+class MedianizerState(_Record):
+    """global state of a medianizer contract, or of a multi-query medianizer"""
+
+    __slots__ = (
+        "queryID",
+        "governanceAddress",
+        "timestampFreshness",
+        "median",
+        "medianTimestamp",
+        "feedAddresses",
+        "queries",
+    )
+
+    KEYS = {
+        b"query_id": ("queryID", _identity),
+        b"governance": ("governanceAddress", _address),
+        b"timestamp_freshness": ("timestampFreshness", _identity),
+        b"median": ("median", _identity),
+        b"median_timestamp": ("medianTimestamp", _identity),
+    }
+    PREFIXES = {
+        # addresses of the feeds activated on the medianizer, in app_1, app_2, ... order
+        b"app_": "feedAddresses",
+        # query_id -> median and median timestamp, on a multi-query medianizer
+        b"q:": "queries",
+    }
+    DEFAULTS: Dict[str, Any] = {
+        "queryID": b"",
+        "governanceAddress": None,
+        "timestampFreshness": 0,
+        "median": 0,
+        "medianTimestamp": 0,
+    }
+
+    def __init__(self, appID: int) -> None:
+        super().__init__(appID)
+        self.feedAddresses: List[Any] = []
+        self.queries: Dict[bytes, Tuple[int, int]] = {}
+
+    def _addPrefixed(self, field: str, key: bytes, value: Union[int, bytes]) -> None:
+        if field == "queries":
+            self.queries[key[2:]] = tuple(REPORT_RECORD.unpack_from(memoryview(value), len(value) - 16))
+        else:
+            self.feedAddresses.append((int(key[4:]), _address(value)))
+
+    def _finish(self) -> None:
+        if self.feedAddresses:
+            self.feedAddresses = [address for _, address in sorted(self.feedAddresses)]
+
+
+RecordType = TypeVar("RecordType", bound=_Record)
+
+
+def decodeRecords(
+    recordType: Type[RecordType], states: Iterable[Tuple[int, StateArray]], fields: Optional[Iterable[str]] = None
+) -> List[RecordType]:
+    """
+    Decode many global states of the same contract into records
+
+    keys are matched in their base64 form, so only the keys of the requested
+    fields are decoded, with the key lookup built once for the whole batch
+
+    Args:
+        recordType: FeedState or MedianizerState
+        states: app id and global state as algod returns it (params.global-state) of every app
+        fields: names of the fields to decode, every field if not given, the others keep their defaults
+    Returns:
+        the records, in the order of states
+    """
+    selected = None if fields is None else set(fields)
+    lookup = {
+        b64encode(key).decode(): field_decode
+        for key, field_decode in recordType.KEYS.items()
+        if selected is None or field_decode[0] in selected
+    }
+    prefixes = [
+        (prefix, field) for prefix, field in recordType.PREFIXES.items() if selected is None or field in selected
+    ]
+
+    records = []
+    for appID, stateArray in states:
+        record = recordType(appID)
+        for pair in stateArray:
+            field_decode = lookup.get(pair["key"])
+            if field_decode is not None:
+                setattr(record, field_decode[0], field_decode[1](decodeValue(pair["value"])))
+                continue
+            if not prefixes:
+                continue
+            key = b64decode(pair["key"])
+            for prefix, field in prefixes:
+                if key.startswith(prefix):
+                    record._addPrefixed(field, key, decodeValue(pair["value"]))
+        record._finish()
+        records.append(record)
+
+    return records
+
+
+class StateReader:
+    """Reads the global state of many apps concurrently, optionally caching it for ttl seconds"""
+
+    def __init__(self, client: AlgodClient, ttl: float = 0, maxWorkers: int = MAX_WORKERS) -> None:
+        """
+        Args:
+            client (AlgodClient): the algorand node to read from
+            ttl (float): seconds a read state is reused for, 0 reads it every time
+            maxWorkers (int): requests sent at the same time
+        """
+        self.client = client
+        self.ttl = ttl
+        self.maxWorkers = maxWorkers
+
+        self._cache: Dict[int, Tuple[float, StateArray]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def readRaw(self, appIDs: Iterable[int]) -> Dict[int, StateArray]:
+        """
+        Read the global state of every app, as algod returns it
+
+        Returns:
+            dict: app id to its global state, in the order of appIDs
+        """
+        appIDs = list(dict.fromkeys(appIDs))
+        states: Dict[int, StateArray] = {}
+
+        now = time.monotonic()
+        with self._lock:
+            for appID in appIDs:
+                cached = self._cache.get(appID)
+                if cached is not None and now - cached[0] < self.ttl:
+                    states[appID] = cached[1]
+
+        missing = [appID for appID in appIDs if appID not in states]
+        if len(missing) == 1:
+            fetched = [self._fetch(missing[0])]
+        elif missing:
+            fetched = list(self._pool().map(self._fetch, missing))
+        else:
+            fetched = []
+
+        with self._lock:
+            for appID, state in zip(missing, fetched):
+                states[appID] = state
+                if self.ttl > 0:
+                    self._cache[appID] = (now, state)
+
+        return {appID: states[appID] for appID in appIDs}
+
+    def read(self, appIDs: Iterable[int]) -> Dict[int, State]:
+        """the global state of every app decoded like getAppGlobalState, by app id"""
+        return {appID: decodeState(state) for appID, state in self.readRaw(appIDs).items()}
+
+    def feeds(self, appIDs: Iterable[int], fields: Optional[Iterable[str]] = None) -> Dict[int, FeedState]:
+        """
+        the state of every feed, by app id
+
+        Args:
+            fields: FeedState fields to decode, e.g. ["lastReport"], every field if not given
+        """
+        return {feed.appID: feed for feed in decodeRecords(FeedState, self.readRaw(appIDs).items(), fields)}
+
+    def medianizer(self, appID: int, fields: Optional[Iterable[str]] = None) -> MedianizerState:
+        """the state of a medianizer"""
+        [medianizer] = decodeRecords(MedianizerState, self.readRaw([appID]).items(), fields)
+        return medianizer
+
+    def readQuery(
+        self, feedIDs: List[int], medianizerID: int, fields: Optional[Iterable[str]] = None
+    ) -> Tuple[Dict[int, FeedState], MedianizerState]:
+        """
+        the state of the feeds of a query_id and of their medianizer, read in one pass
+
+        Args:
+            fields: FeedState fields to decode, every field if not given
+        """
+        states = self.readRaw(list(feedIDs) + [medianizerID])
+        feeds = decodeRecords(FeedState, ((appID, states[appID]) for appID in feedIDs), fields)
+        [medianizer] = decodeRecords(MedianizerState, [(medianizerID, states[medianizerID])])
+        return {feed.appID: feed for feed in feeds}, medianizer
+
+    def invalidate(self, appIDs: Optional[Iterable[int]] = None) -> None:
+        """drops cached states, of every app if appIDs isn't given, e.g. after sending a transaction to them"""
+        with self._lock:
+            if appIDs is None:
+                self._cache.clear()
+                return
+            for appID in appIDs:
+                self._cache.pop(appID, None)
+
+    def close(self) -> None:
+        """stops the reader's worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="state-reader")
+            return self._executor
+
+    def _fetch(self, appID: int) -> StateArray:
+        """the global state of one app, over the shared session when talking to an algod node"""
+        if type(self.client) is AlgodClient:
+            return self._applicationInfo(appID)["params"].get("global-state", [])
+        return self.client.application_info(appID)["params"].get("global-state", [])
+
+    def _applicationInfo(self, appID: int) -> Dict[str, Any]:
+        headers = dict(self.client.headers or {})
+        if self.client.algod_token:
+            headers["X-Algo-API-Token"] = self.client.algod_token
+        url = f"{self.client.algod_address}/v2/applications/{appID}"
+        return http_get(url, timeout=READ_TIMEOUT, headers=headers).json()
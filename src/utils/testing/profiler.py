@@ -0,0 +1,219 @@
+"""
+Opcode cost profiler
+
+collects the cost of every TEAL line executed by the AVM simulator and
+attributes it to the pyteal helper it belongs to: the method a program
+routes to (e.g. `report`, `get_values`, found from the
+`txna ApplicationArgs 0 / byte "name" / == / bnz` router pyteal's Cond emits)
+and the subroutines called from it (e.g. `get_values/Medianizer_0`).
+
+    profiler = Profiler()
+    ledger.tracer = profiler
+    ...  # send transactions
+    print(profiler.report())
+
+costs are in opcode budget units, the same units algod's pooled budget of
+700 per app call is counted in
+"""
+import itertools
+import math
+import weakref
+from collections import defaultdict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from src.utils.testing.simulator import Evaluation
+from src.utils.testing.simulator import MAX_APP_CALL_BUDGET
+from src.utils.testing.simulator import OPCODE_COSTS
+from src.utils.testing.simulator import Program
+
+# name of the code before a program routes to a method
+MAIN = "main"
+
+ON_COMPLETION_NAMES = ["NoOp", "OptIn", "CloseOut", "ClearState", "UpdateApplication", "DeleteApplication"]
+
+
+def helperNames(program: Program) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """
+    Name the entry points of the pyteal helpers in a program
+
+    Returns:
+        the method entries and the subroutine entries, by instruction index
+    """
+    labels = {index: label for label, index in program.labels.items()}
+    ops = program.ops
+
+    methods = {}
+    subroutines = {}
+    for i, (op, immediates, _) in enumerate(ops):
+        if op == "callsub":
+            subroutines[immediates[0]] = labels[immediates[0]]
+        if op != "bnz" or i < 3 or ops[i - 1][0] != "==":
+            continue
+        const, field = ops[i - 2], ops[i - 3]
+        if const[0] == "byte" and field[:2] == ("txna", ("ApplicationArgs", 0)):
+            methods[immediates[0]] = const[1][0].decode(errors="replace")
+        elif const[0] == "int" and field[:2] == ("txn", ("ApplicationID",)) and const[1][0] == 0:
+            methods[immediates[0]] = "create"
+        elif const[0] == "int" and field[:2] == ("txn", ("OnCompletion",)) and const[1][0] < len(ON_COMPLETION_NAMES):
+            methods[immediates[0]] = ON_COMPLETION_NAMES[const[1][0]]
+
+    return methods, subroutines
+
+
+class _CallState:
+    """where one evaluation currently is"""
+
+    def __init__(self, name: str, program: Program, call: Dict[str, Any]) -> None:
+        self.name = name
+        self.call = call
+        self.program = program
+        self.methods, self.subroutines = helperNames(program)
+        self.stack = [MAIN]
+        self.cost = program.prelude_cost
+
+
+class Profiler:
+    """
+    A simulator tracer that records opcode costs
+
+    per TEAL line, per pyteal helper (method and subroutine path) and per
+    group, where the pooled budget that is left over is reported
+    """
+
+    def __init__(self, names: Optional[Dict[bytes, str]] = None) -> None:
+        """
+        Args:
+            names (dict): program bytecode to a readable name (e.g. "feed"), app ids are used otherwise
+        """
+        self.names = names or {}
+
+        # (program name, line) -> [times executed, cost]
+        self.lines: Dict[Tuple[str, int], List[int]] = defaultdict(lambda: [0, 0])
+        # (program name, helper path) -> cost
+        self.helpers: Dict[Tuple[str, str], int] = defaultdict(int)
+        # program name -> source
+        self.sources: Dict[str, List[str]] = {}
+        # app calls in the order they ran: program name, method reached, cost, group budget id
+        self.calls: List[Dict[str, Any]] = []
+
+        self._states: "weakref.WeakKeyDictionary[Evaluation, _CallState]" = weakref.WeakKeyDictionary()
+        self._groups: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+        self._group_ids = itertools.count()
+
+    def __call__(self, evaluation: Evaluation, index: int) -> None:
+        state = self._states.get(evaluation)
+        if state is None:
+            state = self._start(evaluation)
+
+        if len(state.stack) == 1 and index in state.methods:
+            state.stack[0] = state.methods[index]
+
+        op, immediates, line = state.program.ops[index]
+        cost = OPCODE_COSTS.get(op, 1)
+        state.cost += cost
+        entry = self.lines[(state.name, line)]
+        entry[0] += 1
+        entry[1] += cost
+        self.helpers[(state.name, "/".join(state.stack))] += cost
+
+        # the call itself is paid by the caller, the return by the subroutine
+        if op == "callsub":
+            state.stack.append(state.subroutines[immediates[0]])
+        elif op == "retsub" and len(state.stack) > 1:
+            state.stack.pop()
+
+        state.call["cost"] = state.cost
+        state.call["method"] = state.stack[0]
+
+    def _start(self, evaluation: Evaluation) -> _CallState:
+        """starts profiling an app call"""
+        program = evaluation.program
+        name = self.names.get(program.bytecode, f"app {evaluation.app_id}")
+        if evaluation.budget not in self._groups:
+            self._groups[evaluation.budget] = next(self._group_ids)
+
+        call = {"program": name, "app_id": evaluation.app_id, "method": MAIN, "group": self._groups[evaluation.budget]}
+        self.calls.append(call)
+        state = _CallState(name, program, call)
+        self._states[evaluation] = state
+        self.sources.setdefault(name, program.teal.splitlines())
+        self.helpers[(name, MAIN)] += program.prelude_cost
+        return state
+
+    def groups(self) -> List[Dict[str, int]]:
+        """pooled budget granted, spent and left over by each group (and its inner transactions)"""
+        groups: Dict[int, Dict[str, int]] = {}
+        for call in self.calls:
+            group = groups.setdefault(call["group"], {"app_calls": 0, "budget": 0, "spent": 0})
+            group["app_calls"] += 1
+            group["budget"] += MAX_APP_CALL_BUDGET
+            group["spent"] += call["cost"]
+        for group in groups.values():
+            group["remaining"] = group["budget"] - group["spent"]
+            group["app_calls_needed"] = max(1, math.ceil(group["spent"] / MAX_APP_CALL_BUDGET))
+        return list(groups.values())
+
+    def hotLines(self, count: int = 10) -> List[Tuple[str, int, int, int, str]]:
+        """the most expensive lines: program, line, times executed, cost and source"""
+        ordered = sorted(self.lines.items(), key=lambda item: (-item[1][1], -item[1][0]))[:count]
+        return [
+            (program, line, executed, cost, self.sources[program][line - 1].strip())
+            for (program, line), (executed, cost) in ordered
+        ]
+
+    def hotBlocks(self, count: int = 10) -> List[Tuple[str, str, int, int]]:
+        """the most expensive labelled blocks (the branches a program took): program, label, times entered and cost"""
+        blocks: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+        for program, source in self.sources.items():
+            label = MAIN
+            for line, text in enumerate(source, 1):
+                text = text.strip()
+                if text.endswith(":"):
+                    label = text[:-1]
+                if (program, line) not in self.lines:
+                    continue
+                executed, cost = self.lines[(program, line)]
+                block = blocks[(program, label)]
+                block[0] = max(block[0], executed)
+                block[1] += cost
+        ordered = sorted(blocks.items(), key=lambda item: -item[1][1])[:count]
+        return [(program, label, entered, cost) for (program, label), (entered, cost) in ordered]
+
+    def asDict(self) -> Dict[str, Any]:
+        """the profile as plain data, e.g. to store and compare across contract changes"""
+        return {
+            "calls": self.calls,
+            "helpers": {f"{program}:{path}": cost for (program, path), cost in sorted(self.helpers.items())},
+            "lines": {f"{program}:{line}": cost for (program, line), (_, cost) in sorted(self.lines.items())},
+            "groups": self.groups(),
+        }
+
+    def report(self, hot_lines: int = 10) -> str:
+        """a readable summary: cost per app call, per helper, the hottest lines and budget left per group"""
+        out = ["app calls:"]
+        for call in self.calls:
+            out.append(f"  {call['program']:<20}{call['method']:<24}{call['cost']:>6}")
+
+        out.append("helpers:")
+        for (program, path), cost in sorted(self.helpers.items(), key=lambda item: -item[1]):
+            out.append(f"  {program:<20}{path:<40}{cost:>6}")
+
+        out.append("hot blocks:")
+        for program, label, entered, cost in self.hotBlocks(hot_lines):
+            out.append(f"  {program:<20}{label:<40}{entered:>6}x {cost:>6}")
+
+        out.append("hot lines:")
+        for program, line, executed, cost, source in self.hotLines(hot_lines):
+            out.append(f"  {program}:{line:<6}{executed:>6}x {cost:>6}  {source}")
+
+        out.append("groups:")
+        for group in self.groups():
+            out.append(
+                f"  {group['app_calls']} app calls, spent {group['spent']} of {group['budget']},"
+                f" {group['remaining']} left, {group['app_calls_needed']} app call(s) of budget needed"
+            )
+        return "\n".join(out)
@@ -0,0 +1,1349 @@
+"""
+In-process AVM simulator
+
+runs the TEAL of our pyteal contracts against an in-memory ledger, so contract
+behaviour can be tested in milliseconds without a sandbox. it models what the
+feed and medianizer contracts rely on: global state and its schema, algo
+balances and payments, atomic groups (gtxn/gtxns), inner transactions
+(including inner app calls), the pooled opcode budget and the latest timestamp.
+
+`SimulatedAlgod` puts the parts of the algod client that Scripts, the
+AtomicTransactionComposer and src.utils use in front of a Ledger, so the
+same client code runs against it unchanged.
+
+not modelled: signatures, local state, assets, minimum balances and rewards.
+programs run from their TEAL source, so app create transactions must use
+programs registered with Ledger.register (SimulatedAlgod.compile does this)
+"""
+import base64
+import copy
+import functools
+import hashlib
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+import msgpack
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+from pyteal import compileTeal
+from pyteal import Expr
+from pyteal import Mode
+from pyteal.compiler.compiler import MAX_TEAL_VERSION
+
+from src.utils.assembler import AssemblerError
+from src.utils.assembler import assembleWithSourceMap
+from src.utils.assembler import FIELD_OPCODES
+from src.utils.assembler import parseBytes
+from src.utils.assembler import parseInt
+from src.utils.assembler import tokenize
+
+Value = Union[int, bytes]
+
+# opcode budget each app call adds to its group's pooled budget
+MAX_APP_CALL_BUDGET = 700
+
+MAX_GROUP_SIZE = 16
+MAX_INNER_TRANSACTIONS = 256
+MAX_APP_CALL_DEPTH = 8
+MAX_APP_ARGS = 16
+MAX_APP_TOTAL_REFERENCES = 8
+MAX_APP_ACCOUNTS = 4
+MAX_KEY_LEN = 64
+MAX_KEY_VALUE_LEN = 128
+MAX_BYTES_LEN = 4096
+MAX_STACK_DEPTH = 1000
+MIN_TXN_FEE = 1000
+MIN_BALANCE = 100000
+MAX_TXN_LIFE = 1000
+
+ZERO_ADDRESS = bytes(32)
+UINT64_MAX = 2**64 - 1
+
+TYPE_NAMES = {1: b"pay", 2: b"keyreg", 3: b"acfg", 4: b"axfer", 5: b"afrz", 6: b"appl"}
+TYPE_ENUMS = {name: enum for enum, name in TYPE_NAMES.items()}
+PAY, APPL = 1, 6
+NOOP, OPT_IN, CLOSE_OUT, CLEAR_STATE, UPDATE_APPLICATION, DELETE_APPLICATION = range(6)
+
+# opcodes that cost more than 1
+OPCODE_COSTS = {"sha256": 35, "keccak256": 130, "sha512_256": 45}
+
+ADDRESS_FIELDS = {"Sender", "Receiver", "CloseRemainderTo", "RekeyTo"}
+BYTES_FIELDS = {"Note", "Lease", "TxID", "GroupID", "ApprovalProgram", "ClearStateProgram", "Type"}
+ARRAY_FIELDS = {
+    "ApplicationArgs": "NumAppArgs",
+    "Accounts": "NumAccounts",
+    "Applications": "NumApplications",
+    "Assets": "NumAssets",
+}
+
+
+class SimulationError(Exception):
+    """the ledger rejected a transaction"""
+
+
+class LogicError(SimulationError):
+    """a program failed, located at the TEAL line (and pc, if the program assembles locally) it failed on"""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.app_id: Optional[int] = None
+        self.line: Optional[int] = None
+        self.pc: Optional[int] = None
+
+    def locate(self, app_id: int, line: int, pc: Optional[int]) -> None:
+        self.app_id, self.line, self.pc = app_id, line, pc
+        # same shape as algod's message, so callers matching on e.g. "pc=763" work against both
+        self.args = (f"logic eval error: {self.reason} pc={pc}. Details: app={app_id}, line={line}",)
+
+
+class Txn:
+    """
+    A transaction as seen by TEAL
+
+    fields are named after the TEAL txn fields (Sender, ApplicationArgs, ...),
+    addresses are 32 byte public keys and unset fields read as their zero value
+    """
+
+    def __init__(self, **fields: Any) -> None:
+        self.fields: Dict[str, Any] = fields
+        self.txid: Optional[str] = None
+        # set once Fee is explicitly given to an inner transaction
+        self.fee_set = "Fee" in fields
+
+    def get(self, field: str) -> Any:
+        if field in self.fields:
+            return self.fields[field]
+        if field in ADDRESS_FIELDS:
+            return ZERO_ADDRESS
+        if field in BYTES_FIELDS:
+            if field == "Type":
+                return TYPE_NAMES.get(self.get("TypeEnum"), b"")
+            return b""
+        if field in ARRAY_FIELDS:
+            return []
+        for array, count in ARRAY_FIELDS.items():
+            if field == count:
+                return len(self.get(array))
+        if field == "TypeEnum":
+            return TYPE_ENUMS.get(self.fields.get("Type", b""), 0)
+        return 0
+
+    def set(self, field: str, value: Any) -> None:
+        if field == "Type":
+            self.fields["TypeEnum"] = TYPE_ENUMS.get(value, 0)
+        elif field == "TypeEnum":
+            self.fields.pop("Type", None)
+        if field == "Fee":
+            self.fee_set = True
+        self.fields[field] = value
+
+    @classmethod
+    def fromTransaction(cls, txn: transaction.Transaction) -> "Txn":
+        """converts an algosdk transaction"""
+        fields: Dict[str, Any] = {
+            "Sender": encoding.decode_address(txn.sender),
+            "Fee": txn.fee,
+            "FirstValid": txn.first_valid_round,
+            "LastValid": txn.last_valid_round,
+            "Note": txn.note or b"",
+            "Lease": txn.lease or b"",
+            "TypeEnum": TYPE_ENUMS[txn.type.encode()],
+            "GroupID": txn.group or ZERO_ADDRESS,
+        }
+        if txn.rekey_to:
+            fields["RekeyTo"] = encoding.decode_address(txn.rekey_to)
+        if isinstance(txn, transaction.PaymentTxn):
+            fields["Receiver"] = encoding.decode_address(txn.receiver)
+            fields["Amount"] = txn.amt
+            if txn.close_remainder_to:
+                fields["CloseRemainderTo"] = encoding.decode_address(txn.close_remainder_to)
+        if isinstance(txn, transaction.ApplicationCallTxn):
+            fields["ApplicationID"] = txn.index
+            # NoOp is the zero value, left out of msgpack encoded transactions
+            fields["OnCompletion"] = int(txn.on_complete.value) if txn.on_complete else 0
+            fields["ApplicationArgs"] = list(txn.app_args or [])
+            fields["Accounts"] = [encoding.decode_address(a) for a in txn.accounts or []]
+            fields["Applications"] = list(txn.foreign_apps or [])
+            fields["Assets"] = list(txn.foreign_assets or [])
+            fields["ApprovalProgram"] = txn.approval_program or b""
+            fields["ClearStateProgram"] = txn.clear_program or b""
+            if txn.global_schema is not None:
+                fields["GlobalNumUint"] = txn.global_schema.num_uints or 0
+                fields["GlobalNumByteSlice"] = txn.global_schema.num_byte_slices or 0
+
+        result = cls(**fields)
+        result.txid = txn.get_txid()
+        result.fields["TxID"] = base64.b32decode(result.txid + "=" * (-len(result.txid) % 8))
+        return result
+
+
+class Program:
+    """TEAL source parsed once for evaluation"""
+
+    def __init__(self, teal: str) -> None:
+        self.teal = teal
+        self.version = 1
+        # opcode, parsed immediates and source line of each instruction
+        self.ops: List[Tuple[str, Tuple[Any, ...], int]] = []
+        self.labels: Dict[str, int] = {}
+
+        for number, line in enumerate(teal.splitlines(), start=1):
+            tokens = tokenize(line)
+            if not tokens:
+                continue
+            op, args = tokens[0], tokens[1:]
+            if op == "#pragma":
+                self.version = int(args[1])
+            elif op.endswith(":") and not args:
+                self.labels[op[:-1]] = len(self.ops)
+            else:
+                if op == "txn" and len(args) == 2:
+                    op = "txna"
+                if op not in OPS:
+                    raise SimulationError(f"line {number}: unsupported opcode {op}")
+                self.ops.append((op, _immediates(op, args), number))
+
+        # branches jump straight to instruction indexes
+        for i, (op, immediates, number) in enumerate(self.ops):
+            if op in ("b", "bz", "bnz", "callsub"):
+                if immediates[0] not in self.labels:
+                    raise SimulationError(f"line {number}: reference to undefined label {immediates[0]}")
+                self.ops[i] = (op, (self.labels[immediates[0]],), number)
+
+        try:
+            assembly = assembleWithSourceMap(teal)
+            self.bytecode: Optional[bytes] = assembly.program
+            self.pcs: Dict[int, int] = assembly.pcs
+            # intcblock/bytecblock run before the first instruction
+            self.prelude_cost = assembly.constant_blocks
+        except AssemblerError:
+            self.bytecode, self.pcs, self.prelude_cost = None, {}, 0
+
+
+@functools.lru_cache(maxsize=None)
+def loadProgram(teal: str) -> Program:
+    """parses a program once per process, programs are never modified after parsing"""
+    return Program(teal)
+
+
+def _immediates(op: str, args: List[str]) -> Tuple[Any, ...]:
+    """parses the immediates of one instruction"""
+    if op in ("int", "pushint"):
+        return (parseInt(args[0]),)
+    if op in ("byte", "pushbytes"):
+        return (parseBytes(args),)
+    if op == "addr":
+        return (encoding.decode_address(args[0]),)
+    if op in FIELD_OPCODES:
+        tables = FIELD_OPCODES[op][1]
+        if len(args) != len(tables):
+            raise SimulationError(f"{op} expects {len(tables)} immediates")
+        values = []
+        for table, arg in zip(tables, args):
+            if table is not None and arg not in table:
+                raise SimulationError(f"unknown field {arg} for {op}")
+            values.append(arg if table is not None else parseInt(arg))
+        return tuple(values)
+    return tuple(args)
+
+
+class Application:
+    """an app on the ledger"""
+
+    def __init__(
+        self, app_id: int, creator: bytes, approval: Program, clear: Program, num_uint: int, num_byte_slice: int
+    ) -> None:
+        self.app_id = app_id
+        self.creator = creator
+        self.approval = approval
+        self.clear = clear
+        self.num_uint = num_uint
+        self.num_byte_slice = num_byte_slice
+        self.global_state: Dict[bytes, Value] = {}
+        self.address = encoding.decode_address(get_application_address(app_id))
+
+    def copy(self) -> "Application":
+        app = copy.copy(self)
+        app.global_state = dict(self.global_state)
+        return app
+
+
+class _Budget:
+    """opcode budget and fee credit pooled across a group and its inner transactions"""
+
+    def __init__(self, budget: int, fee_credit: int) -> None:
+        self.remaining = budget
+        self.fee_credit = fee_credit
+        self.inner_count = 0
+
+
+# called before every instruction with the running evaluation and the index of the instruction
+Tracer = Callable[["Evaluation", int], None]
+
+
+class Ledger:
+    """in-memory accounts and apps that transaction groups are applied to, one block per group"""
+
+    def __init__(self, timestamp: Optional[int] = None, block_time: int = 4, tracer: Optional[Tracer] = None) -> None:
+        """
+        Args:
+            timestamp (int): timestamp of the latest block, defaults to now
+            block_time (int): seconds between blocks
+            tracer (callable): called before every instruction, see Evaluation
+        """
+        self.round = 1
+        self.timestamp = int(time.time()) if timestamp is None else timestamp
+        self.block_time = block_time
+        self.tracer = tracer
+
+        self.balances: Dict[bytes, int] = {}
+        self.apps: Dict[int, Application] = {}
+        self.programs: Dict[bytes, Program] = {}
+        self._next_app_id = 1000
+
+    def register(self, teal: str) -> bytes:
+        """makes a TEAL program deployable, returning the bytecode app create transactions use for it"""
+        program = loadProgram(teal)
+        if program.bytecode is None:
+            raise SimulationError("program can't be assembled locally")
+        self.programs[program.bytecode] = program
+        return program.bytecode
+
+    def registerContract(self, contract: Expr) -> bytes:
+        """registers a pyteal program compiled the way Scripts compiles contracts"""
+        return self.register(compileTeal(contract, mode=Mode.Application, version=MAX_TEAL_VERSION))
+
+    def fund(self, address: str, amount: int) -> None:
+        """creates algos out of thin air"""
+        key = encoding.decode_address(address)
+        self.balances[key] = self.balances.get(key, 0) + amount
+
+    def balance(self, address: str) -> int:
+        return self.balances.get(encoding.decode_address(address), 0)
+
+    def globalState(self, app_id: int) -> Dict[bytes, Value]:
+        return dict(self.apps[app_id].global_state)
+
+    def advance(self, seconds: int, rounds: int = 1) -> None:
+        """lets time pass: the next group sees a latest timestamp `seconds` later"""
+        self.round += rounds
+        self.timestamp += seconds
+
+    def execute(self, group: List[Txn]) -> List[Dict[str, Any]]:
+        """
+        Apply a transaction group atomically and commit it in a new block
+
+        Args:
+            group (list): the transactions of the group, in order
+        Returns:
+            list: algod style apply data of each transaction (application-index, logs, inner-txns)
+        Raises:
+            SimulationError: if any transaction is rejected, in which case the ledger is unchanged
+        """
+        if not 0 < len(group) <= MAX_GROUP_SIZE:
+            raise SimulationError(f"group size {len(group)} is invalid")
+
+        fees = sum(txn.get("Fee") for txn in group)
+        if fees < MIN_TXN_FEE * len(group):
+            raise SimulationError(f"txgroup had {fees} in fees, which is less than the minimum {len(group)} * 1000")
+        app_calls = sum(1 for txn in group if txn.get("TypeEnum") == APPL)
+        budget = _Budget(MAX_APP_CALL_BUDGET * app_calls, fees - MIN_TXN_FEE * len(group))
+
+        snapshot = (dict(self.balances), {app_id: app.copy() for app_id, app in self.apps.items()}, self._next_app_id)
+        try:
+            results = self._applyGroup(group, budget, ())
+        except SimulationError:
+            self.balances, self.apps, self._next_app_id = snapshot
+            raise
+
+        self.round += 1
+        self.timestamp += self.block_time
+        return results
+
+    def _applyGroup(self, group: List[Txn], budget: _Budget, callers: Tuple[int, ...]) -> List[Dict[str, Any]]:
+        for i, txn in enumerate(group):
+            txn.fields["GroupIndex"] = i
+        return [self._apply(group, i, budget, callers) for i in range(len(group))]
+
+    def _apply(self, group: List[Txn], index: int, budget: _Budget, callers: Tuple[int, ...]) -> Dict[str, Any]:
+        txn = group[index]
+        sender = txn.get("Sender")
+        self._move(sender, None, txn.get("Fee"))
+
+        kind = txn.get("TypeEnum")
+        if kind == PAY:
+            self._move(sender, txn.get("Receiver"), txn.get("Amount"))
+            close_to = txn.get("CloseRemainderTo")
+            if close_to != ZERO_ADDRESS:
+                self._move(sender, close_to, self.balances.get(sender, 0))
+                del self.balances[sender]
+            return {}
+        if kind == APPL:
+            return self._appCall(group, index, budget, callers)
+        raise SimulationError(f"transaction type {TYPE_NAMES.get(kind, kind)} is not simulated")
+
+    def _move(self, sender: bytes, receiver: Optional[bytes], amount: int) -> None:
+        """moves algos, a receiver of None burns them (fees)"""
+        balance = self.balances.get(sender, 0) - amount
+        if balance < 0:
+            raise SimulationError(
+                f"account {encoding.encode_address(sender)} balance {balance + amount} below {amount}: overspend"
+            )
+        self.balances[sender] = balance
+        if receiver is not None:
+            self.balances[receiver] = self.balances.get(receiver, 0) + amount
+
+    def _appCall(self, group: List[Txn], index: int, budget: _Budget, callers: Tuple[int, ...]) -> Dict[str, Any]:
+        txn = group[index]
+        _checkReferences(txn)
+
+        result: Dict[str, Any] = {}
+        app_id = txn.get("ApplicationID")
+        if app_id == 0:
+            app_id = self._create(txn)
+            result["application-index"] = app_id
+        app = self.apps.get(app_id)
+        if app is None:
+            raise SimulationError(f"application {app_id} does not exist")
+        if app_id in callers:
+            raise SimulationError(f"attempt to re-enter {app_id}")
+
+        on_completion = txn.get("OnCompletion")
+        program = app.clear if on_completion == CLEAR_STATE else app.approval
+        evaluation = Evaluation(self, app, program, group, index, budget, callers)
+        approved = evaluation.run()
+        if not approved and on_completion != CLEAR_STATE:
+            raise SimulationError(f"transaction rejected by ApprovalProgram of app {app_id}")
+
+        if on_completion == DELETE_APPLICATION:
+            del self.apps[app_id]
+        elif on_completion == UPDATE_APPLICATION:
+            app.approval = self._program(txn.get("ApprovalProgram"))
+            app.clear = self._program(txn.get("ClearStateProgram"))
+        else:
+            _checkSchema(app)
+
+        if evaluation.logs:
+            result["logs"] = [base64.b64encode(log).decode() for log in evaluation.logs]
+        if evaluation.inner_results:
+            result["inner-txns"] = evaluation.inner_results
+        return result
+
+    def _create(self, txn: Txn) -> int:
+        app_id = self._next_app_id
+        self._next_app_id += 1
+        self.apps[app_id] = Application(
+            app_id,
+            txn.get("Sender"),
+            self._program(txn.get("ApprovalProgram")),
+            self._program(txn.get("ClearStateProgram")),
+            txn.get("GlobalNumUint"),
+            txn.get("GlobalNumByteSlice"),
+        )
+        return app_id
+
+    def _program(self, bytecode: bytes) -> Program:
+        if bytecode not in self.programs:
+            raise SimulationError("unknown program, register its TEAL with Ledger.register first")
+        return self.programs[bytecode]
+
+
+def _checkReferences(txn: Txn) -> None:
+    """the foreign reference and argument limits algod enforces on app calls"""
+    accounts, apps, assets = txn.get("Accounts"), txn.get("Applications"), txn.get("Assets")
+    if len(accounts) + len(apps) + len(assets) > MAX_APP_TOTAL_REFERENCES:
+        raise SimulationError(f"tx references exceed MaxAppTotalTxnReferences = {MAX_APP_TOTAL_REFERENCES}")
+    if len(accounts) > MAX_APP_ACCOUNTS:
+        raise SimulationError(f"tx.Accounts too long, max number of accounts is {MAX_APP_ACCOUNTS}")
+    if len(txn.get("ApplicationArgs")) > MAX_APP_ARGS:
+        raise SimulationError(f"too many application args, max {MAX_APP_ARGS}")
+
+
+def _checkSchema(app: Application) -> None:
+    ints = sum(1 for value in app.global_state.values() if isinstance(value, int))
+    byteslices = len(app.global_state) - ints
+    if ints > app.num_uint:
+        raise SimulationError(f"store integer count {ints} exceeds schema integer count {app.num_uint}")
+    if byteslices > app.num_byte_slice:
+        raise SimulationError(f"store bytes count {byteslices} exceeds schema bytes count {app.num_byte_slice}")
+
+
+class Evaluation:
+    """one run of an app's program, the state a Tracer can inspect"""
+
+    def __init__(
+        self,
+        ledger: Ledger,
+        app: Application,
+        program: Program,
+        group: List[Txn],
+        index: int,
+        budget: _Budget,
+        callers: Tuple[int, ...],
+    ) -> None:
+        self.ledger = ledger
+        self.app = app
+        self.program = program
+        self.group = group
+        self.txn = group[index]
+        self.budget = budget
+        self.callers = callers
+
+        self.stack: List[Value] = []
+        self.scratch: List[Value] = [0] * 256
+        self.frames: List[int] = []
+        self.pc = 0
+        self.logs: List[bytes] = []
+        self.inner: Optional[List[Txn]] = None
+        self.last_inner: List[Txn] = []
+        self.inner_results: List[Dict[str, Any]] = []
+
+    @property
+    def app_id(self) -> int:
+        return self.app.app_id
+
+    def run(self) -> bool:
+        """evaluates the program, returning whether it approved"""
+        ops = self.program.ops
+        end = len(ops)
+        tracer = self.ledger.tracer
+        self.budget.remaining -= self.program.prelude_cost
+        try:
+            while self.pc < end:
+                index = self.pc
+                op, immediates, _ = ops[index]
+                if tracer is not None:
+                    tracer(self, index)
+                self.budget.remaining -= OPCODE_COSTS.get(op, 1)
+                if self.budget.remaining < 0:
+                    raise LogicError("dynamic cost budget exceeded")
+                self.pc += 1
+                OPS[op](self, *immediates)
+            if len(self.stack) != 1:
+                raise LogicError(f"stack len is {len(self.stack)} instead of 1")
+            return bool(self.uint(self.stack[0]))
+        except LogicError as e:
+            if e.line is None:
+                line = ops[min(self.pc - 1, end - 1)][2]
+                e.locate(self.app_id, line, self.program.pcs.get(line))
+            raise
+
+    def push(self, value: Value) -> None:
+        if len(self.stack) >= MAX_STACK_DEPTH:
+            raise LogicError("stack overflow")
+        self.stack.append(value)
+
+    def pop(self) -> Value:
+        if not self.stack:
+            raise LogicError("stack underflow")
+        return self.stack.pop()
+
+    def popUint(self) -> int:
+        return self.uint(self.pop())
+
+    def popBytes(self) -> bytes:
+        value = self.pop()
+        if not isinstance(value, bytes):
+            raise LogicError("expected []byte, got uint64")
+        return value
+
+    @staticmethod
+    def uint(value: Value) -> int:
+        if not isinstance(value, int):
+            raise LogicError("expected uint64, got []byte")
+        return value
+
+    def resolveApp(self, ref: int) -> int:
+        """an app id from an id or an index into the foreign apps, the way AVM v4+ resolves references"""
+        foreign = self.txn.get("Applications")
+        if ref == 0 or ref == self.app_id:
+            return self.app_id
+        if ref in foreign:
+            return ref
+        if ref <= len(foreign):
+            return foreign[ref - 1]
+        raise LogicError(f"invalid App reference {ref}")
+
+    def resolveAccount(self, ref: Value) -> bytes:
+        accounts = [self.txn.get("Sender")] + self.txn.get("Accounts")
+        if isinstance(ref, bytes):
+            if len(ref) != 32:
+                raise LogicError("invalid address")
+            return ref
+        if ref >= len(accounts):
+            raise LogicError(f"invalid Account reference {ref}")
+        return accounts[ref]
+
+    def txnField(self, txn: Txn, field: str, index: Optional[int] = None) -> Value:
+        if field == "Applications" and index == 0:
+            return txn.get("ApplicationID")
+        if field == "Accounts" and index == 0:
+            return txn.get("Sender")
+        value = txn.get(field)
+        if index is None:
+            if isinstance(value, list):
+                raise LogicError(f"{field} is an array field")
+            return value
+        if field in ("Applications", "Accounts"):
+            index -= 1
+        if not isinstance(value, list) or index >= len(value):
+            raise LogicError(f"invalid {field} index {index}")
+        return value[index]
+
+    def groupTxn(self, index: int) -> Txn:
+        if index >= len(self.group):
+            raise LogicError(f"gtxn lookup TxnGroup[{index}] but it only has {len(self.group)}")
+        return self.group[index]
+
+    def globalField(self, field: str) -> Value:
+        ledger = self.ledger
+        caller = self.callers[-1] if self.callers else 0
+        values = {
+            "MinTxnFee": MIN_TXN_FEE,
+            "MinBalance": MIN_BALANCE,
+            "MaxTxnLife": MAX_TXN_LIFE,
+            "ZeroAddress": ZERO_ADDRESS,
+            "GroupSize": len(self.group),
+            "LogicSigVersion": MAX_TEAL_VERSION,
+            "Round": ledger.round + 1,
+            "LatestTimestamp": ledger.timestamp,
+            "CurrentApplicationID": self.app_id,
+            "CreatorAddress": self.app.creator,
+            "CurrentApplicationAddress": self.app.address,
+            "GroupID": self.txn.get("GroupID"),
+            "OpcodeBudget": self.budget.remaining,
+            "CallerApplicationID": caller,
+            "CallerApplicationAddress": ledger.apps[caller].address if caller else ZERO_ADDRESS,
+        }
+        if field not in values:
+            raise LogicError(f"global {field} is not simulated")
+        return values[field]
+
+    def submitInner(self) -> None:
+        if not self.inner:
+            raise LogicError("itxn_submit without itxn_begin")
+        group, self.inner = self.inner, None
+        self.budget.inner_count += len(group)
+        if self.budget.inner_count > MAX_INNER_TRANSACTIONS:
+            raise LogicError(f"too many inner transactions {self.budget.inner_count}")
+        if len(self.callers) + 1 >= MAX_APP_CALL_DEPTH and any(t.get("TypeEnum") == APPL for t in group):
+            raise LogicError("appl depth exceeded")
+
+        for txn in group:
+            if txn.get("Sender") != self.app.address:
+                raise LogicError("unauthorized inner transaction sender")
+            if not txn.fee_set:
+                # inner fees are covered by what the outer group overpaid, or paid by the app
+                if self.budget.fee_credit >= MIN_TXN_FEE:
+                    self.budget.fee_credit -= MIN_TXN_FEE
+                    txn.fields["Fee"] = 0
+                else:
+                    txn.fields["Fee"] = MIN_TXN_FEE
+            if txn.get("TypeEnum") == APPL:
+                self.budget.remaining += MAX_APP_CALL_BUDGET
+
+        try:
+            results = self.ledger._applyGroup(group, self.budget, self.callers + (self.app_id,))
+        except LogicError:
+            raise
+        except SimulationError as e:
+            raise LogicError(f"inner transaction failed: {e}")
+
+        for txn, result in zip(group, results):
+            result["txn"] = {"txn": _txnDict(txn)}
+            self.inner_results.append(result)
+        self.last_inner = group
+
+
+def _txnDict(txn: Txn) -> Dict[str, Any]:
+    """the algod encoding of the main fields of an inner transaction"""
+    out: Dict[str, Any] = {"type": txn.get("Type").decode(), "snd": encoding.encode_address(txn.get("Sender"))}
+    if txn.get("Fee"):
+        out["fee"] = txn.get("Fee")
+    if txn.get("TypeEnum") == PAY:
+        out["rcv"] = encoding.encode_address(txn.get("Receiver"))
+        if txn.get("Amount"):
+            out["amt"] = txn.get("Amount")
+        if txn.get("CloseRemainderTo") != ZERO_ADDRESS:
+            out["close"] = encoding.encode_address(txn.get("CloseRemainderTo"))
+    if txn.get("TypeEnum") == APPL:
+        out["apid"] = txn.get("ApplicationID")
+        out["apaa"] = [base64.b64encode(arg).decode() for arg in txn.get("ApplicationArgs")]
+        out["apfa"] = txn.get("Applications")
+    return out
+
+
+def _binary(fn: Callable[[int, int], int]) -> Callable[[Evaluation], None]:
+    def op(ev: Evaluation) -> None:
+        b = ev.popUint()
+        a = ev.popUint()
+        ev.push(fn(a, b))
+
+    return op
+
+
+def _add(a: int, b: int) -> int:
+    if a + b > UINT64_MAX:
+        raise LogicError("+ overflowed")
+    return a + b
+
+
+def _sub(a: int, b: int) -> int:
+    if b > a:
+        raise LogicError("- would result negative")
+    return a - b
+
+
+def _mul(a: int, b: int) -> int:
+    if a * b > UINT64_MAX:
+        raise LogicError("* overflowed")
+    return a * b
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise LogicError("/ 0")
+    return a // b
+
+
+def _mod(a: int, b: int) -> int:
+    if b == 0:
+        raise LogicError("% 0")
+    return a % b
+
+
+def _equal(ev: Evaluation, negate: bool = False) -> None:
+    b = ev.pop()
+    a = ev.pop()
+    if type(a) is not type(b):
+        raise LogicError("cannot compare uint64 to []byte")
+    ev.push(int((a == b) != negate))
+
+
+def _not(ev: Evaluation) -> None:
+    ev.push(int(ev.popUint() == 0))
+
+
+def _bitNot(ev: Evaluation) -> None:
+    ev.push(UINT64_MAX ^ ev.popUint())
+
+
+def _len(ev: Evaluation) -> None:
+    ev.push(len(ev.popBytes()))
+
+
+def _itob(ev: Evaluation) -> None:
+    ev.push(ev.popUint().to_bytes(8, "big"))
+
+
+def _btoi(ev: Evaluation) -> None:
+    value = ev.popBytes()
+    if len(value) > 8:
+        raise LogicError(f"btoi arg too long, got [{len(value)}]bytes")
+    ev.push(int.from_bytes(value, "big"))
+
+
+def _concat(ev: Evaluation) -> None:
+    b = ev.popBytes()
+    a = ev.popBytes()
+    if len(a) + len(b) > MAX_BYTES_LEN:
+        raise LogicError("concat produced a too big byte-array")
+    ev.push(a + b)
+
+
+def _slice(value: bytes, start: int, end: int) -> bytes:
+    if end < start:
+        raise LogicError("substring end before start")
+    if end > len(value):
+        raise LogicError("substring range beyond length of string")
+    return value[start:end]
+
+
+def _substring(ev: Evaluation, start: int, end: int) -> None:
+    ev.push(_slice(ev.popBytes(), start, end))
+
+
+def _substring3(ev: Evaluation) -> None:
+    end = ev.popUint()
+    start = ev.popUint()
+    ev.push(_slice(ev.popBytes(), start, end))
+
+
+def _extract(ev: Evaluation, start: int, length: int) -> None:
+    value = ev.popBytes()
+    if length == 0:
+        if start > len(value):
+            raise LogicError("extract range beyond length of string")
+        ev.push(value[start:])
+    else:
+        ev.push(_slice(value, start, start + length))
+
+
+def _extract3(ev: Evaluation) -> None:
+    length = ev.popUint()
+    start = ev.popUint()
+    ev.push(_slice(ev.popBytes(), start, start + length))
+
+
+def _extractUint(size: int) -> Callable[[Evaluation], None]:
+    def op(ev: Evaluation) -> None:
+        start = ev.popUint()
+        ev.push(int.from_bytes(_slice(ev.popBytes(), start, start + size), "big"))
+
+    return op
+
+
+def _getbyte(ev: Evaluation) -> None:
+    index = ev.popUint()
+    ev.push(_slice(ev.popBytes(), index, index + 1)[0])
+
+
+def _hash(fn: Callable[[bytes], bytes]) -> Callable[[Evaluation], None]:
+    def op(ev: Evaluation) -> None:
+        ev.push(fn(ev.popBytes()))
+
+    return op
+
+
+def _keccak256(value: bytes) -> bytes:
+    from Cryptodome.Hash import keccak
+
+    return keccak.new(data=value, digest_bits=256).digest()
+
+
+def _bzero(ev: Evaluation) -> None:
+    length = ev.popUint()
+    if length > MAX_BYTES_LEN:
+        raise LogicError("bzero attempted to create a too large string")
+    ev.push(bytes(length))
+
+
+def _push(ev: Evaluation, value: Value) -> None:
+    ev.push(value)
+
+
+def _pop(ev: Evaluation) -> None:
+    ev.pop()
+
+
+def _dup(ev: Evaluation) -> None:
+    value = ev.pop()
+    ev.push(value)
+    ev.push(value)
+
+
+def _dup2(ev: Evaluation) -> None:
+    b = ev.pop()
+    a = ev.pop()
+    for value in (a, b, a, b):
+        ev.push(value)
+
+
+def _swap(ev: Evaluation) -> None:
+    b = ev.pop()
+    a = ev.pop()
+    ev.push(b)
+    ev.push(a)
+
+
+def _select(ev: Evaluation) -> None:
+    condition = ev.popUint()
+    b = ev.pop()
+    a = ev.pop()
+    ev.push(b if condition else a)
+
+
+def _depth(ev: Evaluation, n: int) -> int:
+    if n >= len(ev.stack):
+        raise LogicError(f"stack depth {len(ev.stack)} too shallow for {n}")
+    return len(ev.stack) - 1 - n
+
+
+def _dig(ev: Evaluation, n: int) -> None:
+    ev.push(ev.stack[_depth(ev, n)])
+
+
+def _cover(ev: Evaluation, n: int) -> None:
+    ev.stack.insert(_depth(ev, n), ev.stack.pop())
+
+
+def _uncover(ev: Evaluation, n: int) -> None:
+    ev.push(ev.stack.pop(_depth(ev, n)))
+
+
+def _err(ev: Evaluation) -> None:
+    raise LogicError("err opcode executed")
+
+
+def _return(ev: Evaluation) -> None:
+    ev.stack = [ev.popUint()]
+    ev.pc = len(ev.program.ops)
+
+
+def _assert(ev: Evaluation) -> None:
+    if not ev.popUint():
+        raise LogicError("assert failed")
+
+
+def _branch(ev: Evaluation, target: int) -> None:
+    ev.pc = target
+
+
+def _bz(ev: Evaluation, target: int) -> None:
+    if not ev.popUint():
+        ev.pc = target
+
+
+def _bnz(ev: Evaluation, target: int) -> None:
+    if ev.popUint():
+        ev.pc = target
+
+
+def _callsub(ev: Evaluation, target: int) -> None:
+    if len(ev.frames) >= 1024:
+        raise LogicError("callsub stack overflow")
+    ev.frames.append(ev.pc)
+    ev.pc = target
+
+
+def _retsub(ev: Evaluation) -> None:
+    if not ev.frames:
+        raise LogicError("retsub with empty callstack")
+    ev.pc = ev.frames.pop()
+
+
+def _slot(n: int) -> int:
+    if n > 255:
+        raise LogicError(f"invalid scratch space slot {n}")
+    return n
+
+
+def _load(ev: Evaluation, n: int) -> None:
+    ev.push(ev.scratch[n])
+
+
+def _store(ev: Evaluation, n: int) -> None:
+    ev.scratch[n] = ev.pop()
+
+
+def _loads(ev: Evaluation) -> None:
+    ev.push(ev.scratch[_slot(ev.popUint())])
+
+
+def _stores(ev: Evaluation) -> None:
+    value = ev.pop()
+    ev.scratch[_slot(ev.popUint())] = value
+
+
+def _txn(ev: Evaluation, field: str) -> None:
+    ev.push(ev.txnField(ev.txn, field))
+
+
+def _txna(ev: Evaluation, field: str, index: int) -> None:
+    ev.push(ev.txnField(ev.txn, field, index))
+
+
+def _txnas(ev: Evaluation, field: str) -> None:
+    ev.push(ev.txnField(ev.txn, field, ev.popUint()))
+
+
+def _gtxn(ev: Evaluation, group_index: int, field: str) -> None:
+    ev.push(ev.txnField(ev.groupTxn(group_index), field))
+
+
+def _gtxna(ev: Evaluation, group_index: int, field: str, index: int) -> None:
+    ev.push(ev.txnField(ev.groupTxn(group_index), field, index))
+
+
+def _gtxnas(ev: Evaluation, group_index: int, field: str) -> None:
+    ev.push(ev.txnField(ev.groupTxn(group_index), field, ev.popUint()))
+
+
+def _gtxns(ev: Evaluation, field: str) -> None:
+    ev.push(ev.txnField(ev.groupTxn(ev.popUint()), field))
+
+
+def _gtxnsa(ev: Evaluation, field: str, index: int) -> None:
+    ev.push(ev.txnField(ev.groupTxn(ev.popUint()), field, index))
+
+
+def _gtxnsas(ev: Evaluation, field: str) -> None:
+    index = ev.popUint()
+    ev.push(ev.txnField(ev.groupTxn(ev.popUint()), field, index))
+
+
+def _global(ev: Evaluation, field: str) -> None:
+    ev.push(ev.globalField(field))
+
+
+def _checkKey(key: bytes) -> None:
+    if len(key) > MAX_KEY_LEN:
+        raise LogicError(f"key too long: length was {len(key)}, maximum is {MAX_KEY_LEN}")
+
+
+def _appGlobalGet(ev: Evaluation) -> None:
+    ev.push(ev.app.global_state.get(ev.popBytes(), 0))
+
+
+def _appGlobalGetEx(ev: Evaluation) -> None:
+    key = ev.popBytes()
+    app = ev.ledger.apps.get(ev.resolveApp(ev.popUint()))
+    if app is None or key not in app.global_state:
+        ev.push(0)
+        ev.push(0)
+    else:
+        ev.push(app.global_state[key])
+        ev.push(1)
+
+
+def _appGlobalPut(ev: Evaluation) -> None:
+    value = ev.pop()
+    key = ev.popBytes()
+    _checkKey(key)
+    if isinstance(value, bytes) and len(key) + len(value) > MAX_KEY_VALUE_LEN:
+        raise LogicError(f"key/value total too long for key {key!r}")
+    ev.app.global_state[key] = value
+
+
+def _appGlobalDel(ev: Evaluation) -> None:
+    ev.app.global_state.pop(ev.popBytes(), None)
+
+
+def _appParamsGet(ev: Evaluation, field: str) -> None:
+    app = ev.ledger.apps.get(ev.resolveApp(ev.popUint()))
+    if app is None:
+        ev.push(0)
+        ev.push(0)
+        return
+    values = {
+        "AppApprovalProgram": app.approval.bytecode or b"",
+        "AppClearStateProgram": app.clear.bytecode or b"",
+        "AppGlobalNumUint": app.num_uint,
+        "AppGlobalNumByteSlice": app.num_byte_slice,
+        "AppLocalNumUint": 0,
+        "AppLocalNumByteSlice": 0,
+        "AppExtraProgramPages": 0,
+        "AppCreator": app.creator,
+        "AppAddress": app.address,
+    }
+    ev.push(values[field])
+    ev.push(1)
+
+
+def _acctParamsGet(ev: Evaluation, field: str) -> None:
+    account = ev.resolveAccount(ev.pop())
+    balance = ev.ledger.balances.get(account)
+    values = {"AcctBalance": balance or 0, "AcctMinBalance": MIN_BALANCE, "AcctAuthAddr": ZERO_ADDRESS}
+    ev.push(values[field])
+    ev.push(int(balance is not None))
+
+
+def _balance(ev: Evaluation) -> None:
+    ev.push(ev.ledger.balances.get(ev.resolveAccount(ev.pop()), 0))
+
+
+def _log(ev: Evaluation) -> None:
+    if len(ev.logs) >= 32:
+        raise LogicError("too many log calls in program. up to 32 is allowed")
+    ev.logs.append(ev.popBytes())
+
+
+def _itxnBegin(ev: Evaluation) -> None:
+    if ev.inner is not None:
+        raise LogicError("itxn_begin without itxn_submit")
+    ev.inner = [Txn(Sender=ev.app.address)]
+
+
+def _itxnNext(ev: Evaluation) -> None:
+    if ev.inner is None:
+        raise LogicError("itxn_next without itxn_begin")
+    ev.inner.append(Txn(Sender=ev.app.address))
+
+
+def _itxnField(ev: Evaluation, field: str) -> None:
+    if ev.inner is None:
+        raise LogicError("itxn_field without itxn_begin")
+    value = ev.pop()
+    txn = ev.inner[-1]
+    if field in ARRAY_FIELDS:
+        txn.fields[field] = txn.get(field) + [value]
+    elif field in ("TypeEnum", "Fee", "Amount", "ApplicationID", "OnCompletion"):
+        txn.set(field, ev.uint(value))
+    elif field in ADDRESS_FIELDS:
+        txn.set(field, ev.resolveAccount(value) if isinstance(value, int) else value)
+    elif field in ("Type", "Note"):
+        if not isinstance(value, bytes):
+            raise LogicError(f"{field} must be []byte")
+        txn.set(field, value)
+    else:
+        raise LogicError(f"itxn_field {field} is not simulated")
+
+
+def _itxnSubmit(ev: Evaluation) -> None:
+    ev.submitInner()
+
+
+def _itxn(ev: Evaluation, field: str) -> None:
+    if not ev.last_inner:
+        raise LogicError("no inner transaction available")
+    ev.push(ev.txnField(ev.last_inner[-1], field))
+
+
+def _itxna(ev: Evaluation, field: str, index: int) -> None:
+    if not ev.last_inner:
+        raise LogicError("no inner transaction available")
+    ev.push(ev.txnField(ev.last_inner[-1], field, index))
+
+
+def _compare(fn: Callable[[int, int], bool]) -> Callable[[Evaluation], None]:
+    return _binary(lambda a, b: int(fn(a, b)))
+
+
+OPS: Dict[str, Callable[..., None]] = {
+    "err": _err,
+    "sha256": _hash(lambda value: hashlib.sha256(value).digest()),
+    "keccak256": _hash(_keccak256),
+    "sha512_256": _hash(lambda value: hashlib.new("sha512_256", value).digest()),
+    "+": _binary(_add),
+    "-": _binary(_sub),
+    "/": _binary(_div),
+    "*": _binary(_mul),
+    "<": _compare(lambda a, b: a < b),
+    ">": _compare(lambda a, b: a > b),
+    "<=": _compare(lambda a, b: a <= b),
+    ">=": _compare(lambda a, b: a >= b),
+    "&&": _compare(lambda a, b: bool(a and b)),
+    "||": _compare(lambda a, b: bool(a or b)),
+    "==": _equal,
+    "!=": lambda ev: _equal(ev, negate=True),
+    "!": _not,
+    "len": _len,
+    "itob": _itob,
+    "btoi": _btoi,
+    "%": _binary(_mod),
+    "|": _binary(lambda a, b: a | b),
+    "&": _binary(lambda a, b: a & b),
+    "^": _binary(lambda a, b: a ^ b),
+    "~": _bitNot,
+    "int": _push,
+    "pushint": _push,
+    "byte": _push,
+    "pushbytes": _push,
+    "addr": _push,
+    "txn": _txn,
+    "global": _global,
+    "gtxn": _gtxn,
+    "load": _load,
+    "store": _store,
+    "txna": _txna,
+    "gtxna": _gtxna,
+    "gtxns": _gtxns,
+    "gtxnsa": _gtxnsa,
+    "bnz": _bnz,
+    "bz": _bz,
+    "b": _branch,
+    "return": _return,
+    "assert": _assert,
+    "pop": _pop,
+    "dup": _dup,
+    "dup2": _dup2,
+    "dig": _dig,
+    "swap": _swap,
+    "select": _select,
+    "cover": _cover,
+    "uncover": _uncover,
+    "concat": _concat,
+    "substring": _substring,
+    "substring3": _substring3,
+    "getbyte": _getbyte,
+    "extract": _extract,
+    "extract3": _extract3,
+    "extract_uint16": _extractUint(2),
+    "extract_uint32": _extractUint(4),
+    "extract_uint64": _extractUint(8),
+    "balance": _balance,
+    "app_global_get": _appGlobalGet,
+    "app_global_get_ex": _appGlobalGetEx,
+    "app_global_put": _appGlobalPut,
+    "app_global_del": _appGlobalDel,
+    "app_params_get": _appParamsGet,
+    "acct_params_get": _acctParamsGet,
+    "bzero": _bzero,
+    "callsub": _callsub,
+    "retsub": _retsub,
+    "loads": _loads,
+    "stores": _stores,
+    "log": _log,
+    "itxn_begin": _itxnBegin,
+    "itxn_field": _itxnField,
+    "itxn_submit": _itxnSubmit,
+    "itxn": _itxn,
+    "itxna": _itxna,
+    "itxn_next": _itxnNext,
+    "txnas": _txnas,
+    "gtxnas": _gtxnas,
+    "gtxnsas": _gtxnsas,
+}
+
+
+class SimulatedAlgod:
+    """
+    The parts of AlgodClient used by this repo, backed by a Ledger
+
+    every send is applied immediately and confirmed in its own block,
+    rejected transactions raise AlgodHTTPError like algod does
+    """
+
+    GENESIS_ID = "simulator-v1"
+    GENESIS_HASH = base64.b64encode(hashlib.sha256(b"simulator-v1").digest()).decode()
+
+    def __init__(self, ledger: Optional[Ledger] = None) -> None:
+        """
+        Args:
+            ledger (Ledger): the ledger to run against, a new one by default
+        """
+        self.ledger = ledger or Ledger()
+        # keys the shared suggested params provider of src.utils.params
+        self.algod_address = f"simulator://{id(self.ledger)}"
+        self.algod_token = ""
+
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._blocks: Dict[int, List[Dict[str, Any]]] = {}
+
+    def suggested_params(self) -> transaction.SuggestedParams:
+        return transaction.SuggestedParams(
+            fee=0,
+            first=self.ledger.round,
+            last=self.ledger.round + MAX_TXN_LIFE,
+            gh=self.GENESIS_HASH,
+            gen=self.GENESIS_ID,
+            flat_fee=False,
+            min_fee=MIN_TXN_FEE,
+        )
+
+    def compile(self, source: str, **kwargs: Any) -> Dict[str, str]:
+        program = self.ledger.register(source)
+        return {
+            "hash": encoding.encode_address(hashlib.new("sha512_256", b"Program" + program).digest()),
+            "result": base64.b64encode(program).decode(),
+        }
+
+    def send_transaction(self, txn: Any, **kwargs: Any) -> str:
+        return self.send_transactions([txn])
+
+    def send_raw_transaction(self, txn: str, **kwargs: Any) -> str:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(base64.b64decode(txn))
+        return self.send_transactions([encoding.future_msgpack_decode(stxn) for stxn in unpacker])
+
+    def send_transactions(self, txns: List[Any], **kwargs: Any) -> str:
+        """applies a signed group (signatures are not checked) and confirms it in a new block"""
+        unsigned = [txn.transaction for txn in txns]
+        group = [Txn.fromTransaction(txn) for txn in unsigned]
+        next_round = self.ledger.round + 1
+        for txn in unsigned:
+            if txn.get_txid() in self._pending:
+                # algod keeps the txids of the valid window, an identical transaction can't be sent twice
+                raise AlgodHTTPError(f"TransactionPool.Remember: transaction already in ledger: {txn.get_txid()}", 400)
+            if txn.genesis_hash != self.GENESIS_HASH:
+                raise AlgodHTTPError(f"transaction {txn.get_txid()}: genesis hash mismatch", 400)
+            if not txn.first_valid_round <= next_round <= txn.last_valid_round:
+                raise AlgodHTTPError(
+                    f"transaction {txn.get_txid()}: txn dead: round {next_round} outside of range", 400
+                )
+
+        try:
+            results = self.ledger.execute(group)
+        except SimulationError as e:
+            raise AlgodHTTPError(f"TransactionPool.Remember: transaction {unsigned[0].get_txid()}: {e}", 400)
+
+        block = []
+        for signed, txn, result in zip(txns, unsigned, results):
+            stxn = signed.dictify()
+            self._pending[txn.get_txid()] = {
+                "confirmed-round": self.ledger.round,
+                "pool-error": "",
+                "txn": stxn,
+                **result,
+            }
+            block.append(stxn)
+        self._blocks[self.ledger.round] = block
+        return unsigned[0].get_txid()
+
+    def pending_transaction_info(self, transaction_id: str, **kwargs: Any) -> Dict[str, Any]:
+        if transaction_id not in self._pending:
+            raise AlgodHTTPError("txn does not exist", 404)
+        return self._pending[transaction_id]
+
+    def status(self, **kwargs: Any) -> Dict[str, Any]:
+        return {"last-round": self.ledger.round, "time-since-last-round": 0, "catchup-time": 0}
+
+    def status_after_block(self, block_num: int, **kwargs: Any) -> Dict[str, Any]:
+        """returns at once, producing empty blocks until `block_num` has passed"""
+        if block_num >= self.ledger.round:
+            self.ledger.advance(
+                self.ledger.block_time * (block_num + 1 - self.ledger.round), block_num + 1 - self.ledger.round
+            )
+        return self.status()
+
+    def block_info(self, block: int, response_format: str = "json", **kwargs: Any) -> Union[bytes, Dict[str, Any]]:
+        if block > self.ledger.round:
+            raise AlgodHTTPError("failed to retrieve information from the ledger", 404)
+        header = {
+            "rnd": block,
+            "ts": self.ledger.timestamp - self.ledger.block_time * (self.ledger.round - block),
+            "gen": self.GENESIS_ID,
+            "gh": base64.b64decode(self.GENESIS_HASH),
+        }
+        if response_format != "msgpack":
+            return {"block": {"rnd": block, "ts": header["ts"], "gen": self.GENESIS_ID, "gh": self.GENESIS_HASH}}
+        txns = []
+        for stxn in self._blocks.get(block, []):
+            txn = {key: value for key, value in stxn["txn"].items() if key not in ("gh", "gen")}
+            txns.append({**stxn, "txn": txn, "hgi": True})
+        if txns:
+            header["txns"] = txns
+        return msgpack.packb({"block": header}, use_bin_type=True)
+
+    def application_info(self, application_id: int, **kwargs: Any) -> Dict[str, Any]:
+        app = self.ledger.apps.get(application_id)
+        if app is None:
+            raise AlgodHTTPError("application does not exist", 404)
+        return {
+            "id": app.app_id,
+            "params": {
+                "creator": encoding.encode_address(app.creator),
+                "approval-program": base64.b64encode(app.approval.bytecode or b"").decode(),
+                "clear-state-program": base64.b64encode(app.clear.bytecode or b"").decode(),
+                "global-state": [_stateEntry(key, value) for key, value in app.global_state.items()],
+                "global-state-schema": {"num-uint": app.num_uint, "num-byte-slice": app.num_byte_slice},
+                "local-state-schema": {"num-uint": 0, "num-byte-slice": 0},
+            },
+        }
+
+    def account_info(self, address: str, **kwargs: Any) -> Dict[str, Any]:
+        key = encoding.decode_address(address)
+        created = [app_id for app_id, app in self.ledger.apps.items() if app.creator == key]
+        return {
+            "address": address,
+            "amount": self.ledger.balances.get(key, 0),
+            "assets": [],
+            "created-apps": [self.application_info(app_id) for app_id in created],
+        }
+
+
+def _stateEntry(key: bytes, value: Value) -> Dict[str, Any]:
+    """a global state entry the way algod's REST api encodes it"""
+    encoded_key = base64.b64encode(key).decode()
+    if isinstance(value, int):
+        return {"key": encoded_key, "value": {"type": 2, "uint": value, "bytes": ""}}
+    return {"key": encoded_key, "value": {"type": 1, "uint": 0, "bytes": base64.b64encode(value).decode()}}
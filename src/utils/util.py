@@ -1,3 +1,4 @@
+import struct
 from base64 import b64decode
 from typing import Any
 from typing import Dict
@@ -13,6 +14,10 @@ from pyteal import Expr
 from pyteal import Mode
 from pyteal.compiler.compiler import MAX_TEAL_VERSION
 
+from src.utils.assembler import assemble
+from src.utils.assembler import AssemblerError
+from src.utils.params import invalidateParams
+
 
 class PendingTxnResponse:
     def __init__(self, response: Dict[str, Any]) -> None:
@@ -33,7 +38,15 @@ class PendingTxnResponse:
         self.logs: List[bytes] = [b64decode(l) for l in response.get("logs", [])]
 
 
-def waitForTransaction(client: AlgodClient, txID: str, timeout: int = 10) -> PendingTxnResponse:
+def waitForTransaction(
+    client: AlgodClient, txID: str, timeout: int = 10, watcher: Optional[Any] = None
+) -> PendingTxnResponse:
+    # a shared src.utils.watcher.BlockWatcher confirms from blocks instead of polling this txid
+    if watcher is not None:
+        confirmed = watcher.wait(txID, timeout)
+        invalidateParams(client)
+        return confirmed
+
     lastStatus = client.status()
     lastRound = lastStatus["last-round"]
     startRound = lastRound
@@ -42,6 +55,8 @@ def waitForTransaction(client: AlgodClient, txID: str, timeout: int = 10) -> Pen
         pending_txn = client.pending_transaction_info(txID)
 
         if pending_txn.get("confirmed-round", 0) > 0:
+            # the next transaction is built with a later first valid round, see invalidateParams
+            invalidateParams(client)
             return PendingTxnResponse(pending_txn)
 
         if pending_txn["pool-error"]:
@@ -56,8 +71,11 @@ def waitForTransaction(client: AlgodClient, txID: str, timeout: int = 10) -> Pen
 
 def fullyCompileContract(client: AlgodClient, contract: Expr) -> bytes:
     teal = compileTeal(contract, mode=Mode.Application, version=MAX_TEAL_VERSION)
-    response = client.compile(teal)
-    return b64decode(response["result"])
+    try:
+        return assemble(teal)
+    except AssemblerError:
+        response = client.compile(teal)
+        return b64decode(response["result"])
 
 
 def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
@@ -88,6 +106,38 @@ def getAppGlobalState(client: AlgodClient, appID: int) -> Dict[bytes, Union[int,
     return decodeState(appInfo["params"]["global-state"])
 
 
+# a report as feeds store it in last_value and their history: 8 byte timestamp, 8 byte value
+REPORT_RECORD = struct.Struct(">QQ")
+
+
+def decodeReport(value: bytes) -> Tuple[int, int]:
+    """the timestamp and value of a feed's last_value, without copying it"""
+    return REPORT_RECORD.unpack_from(memoryview(value))
+
+
+def decodeHistoryEntry(value: bytes) -> List[Tuple[int, int]]:
+    """the reports packed in one history entry of a feed, leaving out the slots not written yet"""
+    return [record for record in REPORT_RECORD.iter_unpack(memoryview(value)) if record[0]]
+
+
+def decodeHistory(state: Dict[bytes, Union[int, bytes]], prefix: bytes = b"history_") -> List[Tuple[int, int]]:
+    """
+    Decode the history of reports a feed keeps in its global state
+
+    Args:
+        state: the feed's global state, see getAppGlobalState
+        prefix: prefix of the history entries' keys
+    Returns:
+        List[Tuple[int, int]]: timestamp and value of every record written, oldest first
+    """
+    records: List[Tuple[int, int]] = []
+    for key, value in state.items():
+        if key.startswith(prefix) and len(key) == len(prefix) + 1:
+            records += decodeHistoryEntry(value)
+
+    return sorted(records)
+
+
 def getBalances(client: AlgodClient, account: str) -> Dict[int, int]:
     balances: Dict[int, int] = dict()
 
@@ -0,0 +1,169 @@
+"""
+Round-driven transaction confirmation
+
+a BlockWatcher follows new rounds with a single stream of algod calls
+(one status_after_block per batch of rounds and one block per round)
+and confirms every registered transaction found in each block,
+so any number of in-flight transactions share one polling loop
+"""
+import base64
+import threading
+from concurrent.futures import Future
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import msgpack
+from algosdk import constants
+from algosdk import encoding
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.util import PendingTxnResponse
+
+
+class _Waiter:
+    """a registered transaction and the future resolved when it is confirmed"""
+
+    def __init__(self, txid: str, last_round: int) -> None:
+        self.txid = txid
+        self.last_round = last_round
+        self.future: Future = Future()
+
+
+def blockTxIDs(block: bytes) -> List[str]:
+    """
+    Compute the ids of the transactions in a msgpack encoded block
+
+    transactions are stored in blocks without their genesis id/hash,
+    so those are restored from the block header before hashing
+    """
+    decoded = msgpack.unpackb(block, raw=False, strict_map_key=False, unicode_errors="surrogateescape")
+    header = decoded["block"]
+
+    txids = []
+    for stxn in header.get("txns", []):
+        txn = dict(stxn["txn"])
+        txn["gh"] = header["gh"]
+        if stxn.get("hgi"):
+            txn["gen"] = header["gen"]
+        to_sign = constants.txid_prefix + msgpack.packb(dict(sorted(txn.items())), use_bin_type=True)
+        txid = base64.b32encode(encoding.checksum(to_sign)).decode()
+        txids.append(encoding._undo_padding(txid))
+
+    return txids
+
+
+class BlockWatcher:
+    """
+    Confirms transactions by following blocks instead of polling each txid
+
+    the watcher runs on a background thread only while it has waiters
+    """
+
+    def __init__(self, client: AlgodClient) -> None:
+        """
+        Args:
+            client (AlgodClient): the algorand node to follow
+        """
+        self.client = client
+
+        self._waiters: Dict[str, _Waiter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._next_round: Optional[int] = None
+        self._last_round: Optional[int] = None
+
+    def watch(
+        self, txid: str, timeout: int = 10, callback: Optional[Callable[[Future], None]] = None
+    ) -> "Future[PendingTxnResponse]":
+        """
+        Register a transaction to be confirmed
+
+        Args:
+            txid (str): id of a transaction that was sent to the network
+            timeout (int): rounds to wait for the transaction before failing
+            callback (callable): called with the future once it resolves
+        Returns:
+            Future: resolves to the PendingTxnResponse of the confirmed transaction,
+                or fails if it wasn't confirmed after `timeout` rounds
+        """
+        with self._lock:
+            if self._thread is None:
+                self._last_round = self.client.status()["last-round"]
+                # the current round is scanned too, in case the transaction was just confirmed
+                self._next_round = self._last_round
+
+            waiter = _Waiter(txid, self._last_round + timeout)
+            if callback is not None:
+                waiter.future.add_done_callback(callback)
+            self._waiters[txid] = waiter
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        return waiter.future
+
+    def wait(self, txid: str, timeout: int = 10) -> PendingTxnResponse:
+        """Register a transaction and block until it is confirmed"""
+        return self.watch(txid, timeout).result()
+
+    def _run(self) -> None:
+        """follows rounds until there is nothing left to wait for"""
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._thread = None
+                    return
+
+            try:
+                # returns once round `_next_round` exists (immediately if it already does)
+                self._last_round = self.client.status_after_block(self._next_round - 1)["last-round"]
+                while self._next_round <= self._last_round:
+                    block = self.client.block_info(self._next_round, response_format="msgpack")
+                    self._confirm(blockTxIDs(block))
+                    self._expire(self._next_round)
+                    self._next_round += 1
+            except Exception as e:
+                with self._lock:
+                    waiters = list(self._waiters.values())
+                    self._waiters.clear()
+                for waiter in waiters:
+                    waiter.future.set_exception(e)
+
+    def _confirm(self, txids: List[str]) -> None:
+        """resolves the waiters of the transactions in a block"""
+        with self._lock:
+            confirmed = [self._waiters.pop(txid) for txid in txids if txid in self._waiters]
+
+        for waiter in confirmed:
+            self._resolve(waiter)
+
+    def _expire(self, round: int) -> None:
+        """fails the waiters whose last round has been scanned"""
+        with self._lock:
+            expired = [waiter for waiter in self._waiters.values() if waiter.last_round <= round]
+            for waiter in expired:
+                del self._waiters[waiter.txid]
+
+        for waiter in expired:
+            # a final lookup reports pool errors and confirmations from before the watch started
+            self._resolve(waiter)
+
+    def _resolve(self, waiter: _Waiter) -> None:
+        """sets the result of a waiter that left the registry from its pending transaction info"""
+        try:
+            pending_txn = self.client.pending_transaction_info(waiter.txid)
+        except Exception as e:
+            waiter.future.set_exception(e)
+            return
+
+        if pending_txn.get("confirmed-round", 0) > 0:
+            waiter.future.set_result(PendingTxnResponse(pending_txn))
+        elif pending_txn["pool-error"]:
+            waiter.future.set_exception(Exception("Pool error: {}".format(pending_txn["pool-error"])))
+        else:
+            waiter.future.set_exception(
+                Exception("Transaction {} not confirmed by round {}".format(waiter.txid, waiter.last_round))
+            )
@@ -39,13 +39,13 @@ def client():
     return client
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def accounts(client):
     """provides easy account access for testing"""
     return Accounts(client)
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def scripts(client, accounts):
     """Scripts object for testing"""
 
@@ -58,7 +58,7 @@ def scripts(client, accounts):
     )
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
 def deployed_contract(accounts, client, scripts: Scripts):
     """deploys feeds and medianizer contracts, provides app ids for all contracts"""
 
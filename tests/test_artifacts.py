@@ -0,0 +1,64 @@
+"""Tests for the on-disk compiled TEAL cache"""
+from base64 import b64encode
+
+from src.contracts.contracts import approval_program
+from src.contracts.contracts import clear_state_program
+from src.utils import artifacts
+from src.utils.artifacts import artifactKey
+from src.utils.artifacts import compileCached
+from src.utils.assembler import AssemblerError
+
+
+class CompilingAlgod:
+    """algod stand-in that counts compile calls"""
+
+    def __init__(self) -> None:
+        self.compiled = []
+
+    def compile(self, teal: str):
+        self.compiled.append(teal)
+        return {"result": b64encode(f"program {len(self.compiled)}".encode()).decode()}
+
+
+def test_cache_skips_compile(tmp_path, monkeypatch):
+    """a program is assembled once and then read from disk"""
+    monkeypatch.setenv("TEAL_CACHE_DIR", str(tmp_path))
+    client = CompilingAlgod()
+
+    first = compileCached(client, approval_program)
+    monkeypatch.setattr("src.utils.artifacts.assemble", lambda teal: b"not cached")
+    second = compileCached(client, approval_program)
+
+    assert first == second
+    assert client.compiled == []
+    assert (tmp_path / f"{artifactKey(approval_program)}.bin").read_bytes() == first
+
+
+def test_unsupported_teal_compiled_by_algod(tmp_path, monkeypatch):
+    """programs the local assembler can't handle are compiled by algod"""
+    monkeypatch.setenv("TEAL_CACHE_DIR", str(tmp_path))
+    client = CompilingAlgod()
+
+    def unsupported(teal):
+        raise AssemblerError("unsupported")
+
+    monkeypatch.setattr("src.utils.artifacts.assemble", unsupported)
+
+    assert compileCached(client, clear_state_program) == b"program 1"
+    assert len(client.compiled) == 1
+
+
+def test_cache_keys():
+    """programs, versions and build arguments get their own artifacts"""
+    assert artifactKey(approval_program) == artifactKey(approval_program)
+    assert artifactKey(approval_program) != artifactKey(clear_state_program)
+    assert artifactKey(approval_program, 5) != artifactKey(approval_program, 6)
+
+
+def test_cache_key_follows_assembler(tmp_path, monkeypatch):
+    """a change to the local assembler invalidates the bytecode it assembled"""
+    key = artifactKey(approval_program)
+    changed = tmp_path / "assembler.py"
+    changed.write_bytes(artifacts.ASSEMBLER_PATH.read_bytes() + b"\n# changed\n")
+    monkeypatch.setattr(artifacts, "ASSEMBLER_PATH", changed)
+    assert artifactKey(approval_program) != key
@@ -0,0 +1,62 @@
+"""Tests for the offline TEAL assembler"""
+from base64 import b64decode
+
+import pytest
+from algosdk.v2client.algod import AlgodClient
+from pyteal import compileTeal
+from pyteal import Mode
+
+from src.contracts import contracts
+from src.contracts import medianizer_contract
+from src.utils.assembler import assemble
+from src.utils.assembler import AssemblerError
+
+
+def test_approve_program():
+    """`int 1; return` assembles to the well known 4 byte approval program"""
+    assert assemble("#pragma version 6\nint 1\nreturn") == b64decode("BoEBQw==")
+
+
+def test_constant_blocks():
+    """repeated constants go into blocks by frequency, single use constants are pushed"""
+    teal = """#pragma version 6
+    int 7
+    int 5
+    int 5
+    int NoOp
+    int 7
+    int 5
+    byte "a" // comment
+    byte 0x61
+    byte "b"
+    pop
+    """
+    expected = bytes(
+        [6, 0x20, 2, 5, 7, 0x26, 1, 1, ord("a"), 0x23, 0x22, 0x22, 0x81, 0, 0x23, 0x22, 0x28, 0x28]
+    ) + bytes([0x80, 1, ord("b"), 0x48])
+    assert assemble(teal) == expected
+
+
+def test_branch_offsets():
+    """branches are encoded relative to the end of the branch instruction"""
+    teal = "#pragma version 6\nb end\nloop:\nerr\nbnz loop\nend:\nint 1\nreturn"
+    assert assemble(teal) == bytes([6, 0x42, 0, 4, 0x00, 0x40, 0xFF, 0xFC, 0x81, 1, 0x43])
+
+
+def test_feed_contract_layout():
+    """the create() timestamp_freshness assert sits at the pc algod reports (see scripts/deploy.py)"""
+    program = assemble(compileTeal(contracts.approval_program(), mode=Mode.Application, version=6))
+    assert program[762:764] == bytes([0x0F, 0x44])  # >= then assert at pc 763
+
+
+def test_unsupported_opcode():
+    with pytest.raises(AssemblerError):
+        assemble("#pragma version 6\nec_add BN254g1")
+
+
+@pytest.mark.parametrize("module", [contracts, medianizer_contract])
+def test_matches_algod(client: AlgodClient, module):
+    """contracts assemble to the same bytes as algod's compile endpoint (needs the sandbox)"""
+    for build in (module.approval_program, module.clear_state_program):
+        teal = compileTeal(build(), mode=Mode.Application, version=6)
+        assert assemble(teal) == b64decode(client.compile(teal)["result"])
@@ -0,0 +1,154 @@
+"""Tests for fetching and aggregating prices in Asset"""
+import time
+
+import numpy as np
+import pytest
+
+from src.assets.aggregation import aggregate
+from src.assets.aggregation import aggregate_matrix
+from src.assets.asset import Asset
+from src.assets.fixed_point import encode_value
+from src.assets.fixed_point import parse_fixed
+
+
+class StubAsset(Asset):
+    """Asset whose sources answer after a configured delay instead of over http"""
+
+    def fetch_price_from_sources(self, source):
+        time.sleep(source["delay"])
+        if source.get("down"):
+            raise ConnectionError("source is down")
+        return source["price"]
+
+
+def test_sources_fetched_in_parallel():
+    """fetch time is bounded by the slowest source, not the sum of all sources"""
+    sources = {name: {"price": price, "delay": 0.3} for name, price in zip("abcd", [1, 2, 3, 4])}
+    asset = StubAsset(query_id="BTCUSD", sources=sources)
+
+    start = time.monotonic()
+    prices = asset.fetch_prices()
+
+    assert time.monotonic() - start < 0.9
+    assert sorted(prices) == [1, 2, 3, 4]
+
+
+def test_late_and_failed_sources_dropped():
+    """median is taken over the sources that answered in time"""
+    sources = {
+        "fast": {"price": 100, "delay": 0.0},
+        "also_fast": {"price": 300, "delay": 0.0},
+        "ok": {"price": 200, "delay": 0.1},
+        "slow": {"price": 1, "delay": 2, "timeout": 0.2},
+        "down": {"price": 1, "delay": 0.0, "down": True},
+    }
+    asset = StubAsset(query_id="BTCUSD", sources=sources, fetch_timeout=1)
+
+    start = time.monotonic()
+    assert asset.medianize() == 200
+    assert time.monotonic() - start < 1.5
+
+
+def test_no_source_in_time():
+    """medianize errors when no source answers before its deadline"""
+    sources = {"slow": {"price": 1, "delay": 0.5}}
+    asset = StubAsset(query_id="BTCUSD", sources=sources, fetch_timeout=0.1)
+
+    with pytest.raises(ValueError):
+        asset.medianize()
+
+
+def test_even_count_median():
+    """an even number of sources takes the mean of the two middle prices"""
+    sources = {name: {"price": price, "delay": 0.0} for name, price in zip("abcd", [100, 200, 300, 1000])}
+    assert StubAsset(query_id="BTCUSD", sources=sources).medianize() == 250
+
+
+def test_aggregation_methods():
+    prices = [100, 101, 102, 103, 5000]
+
+    assert aggregate(prices, method="median") == 102
+    assert aggregate(prices, method="trimmed_mean", trim=0.2) == 102
+    assert aggregate(prices, method="mad") == 101
+    assert aggregate(prices, [1, 1, 1, 1, 10], method="weighted_median") == 5000
+    assert aggregate([100, 200], [3, 1], method="weighted_mean") == 125
+    with pytest.raises(ValueError):
+        aggregate(prices, method="mean")
+
+
+def test_aggregate_matrix():
+    """every pair is aggregated over its own sources, missing prices are nan"""
+    nan = np.nan
+    prices = np.array([[100, 101, nan, 99], [2000, nan, nan, 9000], [nan, nan, nan, nan]])
+
+    medians = aggregate_matrix(prices)
+    assert medians[:2].tolist() == [100, 5500]
+    assert np.isnan(medians[2])
+    assert aggregate_matrix(prices, [1, 1, 1, 5], method="weighted_median")[:2].tolist() == [99, 9000]
+    assert aggregate_matrix(prices, method="mad")[:2].tolist() == [100, 5500]
+
+
+def test_aggregate_agrees_with_matrix():
+    """the exact per-pair methods match the batched ones where float64 is exact"""
+    rng = np.random.default_rng(0)
+    for count in range(1, 8):
+        for _ in range(20):
+            prices = rng.integers(1, 10**6, count).tolist()
+            weights = rng.integers(1, 5, count).tolist()
+            for method in ("median", "trimmed_mean", "mad", "weighted_median", "weighted_mean"):
+                expected = int(aggregate_matrix(np.array([prices]), weights, method)[0])
+                assert aggregate(prices, weights, method) == expected, (method, prices, weights)
+
+
+def test_weighted_sources():
+    sources = {
+        "big": {"price": 300, "delay": 0.0, "weight": 5},
+        "a": {"price": 100, "delay": 0.0},
+        "b": {"price": 200, "delay": 0.0},
+    }
+    asset = StubAsset(query_id="BTCUSD", sources=sources, aggregation={"method": "weighted_median"})
+    assert asset.medianize() == 300
+
+
+def test_parse_fixed():
+    """prices are scaled from their text, truncated the same way for every source"""
+    assert parse_fixed("30100.123456789", 6) == 30100123456
+    assert parse_fixed("0.29", 6) == 290000
+    assert parse_fixed(0.29, 6) == 290000
+    assert parse_fixed(1.1, 18) == 1_100_000_000_000_000_000
+    assert parse_fixed(42, 2) == 4200
+    assert parse_fixed("1.5e-05", 8) == 1500
+    assert parse_fixed("-1.25", 1) == -12
+    with pytest.raises(ValueError):
+        parse_fixed("n/a")
+
+    assert encode_value(290000) == (290000).to_bytes(8, "big")
+    with pytest.raises(ValueError):
+        encode_value(2**64)
+
+
+class TextAsset(Asset):
+    """Asset whose sources answer the price text in their config, parsed as fetch does"""
+
+    def fetch_price_from_sources(self, source):
+        return parse_fixed(source["text"], self.decimals)
+
+
+@pytest.mark.parametrize("method", ["median", "trimmed_mean", "mad", "weighted_median", "weighted_mean"])
+def test_high_precision_prices_stay_exact(method):
+    """prices with 12 or 18 decimals are past float64 precision and aggregated as integers"""
+    sources = {"a": {"text": "0.123456789012345679"}}
+    asset = TextAsset(query_id="ETHBTC", sources=sources, decimals=18, aggregation={"method": method})
+    asset.update_price()
+    assert asset.price == 123_456_789_012_345_679
+    assert asset.encoded_price == (123_456_789_012_345_679).to_bytes(8, "big")
+
+    texts = ["1234567.000000000012", "1234567.000000000013", "1234567.000000000014"]
+    sources = {name: {"text": text} for name, text in zip("abc", texts)}
+    asset = TextAsset(query_id="BTCUSD", sources=sources, decimals=12, aggregation={"method": method})
+    assert asset.medianize() == 1_234_567_000_000_000_013
+
+    # ...013.5, the mean of the two middle prices and the mean of all four, is rounded down
+    sources["d"] = {"text": "1234567.000000000015"}
+    asset = TextAsset(query_id="BTCUSD", sources=sources, decimals=12, aggregation={"method": method})
+    assert asset.medianize() == 1_234_567_000_000_000_013
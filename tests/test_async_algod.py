@@ -0,0 +1,112 @@
+"""Tests for the httpx algod client, against a stand-in for algod's REST api"""
+import asyncio
+import base64
+import json
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client.algod import AlgodClient
+
+from src.utils.async_algod import AsyncAlgodClient
+from src.utils.async_algod import getAsyncClient
+from src.utils.async_algod import waitForTransactionAsync
+
+httpx = pytest.importorskip("httpx")
+
+GENESIS_HASH = base64.b64encode(bytes(32)).decode()
+
+
+class FakeAlgod:
+    """answers the algod routes the scripts use, transactions are confirmed in the round after they're sent"""
+
+    def __init__(self) -> None:
+        self.round = 100
+        self.sent = {}
+        self.requests = []
+
+    def handle(self, request):
+        path = request.url.path
+        self.requests.append((request.method, path))
+        assert request.headers["X-Algo-API-Token"] == "token"
+
+        if path == "/v2/transactions/params":
+            return self.json(
+                {
+                    "fee": 0,
+                    "last-round": self.round,
+                    "genesis-hash": GENESIS_HASH,
+                    "genesis-id": "fake-v1",
+                    "consensus-version": "future",
+                    "min-fee": 1000,
+                }
+            )
+        if path == "/v2/transactions" and request.method == "POST":
+            assert request.headers["Content-Type"] == "application/x-binary"
+            txid = f"TX{len(self.sent)}"
+            self.sent[txid] = (request.content, self.round + 1)
+            return self.json({"txId": txid})
+        if path.startswith("/v2/transactions/pending/"):
+            _, confirmed = self.sent[path.rsplit("/", 1)[1]]
+            return self.json({"pool-error": "", "confirmed-round": confirmed if self.round >= confirmed else 0})
+        if path == "/v2/status":
+            return self.json({"last-round": self.round})
+        if path.startswith("/v2/status/wait-for-block-after/"):
+            self.round = int(path.rsplit("/", 1)[1]) + 1
+            return self.json({"last-round": self.round})
+        if path == "/v2/applications/7":
+            return self.json({"id": 7, "params": {"global-state": []}})
+        return httpx.Response(404, json={"message": f"{path} not found"})
+
+    @staticmethod
+    def json(body):
+        return httpx.Response(200, content=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+
+
+def async_client(algod: FakeAlgod) -> AsyncAlgodClient:
+    return AsyncAlgodClient("token", "http://algod.test/", transport=httpx.MockTransport(algod.handle))
+
+
+def test_requests():
+    algod = FakeAlgod()
+
+    async def calls():
+        client = async_client(algod)
+        params = await client.params.refresh()
+        txid = await client.send_raw_transaction(base64.b64encode(b"signed").decode())
+        app = await client.application_info(7)
+        with pytest.raises(AlgodHTTPError, match="not found") as error:
+            await client.account_info("MISSING")
+        await client.close()
+        return params, txid, app, error.value.code
+
+    params, txid, app, code = asyncio.run(calls())
+    assert (params.first, params.last, params.gen, params.min_fee) == (100, 1100, "fake-v1", 1000)
+    assert txid == "TX0" and algod.sent["TX0"] == (b"signed", 101)
+    assert app["id"] == 7
+    assert code == 404
+
+
+def test_confirmations_share_round_waits():
+    algod = FakeAlgod()
+
+    async def confirm():
+        client = async_client(algod)
+        txids = [await client.send_raw_transaction(base64.b64encode(b"signed").decode()) for _ in range(5)]
+        first = (await client.params.refresh()).first
+        confirmed = await asyncio.gather(*(waitForTransactionAsync(client, txid) for txid in txids))
+        # params are refetched once a transaction confirmed, the next one gets a later first valid round
+        assert (await client.params.refresh()).first > first
+        await client.close()
+        return confirmed
+
+    confirmed = asyncio.run(confirm())
+    assert [info["confirmed-round"] for info in confirmed] == [101] * 5
+    # the five coroutines waited on round 100 with one request
+    assert algod.requests.count(("GET", "/v2/status/wait-for-block-after/100")) == 1
+
+
+def test_get_async_client():
+    client = getAsyncClient(AlgodClient("token", "http://algod.test"))
+    assert isinstance(client, AsyncAlgodClient)
+    assert client.headers["X-Algo-API-Token"] == "token"
+    asyncio.run(client.close())
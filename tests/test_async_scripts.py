@@ -0,0 +1,63 @@
+"""Tests for the asyncio scripts, against the AVM simulator"""
+import asyncio
+
+from algosdk import account
+from algosdk.future.transaction import Multisig
+
+from src.contracts import contracts
+from src.contracts import medianizer_contract
+from src.scripts.async_scripts import AsyncScripts
+from src.utils.account import Account
+from src.utils.async_algod import ThreadedAlgodClient
+from src.utils.testing.simulator import Ledger
+from src.utils.testing.simulator import SimulatedAlgod
+from src.utils.util import getAppGlobalState
+
+QUERY_ID = "BTCUSD"
+FEED_COUNT = 3
+
+
+def test_deploy_stake_and_report_concurrently():
+    client = SimulatedAlgod(Ledger())
+    for program in (
+        contracts.approval_program(FEED_COUNT),
+        contracts.clear_state_program(),
+        medianizer_contract.approval_program("network", FEED_COUNT),
+        medianizer_contract.clear_state_program(),
+    ):
+        client.ledger.registerContract(program)
+
+    signers = [Account(account.generate_account()[0]) for _ in range(2)]
+    signers_sk = [signer.getPrivateKey() for signer in signers]
+    governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in signers])
+    reporters = [Account(account.generate_account()[0]) for _ in range(FEED_COUNT)]
+    for address in [governance.address()] + [reporter.addr for reporter in reporters]:
+        client.ledger.fund(address, 10**12)
+
+    # the simulator isn't thread safe, its calls run one at a time
+    algod = ThreadedAlgodClient(client, max_workers=1)
+
+    async def scenario():
+        deployer = AsyncScripts(
+            client, None, None, governance.address(), contract_count=FEED_COUNT, median_strategy="network", algod=algod
+        )
+        feeds, medianizer_id = await deployer.deploy_batched(QUERY_ID, "query data", 3600, signers_sk)
+
+        feed_scripts = []
+        for feed_id, reporter in zip(feeds, reporters):
+            scripts = AsyncScripts(client, None, reporter, governance.address(), feed_id, medianizer_id, algod=algod)
+            scripts.feeds = feeds
+            feed_scripts.append(scripts)
+
+        await asyncio.gather(*(scripts.stake() for scripts in feed_scripts))
+        timestamp = client.ledger.timestamp - 10
+        confirmed = await asyncio.gather(
+            *(scripts.report(QUERY_ID.encode(), value, timestamp) for scripts, value in zip(feed_scripts, [3, 1, 2]))
+        )
+        return feeds, medianizer_id, confirmed
+
+    feeds, medianizer_id, confirmed = asyncio.run(scenario())
+
+    assert all(info["confirmed-round"] > 0 for info in confirmed)
+    assert [getAppGlobalState(client, feed_id)[b"staking_status"] for feed_id in feeds] == [1] * FEED_COUNT
+    assert getAppGlobalState(client, medianizer_id)[b"median"] == 2
@@ -0,0 +1,23 @@
+"""Tests for the report hot path benchmark"""
+from src.benchmarks.report_path import benchmark
+from src.benchmarks.report_path import compare
+from src.benchmarks.report_path import STAGES
+
+
+def test_benchmark_times_every_stage():
+    result = benchmark(iterations=3)
+
+    assert result["iterations"] == 3
+    assert set(result["stages"]) == set(STAGES) | {"total"}
+    for stats in result["stages"].values():
+        assert 0 <= stats["min_ms"] <= stats["median_ms"] <= stats["max_ms"]
+
+
+def test_compare():
+    baseline = {"stages": {"fetch": {"median_ms": 2.0}}}
+    result = {"stages": {"fetch": {"median_ms": 1.0}, "sign": {"median_ms": 0.5}}}
+
+    table = compare(result, baseline).splitlines()
+
+    assert table[1].split() == ["fetch", "2.000", "1.000", "-50.0%"]
+    assert table[2].split() == ["sign", "-", "0.500", "-"]
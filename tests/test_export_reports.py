@@ -0,0 +1,139 @@
+"""Tests for the report history exporter, against a paginating stand-in for the indexer"""
+import base64
+import csv
+
+import pytest
+
+from src.scripts.export_reports import Checkpoint
+from src.scripts.export_reports import decode_report
+from src.scripts.export_reports import export_csv
+from src.scripts.export_reports import export_parquet
+from src.scripts.export_reports import iter_reports
+
+
+def report_txn(app_id: int, round: int, value: int, method: bytes = b"report", value_size: int = 8):
+    args = [method, b"BTCUSD", value.to_bytes(value_size, "big"), (1_700_000_000 + round).to_bytes(8, "big")]
+    return {
+        "id": f"TX{app_id}-{round}",
+        "sender": "REPORTER",
+        "confirmed-round": round,
+        "round-time": 1_700_000_000 + round,
+        "application-transaction": {
+            "application-id": app_id,
+            "application-args": [base64.b64encode(arg).decode() for arg in args],
+        },
+    }
+
+
+class PagedIndexer:
+    """serves the app calls of every feed a few per page, like the indexer's search with next tokens"""
+
+    def __init__(self, txns, page_size: int = 3, fail_at: int = None) -> None:
+        self.txns = txns
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def search_transactions(self, application_id, next_page=None, min_round=None, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise ConnectionError("indexer went away")
+        app_txns = [
+            txn
+            for txn in self.txns
+            if txn["application-transaction"]["application-id"] == application_id
+            and txn["confirmed-round"] >= (min_round or 0)
+        ]
+        start = int(next_page or 0)
+        page = app_txns[start:][: self.page_size]
+        return {"transactions": page, "next-token": str(start + self.page_size)}
+
+
+TXNS = [report_txn(app_id, round, round * 10) for app_id in (1, 2) for round in range(1, 8)] + [
+    report_txn(1, 9, 5, method=b"tip")
+]
+
+
+def test_decode_report():
+    assert decode_report(report_txn(1, 3, 42)) == {
+        "app_id": 1,
+        "round": 3,
+        "round_time": 1_700_000_003,
+        "txid": "TX1-3",
+        "sender": "REPORTER",
+        "query_id": "BTCUSD",
+        "value": 42,
+        "timestamp": 1_700_000_003,
+    }
+    assert decode_report(report_txn(1, 3, 42, method=b"stake")) is None
+    assert decode_report({"id": "PAY", "payment-transaction": {}}) is None
+
+
+def test_iter_reports_follows_pages():
+    reports = list(iter_reports(PagedIndexer(TXNS), [1, 2]))
+    assert [(report["app_id"], report["round"]) for report in reports] == [
+        (app_id, round) for app_id in (1, 2) for round in range(1, 8)
+    ]
+
+
+def test_csv_export_resumes(tmp_path):
+    output = str(tmp_path / "reports.csv")
+    checkpoint_path = str(tmp_path / "reports.checkpoint.json")
+
+    # the indexer fails on the 4th page, after 3 pages of feed 1 were written
+    with pytest.raises(ConnectionError):
+        export_csv(PagedIndexer(TXNS, fail_at=4), [1, 2], output, Checkpoint(checkpoint_path))
+    assert Checkpoint(checkpoint_path).rows == 7
+    # a page written after the checkpoint was last saved is written again, not twice
+    with open(output, "a") as f:
+        f.write("1,8,partial\n")
+
+    assert export_csv(PagedIndexer(TXNS), [1, 2], output, Checkpoint(checkpoint_path)) == 7
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert [(int(row["app_id"]), int(row["round"]), int(row["value"])) for row in rows] == [
+        (app_id, round, round * 10) for app_id in (1, 2) for round in range(1, 8)
+    ]
+
+    # everything is exported, running again adds nothing
+    assert export_csv(PagedIndexer(TXNS), [1, 2], output, Checkpoint(checkpoint_path)) == 0
+
+
+def test_csv_export_picks_up_new_reports(tmp_path):
+    output = str(tmp_path / "reports.csv")
+    checkpoint_path = str(tmp_path / "reports.checkpoint.json")
+    assert export_csv(PagedIndexer(TXNS), [1, 2], output, Checkpoint(checkpoint_path)) == 14
+    assert Checkpoint(checkpoint_path).last_round(1) == 9
+
+    # a later run exports only the reports made since, to the feeds that have any
+    txns = TXNS + [report_txn(2, round, round * 10) for round in range(8, 12)]
+    assert export_csv(PagedIndexer(txns), [1, 2], output, Checkpoint(checkpoint_path)) == 4
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["round"]) for row in rows if row["app_id"] == "2"] == list(range(1, 12))
+    assert Checkpoint(checkpoint_path).last_round(2) == 11
+
+
+def test_csv_export_keeps_unknown_files(tmp_path):
+    output = tmp_path / "reports.csv"
+    output.write_text("not an export\n")
+    with pytest.raises(ValueError, match="checkpoint"):
+        export_csv(PagedIndexer(TXNS), [1], str(output), Checkpoint(str(tmp_path / "checkpoint.json")))
+
+
+def test_parquet_export(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    txns = TXNS + [report_txn(2, 8, 2**64 - 1), report_txn(2, 9, 1, value_size=4)]
+    directory = tmp_path / "reports"
+    assert export_parquet(PagedIndexer(txns), [1, 2], str(directory), Checkpoint()) == 16
+
+    table = pyarrow.parquet.read_table(str(directory))
+    assert table.schema.field("value").type == pyarrow.uint64()
+    rows = sorted(table.to_pylist(), key=lambda row: (row["app_id"], row["round"]))
+    assert [(row["round"], row["value"], row["value_hex"]) for row in rows[-3:]] == [
+        (7, 70, None),
+        (8, 2**64 - 1, None),
+        (9, None, "00000001"),
+    ]
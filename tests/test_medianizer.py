@@ -0,0 +1,127 @@
+"""Exhaustive tests of the medianizer's median subroutines on the AVM simulator"""
+import base64
+import itertools
+import random
+import statistics
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+from pyteal import Approve
+from pyteal import Btoi
+from pyteal import compileTeal
+from pyteal import If
+from pyteal import Int
+from pyteal import Itob
+from pyteal import Log
+from pyteal import Mode
+from pyteal import Seq
+from pyteal import Txn as TxnExpr
+from pyteal.compiler.compiler import MAX_TEAL_VERSION
+
+from src.contracts.medianizer_contract import approval_program
+from src.contracts.medianizer_contract import FEED_COUNT
+from src.contracts.medianizer_contract import MAX_FEED_COUNT
+from src.contracts.medianizer_contract import MEDIAN_STRATEGIES
+from src.contracts.medianizer_contract import median_subroutine
+from src.contracts.medianizer_contract import sorting_network
+from src.utils.account import Account
+from src.utils.testing.simulator import Ledger
+from src.utils.testing.simulator import SimulationError
+from src.utils.testing.simulator import Txn
+
+# 0 (no fresh value) and 5 distinct values: every ordering of 5 feeds, ties included
+VALUES = range(6)
+
+
+class MedianRunner:
+    """runs a median subroutine on feed_count values in an app call"""
+
+    def __init__(self, strategy: str, feed_count: int = FEED_COUNT) -> None:
+        median = median_subroutine(strategy, feed_count)
+        args = [Btoi(TxnExpr.application_args[i]) for i in range(feed_count)]
+        program = If(TxnExpr.application_id() == Int(0)).Then(Approve()).Else(Seq(Log(Itob(median(*args))), Approve()))
+        teal = compileTeal(program, mode=Mode.Application, version=MAX_TEAL_VERSION)
+
+        self.ledger = Ledger()
+        bytecode = self.ledger.register(teal)
+        self.sender = encoding.decode_address(Account(account.generate_account()[0]).addr)
+        self.ledger.balances[self.sender] = 10**12
+        [created] = self.ledger.execute(
+            [Txn(Sender=self.sender, Fee=1000, TypeEnum=6, ApprovalProgram=bytecode, ClearStateProgram=bytecode)]
+        )
+        self.app_id = created["application-index"]
+
+    def __call__(self, values) -> int:
+        """the median, None if the program rejects"""
+        txn = Txn(
+            Sender=self.sender,
+            Fee=1000,
+            TypeEnum=6,
+            ApplicationID=self.app_id,
+            ApplicationArgs=[value.to_bytes(8, "big") for value in values],
+        )
+        try:
+            [result] = self.ledger.execute([txn])
+        except SimulationError:
+            return None
+        return int.from_bytes(base64.b64decode(result["logs"][0]), "big")
+
+
+@pytest.fixture(scope="module")
+def runners():
+    return {strategy: MedianRunner(strategy) for strategy in MEDIAN_STRATEGIES}
+
+
+def expected_median(values):
+    fresh = [value for value in values if value > 0]
+    return int(statistics.median(fresh)) if fresh else None
+
+
+def test_network_median_is_exact(runners):
+    for values in itertools.product(VALUES, repeat=5):
+        assert runners["network"](values) == expected_median(values), values
+
+
+def test_network_agrees_with_legacy(runners):
+    """
+    on every input the legacy sort handles, i.e. without ties between fresh values:
+    its "find max and swap" passes skip a max that is tied
+    """
+    for values in itertools.product(VALUES, repeat=5):
+        fresh = [value for value in values if value > 0]
+        if len(set(fresh)) == len(fresh):
+            assert runners["network"](values) == runners["legacy"](values), values
+
+
+@pytest.mark.parametrize("n", range(1, 9))
+def test_sorting_network_sorts(n):
+    """a comparator network sorts every input if it sorts every input of 0s and 1s"""
+    for values in itertools.product((0, 1), repeat=n):
+        values = list(values)
+        for i, j in sorting_network(n):
+            if values[i] > values[j]:
+                values[i], values[j] = values[j], values[i]
+        assert values == sorted(values)
+
+
+@pytest.mark.parametrize("feed_count", range(1, MAX_FEED_COUNT + 1))
+def test_network_median_of_any_feed_count(feed_count):
+    runner = MedianRunner("network", feed_count)
+    rng = random.Random(feed_count)
+    for _ in range(300):
+        values = [rng.choice((0, rng.randint(1, 10))) for _ in range(feed_count)]
+        assert runner(values) == expected_median(values), values
+
+
+def test_large_values(runners):
+    """values beyond 2**63 take the same path, the average of two overflows in both"""
+    high = 2**64 - 1
+    for strategy, runner in runners.items():
+        assert runner([high, 0, high - 2, 0, 0]) is None, strategy
+        assert runner([high, 1, high - 2, 0, 0]) == high - 2, strategy
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="unknown median_strategy"):
+        approval_program("bubble")
@@ -0,0 +1,71 @@
+"""Tests for the cached suggested params provider"""
+import time
+
+from algosdk.future.transaction import SuggestedParams
+
+from src.benchmarks.report_path import deploy_simulated
+from src.utils.params import getParamsProvider
+from src.utils.params import SuggestedParamsProvider
+
+
+class CountingAlgod:
+    """algod stand-in that counts suggested_params calls"""
+
+    algod_address = "http://localhost:4001"
+    algod_token = "a" * 64
+
+    def __init__(self, valid_rounds: int = 1000) -> None:
+        self.valid_rounds = valid_rounds
+        self.calls = 0
+
+    def suggested_params(self):
+        self.calls += 1
+        first = 100 + self.calls
+        return SuggestedParams(fee=1000, first=first, last=first + self.valid_rounds, gh="", flat_fee=True)
+
+
+def test_params_reused():
+    """params are fetched once and copies are handed out"""
+    client = CountingAlgod()
+    provider = SuggestedParamsProvider(client)
+
+    params = [provider.get() for _ in range(10)]
+    params[0].fee = 5000
+
+    assert client.calls == 1
+    assert provider.get().fee == 1000
+
+
+def test_params_refreshed():
+    """params are refetched when old, close to their last valid round, or invalidated"""
+    client = CountingAlgod()
+    provider = SuggestedParamsProvider(client, max_age=0.05)
+    provider.get()
+    time.sleep(0.1)
+    provider.get()
+    assert client.calls == 2
+
+    provider.invalidate()
+    provider.get()
+    assert client.calls == 3
+
+    short_lived = CountingAlgod(valid_rounds=5)
+    provider = SuggestedParamsProvider(short_lived)
+    provider.get()
+    provider.get()
+    assert short_lived.calls == 2
+
+
+def test_provider_shared_per_node():
+    """clients pointed at the same node share one provider"""
+    assert getParamsProvider(CountingAlgod()) is getParamsProvider(CountingAlgod())
+
+
+def test_params_dropped_after_confirmation():
+    """a call repeated after the first one confirmed is a new transaction, not the same txid again"""
+    scripts = deploy_simulated("BTCUSD")
+    scripts.tipper = scripts.reporter
+    first = [txn.get_txid() for txn in scripts.tip_txns(300_000)]
+    scripts.tip(300_000)
+    second = [txn.get_txid() for txn in scripts.tip_txns(300_000)]
+    assert not set(first) & set(second)
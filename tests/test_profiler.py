@@ -0,0 +1,69 @@
+"""Tests for the opcode cost profiler"""
+from algosdk import account
+from algosdk import encoding
+
+from src.benchmarks.opcode_costs import run
+from src.utils.account import Account
+from src.utils.testing.profiler import Profiler
+from src.utils.testing.simulator import Ledger
+from src.utils.testing.simulator import Txn
+
+PROGRAM = """#pragma version 6
+txn ApplicationID
+int 0
+==
+bnz main_l2
+int 1
+return
+main_l2:
+int 3
+callsub double_0
+pop
+int 1
+return
+double_0:
+store 0
+load 0
+load 0
++
+retsub
+"""
+
+
+def test_costs_by_line_and_helper():
+    profiler = Profiler()
+    ledger = Ledger(tracer=profiler)
+    program = ledger.register(PROGRAM)
+    sender = encoding.decode_address(Account(account.generate_account()[0]).addr)
+    ledger.balances[sender] = 10**6
+
+    ledger.execute([Txn(Sender=sender, Fee=1000, TypeEnum=6, ApprovalProgram=program, ClearStateProgram=program)])
+
+    assert dict(profiler.helpers) == {
+        # the constant block pyteal's assembler emits is paid before the first line
+        ("app 1000", "main"): 5,
+        ("app 1000", "create"): 5,
+        ("app 1000", "create/double_0"): 5,
+    }
+    assert profiler.lines[("app 1000", 9)] == [1, 1]
+    assert ("app 1000", 6) not in profiler.lines
+    assert profiler.calls == [{"program": "app 1000", "app_id": 1000, "method": "create", "cost": 15, "group": 0}]
+    assert profiler.groups() == [{"app_calls": 1, "budget": 700, "spent": 15, "remaining": 685, "app_calls_needed": 1}]
+    assert profiler.hotBlocks(1) == [("app 1000", "main_l2", 1, 5)]
+
+
+def test_report_costs():
+    profiles = run()
+
+    for fresh in range(1, 6):
+        profiler = profiles[f"report ({fresh} fresh)"]
+        assert [(call["program"], call["method"]) for call in profiler.calls] == [
+            ("feed", "report"),
+            ("medianizer", "get_values"),
+        ]
+        assert profiler.helpers[("medianizer", "get_values/Medianizer_0")] > 0
+        assert all(group["remaining"] >= 0 for group in profiler.groups())
+
+    # more fresh values take more comparisons
+    report = [profiles[f"report ({fresh} fresh)"].calls[1]["cost"] for fresh in (1, 5)]
+    assert report[0] < report[1]
@@ -0,0 +1,27 @@
+"""Tests for pipelined report submission, against the AVM simulator"""
+from concurrent.futures import ThreadPoolExecutor
+
+from src.assets.fixed_point import encode_value
+from src.benchmarks.report_path import deploy_simulated
+from src.scripts.report_pipeline import ReportPipeline
+from src.utils.state import StateReader
+
+
+def test_prepared_report_is_patched_and_confirmed():
+    scripts = deploy_simulated("BTCUSD")
+    # the simulator isn't thread safe, reports are submitted one at a time
+    pipeline = ReportPipeline(scripts, "BTCUSD", ThreadPoolExecutor(max_workers=1))
+
+    template = pipeline.prepare()
+    timestamp = scripts.client.ledger.timestamp - 10
+    txn = pipeline.fill(encode_value(30_100_123_456), timestamp)
+    assert txn.foreign_apps == template.foreign_apps == scripts.feeds + [scripts.medianizer_app_id]
+    assert txn.first_valid_round == template.first_valid_round and txn.fee == template.fee
+    assert txn.app_args[2:] == [encode_value(30_100_123_456), timestamp.to_bytes(8, "big")]
+
+    confirmed = pipeline.submit(encode_value(30_100_123_456), timestamp).result()
+    assert confirmed.confirmedRound > 0
+    feed = StateReader(scripts.client).feeds([scripts.feed_app_id])[scripts.feed_app_id]
+    assert feed.lastReport == (timestamp, 30_100_123_456)
+    # the template was rebuilt for the next report
+    assert pipeline.template() is not template
@@ -0,0 +1,204 @@
+"""Tests for the reporter: the deviation and heartbeat gate of a feed, and loading and scheduling feeds"""
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+from box import Box
+
+from src.assets.asset import Asset
+from src.scripts import reporter as reporter_module
+from src.scripts.reporter import FeedReporter
+from src.scripts.reporter import Reporter
+from src.scripts.reporter import TIMESTAMP_OFFSET
+
+
+class FixedAsset(Asset):
+    """Asset whose single source answers `next_price`"""
+
+    next_price = 0
+
+    def fetch_price_from_sources(self, source):
+        return self.next_price
+
+
+class RecordingScripts:
+    feed_app_id = 1
+
+    def __init__(self) -> None:
+        self.reports = []
+
+    def report(self, query_id, value, timestamp):
+        self.reports.append((value, timestamp))
+
+
+def feed_reporter(last_report, deviation_threshold=50):
+    asset = FixedAsset(query_id="BTCUSD", sources={"fixed": {}})
+    scripts = RecordingScripts()
+    feed = FeedReporter("BTCUSD", asset, scripts, 3600, deviation_threshold, poll_interval=30, last_report=last_report)
+    return feed, asset, scripts
+
+
+def test_small_moves_are_skipped():
+    feed, asset, scripts = feed_reporter((int(time.time()) - TIMESTAMP_OFFSET, 1_000_000))
+
+    asset.next_price = 1_004_000
+    assert feed.poll() is None
+    assert scripts.reports == []
+
+    asset.next_price = 1_006_000
+    assert feed.poll() == 1_006_000
+    [(value, _)] = scripts.reports
+    assert value == (1_006_000).to_bytes(8, "big")
+
+    # later moves are measured from the value just reported
+    asset.next_price = 1_002_000
+    assert feed.poll() is None
+    assert feed.next_poll(time.time()) == 30
+
+
+def test_heartbeat():
+    """a stale or missing last_value is replaced whatever the price"""
+    feed, asset, scripts = feed_reporter((int(time.time()) - 3600, 1_000_000))
+    asset.next_price = 1_000_000
+    assert feed.should_report(1_000_000, time.time()) == "heartbeat"
+    assert feed.poll() == 1_000_000
+    assert 3000 < feed.heartbeat_due(time.time()) <= feed.interval
+
+    feed, asset, scripts = feed_reporter(None)
+    assert feed.should_report(1_000_000, time.time()) == "heartbeat"
+
+
+def test_ungated_reports_every_poll():
+    feed, asset, scripts = feed_reporter((int(time.time()) - TIMESTAMP_OFFSET, 1_000_000), deviation_threshold=None)
+    asset.next_price = 1_000_000
+    assert feed.poll() == 1_000_000
+    assert feed.next_poll(time.time()) == feed.interval
+
+
+class FailingPipeline:
+    def prepare_async(self):
+        pass
+
+    def submit(self, value, timestamp):
+        future = Future()
+        future.set_exception(RuntimeError("rejected"))
+        return future
+
+
+def test_failed_pipelined_report_is_retried():
+    last_report = (int(time.time()) - TIMESTAMP_OFFSET, 1_000_000)
+    feed, asset, scripts = feed_reporter(last_report)
+    feed.pipeline = FailingPipeline()
+
+    asset.next_price = 1_006_000
+    assert feed.poll() == 1_006_000
+    # the gate compares against the last report that made it on chain
+    assert (asset.time_last_pushed, asset.last_pushed_price) == last_report
+    assert feed.should_report(1_006_000, time.time()) is not None
+
+
+class FakeClock:
+    """stands in for the time module of the reporter, sleeping only moves `now`"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeStateReader:
+    """answers feed state from `states`, app id -> (reporter address, timestamp_freshness)"""
+
+    states = {}
+
+    def __init__(self, client):
+        pass
+
+    def feeds(self, feed_ids):
+        feeds = {}
+        for feed_id in feed_ids:
+            reporter, freshness = self.states[feed_id]
+            feeds[feed_id] = SimpleNamespace(reporterAddress=reporter, timestampFreshness=freshness, lastReport=None)
+        return feeds
+
+
+class FakeScripts:
+    def __init__(self, **kwargs):
+        self.feed_app_id = kwargs["feed_app_id"]
+        self.medianizer_app_id = kwargs["medianizer_app_id"]
+        self.feeds = []
+
+
+@pytest.fixture
+def reporter_config(monkeypatch):
+    monkeypatch.setattr(reporter_module, "Scripts", FakeScripts)
+    monkeypatch.setattr(reporter_module, "StateReader", FakeStateReader)
+    monkeypatch.setattr(reporter_module, "BlockWatcher", lambda client: None)
+    monkeypatch.setattr(FakeStateReader, "states", {1: ("OTHER", 3600), 2: ("REPORTER", 3600), 3: ("OTHER", 600)})
+
+    app_ids = {"feeds": {"testnet": [1, 2]}, "medianizer": {"testnet": 10}}
+    return Box(
+        {
+            "governance_address": "GOVERNANCE",
+            "feeds": {
+                "BTCUSD": {"app_ids": app_ids},
+                "ETHUSD": {"app_ids": {"feeds": {"testnet": [3]}, "medianizer": {"testnet": 11}}},
+                "ALGOUSD": {"app_ids": {"feeds": {"mainnet": [1]}, "medianizer": {"mainnet": 10}}},
+                "SOLUSD": {"app_ids": app_ids},
+                "NOAPPS": {},
+            },
+            "apis": {"BTCUSD": {"fixed": {}}, "ETHUSD": {"fixed": {}}, "ALGOUSD": {"fixed": {}}},
+        }
+    )
+
+
+def test_load_feeds_skips_feeds_it_cant_report_to(reporter_config):
+    reporter = Reporter(None, SimpleNamespace(addr="REPORTER"), reporter_config, "testnet")
+
+    # ETHUSD has no feed staked by the reporter, ALGOUSD no apps on testnet, SOLUSD no sources, NOAPPS no apps
+    assert list(reporter.feeds) == ["BTCUSD"]
+    feed = reporter.feeds["BTCUSD"]
+    assert (feed.scripts.feed_app_id, feed.scripts.medianizer_app_id, feed.scripts.feeds) == (2, 10, [1, 2])
+    assert feed.timestamp_freshness == 3600
+
+
+def test_load_feeds_with_feed_index(reporter_config):
+    reporter_config.feed_index = 0
+    reporter = Reporter(None, SimpleNamespace(addr="REPORTER"), reporter_config, "testnet")
+
+    # the picked feed is used whoever is staked on it
+    assert sorted(reporter.feeds) == ["BTCUSD", "ETHUSD"]
+    assert reporter.feeds["BTCUSD"].scripts.feed_app_id == 1
+    assert reporter.feeds["ETHUSD"].scripts.feed_app_id == 3
+
+
+def test_run_retries_a_failed_poll_after_error_waittime(reporter_config, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(reporter_module, "time", clock)
+    reporter_config.error_waittime = 20
+    reporter = Reporter(None, SimpleNamespace(addr="REPORTER"), reporter_config, "testnet")
+    feed = reporter.feeds["BTCUSD"]
+
+    polls = []
+
+    def poll():
+        polls.append(clock.now)
+        if len(polls) == 1:
+            raise ConnectionError("source down")
+        return 1_000_000
+
+    monkeypatch.setattr(feed, "poll", poll)
+    reporter.run(iterations=3)
+
+    start = polls[0]
+    assert polls == [start, start + 20, start + 20 + feed.interval]
+
+
+def test_run_without_feeds(reporter_config):
+    with pytest.raises(ValueError):
+        Reporter(None, SimpleNamespace(addr="REPORTER"), reporter_config, "devnet").run(iterations=1)
@@ -0,0 +1,78 @@
+"""Tests for the shared HTTP session, with both the httpx and requests backends against a local server"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.utils import sessions
+
+
+class PriceHandler(BaseHTTPRequestHandler):
+    """serves a price at /price, a redirect to it at /moved and 404 elsewhere"""
+
+    def do_GET(self):
+        if self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", "/price")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path != "/price":
+            self.send_error(404)
+            return
+        body = json.dumps({"price": "30100.5", "token": self.headers.get("X-Token")}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PriceHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(params=["httpx", "requests"])
+def backend(request, monkeypatch):
+    """a fresh shared session of each backend"""
+    if request.param == "httpx":
+        if sessions.httpx is None:
+            pytest.skip("httpx and h2 aren't installed")
+    else:
+        monkeypatch.setattr(sessions, "httpx", None)
+    sessions.close_session()
+    yield request.param
+    sessions.close_session()
+
+
+def test_http_get(server, backend):
+    response = sessions.http_get(f"{server}/price", timeout=5, headers={"X-Token": "abc"})
+    assert response.json() == {"price": "30100.5", "token": "abc"}
+    assert type(sessions.get_session()).__module__.startswith(backend)
+
+
+def test_session_is_shared(server, backend):
+    session = sessions.get_session()
+    sessions.http_get(f"{server}/price", timeout=5)
+    assert sessions.get_session() is session
+
+
+def test_redirects_are_followed(server, backend):
+    assert sessions.http_get(f"{server}/moved", timeout=5).json()["price"] == "30100.5"
+
+
+def test_http_errors_raise(server, backend):
+    with pytest.raises(Exception) as error:
+        sessions.http_get(f"{server}/missing", timeout=5)
+    assert "404" in str(error.value)
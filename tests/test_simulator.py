@@ -0,0 +1,367 @@
+"""Contract behaviour tests against the in-process AVM simulator, no sandbox needed"""
+import random
+import statistics
+
+import pytest
+from algosdk import account
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future.transaction import Multisig
+from pyteal import compileTeal
+from pyteal import Mode
+from pyteal.compiler.compiler import MAX_TEAL_VERSION
+
+from conftest import App
+from src.contracts import contracts
+from src.contracts import medianizer_contract
+from src.contracts import multi_medianizer_contract
+from src.contracts.medianizer_contract import MAX_FEED_COUNT
+from src.scripts.scripts import Scripts
+from src.utils.account import Account
+from src.utils.testing.simulator import Ledger
+from src.utils.testing.simulator import SimulatedAlgod
+from src.utils.testing.simulator import SimulationError
+from src.utils.testing.simulator import Txn
+from src.utils.util import getAppGlobalState
+from src.utils.watcher import BlockWatcher
+
+QUERY_ID = "1"
+TIMESTAMP_FRESHNESS = 3600
+
+
+PROGRAMS = [
+    contracts.approval_program,
+    contracts.clear_state_program,
+    medianizer_contract.approval_program,
+    medianizer_contract.clear_state_program,
+]
+
+
+class Sim:
+    """a simulated network with the feeds and medianizer of one query_id deployed"""
+
+    def __init__(self, programs) -> None:
+        self.client = SimulatedAlgod(Ledger(timestamp=1_700_000_000))
+        self.ledger = self.client.ledger
+        for teal in programs:
+            self.ledger.register(teal)
+
+        self.tipper, self.bad_actor, *self.reporters = [self.account() for _ in range(7)]
+        self.signers = [self.account() for _ in range(3)]
+        self.signers_sk = [signer.getPrivateKey() for signer in self.signers]
+        self.governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in self.signers])
+        self.ledger.fund(self.governance.address(), 10**10)
+
+        deployer = Scripts(self.client, self.tipper, None, self.governance.address(), contract_count=5)
+        feed_ids, medianizer_id = deployer.deploy_batched(QUERY_ID, "query data", TIMESTAMP_FRESHNESS, self.signers_sk)
+        self.app = App(feed_ids, medianizer_id)
+
+        # one staked reporter per feed
+        self.scripts = []
+        for feed_id, reporter in zip(feed_ids, self.reporters):
+            scripts = Scripts(self.client, self.tipper, reporter, self.governance.address(), feed_id, medianizer_id)
+            scripts.feeds = feed_ids
+            scripts.stake()
+            self.scripts.append(scripts)
+
+    def account(self) -> Account:
+        new = Account(account.generate_account()[0])
+        self.ledger.fund(new.addr, 10**10)
+        return new
+
+    def report(self, feed: int, value: int, age: int = 10) -> None:
+        self.scripts[feed].report(QUERY_ID.encode(), value, self.ledger.timestamp - age)
+
+    def state(self, app_id: int):
+        return getAppGlobalState(self.client, app_id)
+
+
+@pytest.fixture(scope="module")
+def programs():
+    """TEAL of the contracts, compiled once per module"""
+    return [compileTeal(build(), mode=Mode.Application, version=MAX_TEAL_VERSION) for build in PROGRAMS]
+
+
+@pytest.fixture
+def sim(programs):
+    return Sim(programs)
+
+
+def test_deploy(sim: Sim):
+    """deployed state matches what the sandbox fixture expects"""
+    for i, feed_id in enumerate(sim.app.feed_ids):
+        state = sim.state(feed_id)
+        assert state[b"governance_address"] == encoding.decode_address(sim.governance.address())
+        assert state[b"medianizer"] == sim.app.medianizer_id
+        assert state[b"staking_status"] == 1
+        assert state[b"reporter_address"] == encoding.decode_address(sim.reporters[i].addr)
+
+    medianizer = sim.state(sim.app.medianizer_id)
+    assert medianizer[b"query_id"] == QUERY_ID.encode()
+    assert medianizer[b"app_1"] == encoding.decode_address(sim.scripts[0].feed_app_address)
+
+
+def test_create_rejects_short_freshness(sim: Sim):
+    """the create() assert fails at the same pc algod reports, which deploy.py relies on"""
+    deployer = Scripts(sim.client, sim.tipper, None, sim.governance.address(), contract_count=5)
+    with pytest.raises(AlgodHTTPError, match="pc=763"):
+        deployer.deploy_tellor_flex(QUERY_ID, "query data", 119, sim.signers_sk)
+
+
+def test_report_pays_tip(sim: Sim):
+    scripts = sim.scripts[0]
+    scripts.tip(1_000_000)
+    reporter_before = sim.ledger.balance(scripts.reporter.addr)
+    governance_before = sim.ledger.balance(sim.governance.address())
+
+    sim.report(0, 3500)
+
+    # 98% of the tip minus the report fee to the reporter, 2% to governance
+    assert sim.ledger.balance(scripts.reporter.addr) == reporter_before + 980_000 - 1000
+    assert sim.ledger.balance(sim.governance.address()) == governance_before + 20_000
+    assert sim.state(scripts.feed_app_id)[b"tip_amount"] == 0
+
+    medianizer = sim.state(sim.app.medianizer_id)
+    assert medianizer[b"median"] == 3500
+    assert medianizer[b"median_timestamp"] == sim.ledger.timestamp - 4 - 10
+
+
+def test_rejected_group_is_atomic(sim: Sim):
+    """a stake with the wrong amount fails as a whole, the payment isn't applied either"""
+    scripts = Scripts(sim.client, sim.tipper, sim.bad_actor, sim.governance.address(), sim.app.feed_ids[0])
+    before = sim.ledger.balance(sim.bad_actor.addr)
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        scripts.stake(stake_amount=1)
+    assert sim.ledger.balance(sim.bad_actor.addr) == before
+
+
+def test_only_reporter_can_report(sim: Sim):
+    scripts = sim.scripts[0]
+    scripts.reporter = sim.bad_actor
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        sim.report(0, 3500)
+
+
+def test_stale_values_are_ignored(sim: Sim):
+    sim.report(0, 100)
+    sim.ledger.advance(TIMESTAMP_FRESHNESS + 1)
+    sim.report(1, 300)
+
+    assert sim.state(sim.app.medianizer_id)[b"median"] == 300
+
+
+def test_median_property(sim: Sim):
+    """the medianizer agrees with the median of the fresh reported values"""
+    rng = random.Random(0)
+    for _ in range(50):
+        sim.ledger.advance(TIMESTAMP_FRESHNESS + 1)
+        count = rng.randint(1, 5)
+        # distinct values: the current sort picks the wrong middle value on ties
+        values = rng.sample(range(1, 10**12), count)
+        for feed, value in zip(rng.sample(range(5), count), values):
+            sim.report(feed, value)
+
+        expected = statistics.median(values)
+        assert sim.state(sim.app.medianizer_id)[b"median"] == int(expected)
+
+
+@pytest.mark.parametrize("feed_count", [1, 3, MAX_FEED_COUNT])
+def test_feed_counts(feed_count):
+    """contracts and scripts built for any number of feeds up to the foreign reference limit"""
+    ledger = Ledger(timestamp=1_700_000_000)
+    client = SimulatedAlgod(ledger)
+    for program in (
+        contracts.approval_program(feed_count),
+        contracts.clear_state_program(),
+        medianizer_contract.approval_program("network", feed_count),
+        medianizer_contract.clear_state_program(),
+    ):
+        ledger.registerContract(program)
+
+    signers = [Account(account.generate_account()[0]) for _ in range(2)]
+    governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in signers])
+    ledger.fund(governance.address(), 10**10)
+    deployer = Scripts(client, None, None, governance.address(), contract_count=feed_count, median_strategy="network")
+    feed_ids, medianizer_id = deployer.deploy_batched(
+        QUERY_ID, "query data", TIMESTAMP_FRESHNESS, [signer.getPrivateKey() for signer in signers]
+    )
+    assert len(feed_ids) == feed_count
+
+    values = list(range(100, 100 * (feed_count + 1), 100))
+    for feed_id, value in zip(feed_ids, values):
+        reporter = Account(account.generate_account()[0])
+        ledger.fund(reporter.addr, 10**10)
+        scripts = Scripts(client, None, reporter, governance.address(), feed_id, medianizer_id)
+        scripts.feeds = feed_ids
+        scripts.stake()
+        scripts.report(QUERY_ID.encode(), value, ledger.timestamp - 10)
+
+    assert getAppGlobalState(client, medianizer_id)[b"median"] == int(statistics.median(values))
+
+
+def test_feed_count_limit():
+    with pytest.raises(ValueError, match="feed_count"):
+        medianizer_contract.approval_program("network", MAX_FEED_COUNT + 1)
+    with pytest.raises(ValueError, match="legacy median"):
+        medianizer_contract.approval_program("legacy", 3)
+
+
+def test_history():
+    """a feed with a history keeps its last history_size reports, readable by time range"""
+    history_size = 10
+    ledger = Ledger(timestamp=1_700_000_000)
+    client = SimulatedAlgod(ledger)
+    for program in (
+        contracts.approval_program(1, history_size=history_size),
+        contracts.clear_state_program(),
+        medianizer_contract.approval_program("network", 1),
+        medianizer_contract.clear_state_program(),
+    ):
+        ledger.registerContract(program)
+
+    signers = [Account(account.generate_account()[0]) for _ in range(2)]
+    governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in signers])
+    ledger.fund(governance.address(), 10**10)
+    deployer = Scripts(
+        client, None, None, governance.address(), contract_count=1, median_strategy="network", history_size=history_size
+    )
+    [feed_id], medianizer_id = deployer.deploy_batched(
+        QUERY_ID, "query data", TIMESTAMP_FRESHNESS, [signer.getPrivateKey() for signer in signers]
+    )
+    reporter = Account(account.generate_account()[0])
+    ledger.fund(reporter.addr, 10**10)
+    scripts = Scripts(client, None, reporter, governance.address(), feed_id, medianizer_id)
+    scripts.feeds = [feed_id]
+    scripts.stake()
+    assert scripts.get_history() == []
+
+    reports = []
+    for value in range(1, 14):
+        reports.append((ledger.timestamp - 10, value))
+        scripts.report(QUERY_ID.encode(), value, reports[-1][0])
+
+    assert getAppGlobalState(client, feed_id)[b"history_count"] == 13
+    assert scripts.get_history() == reports[-history_size:]
+    assert scripts.get_history(start=reports[5][0], end=reports[8][0]) == reports[5:9]
+    assert scripts.get_current_feeds() == {feed_id: {"timestamp": reports[-1][0], "value": 13}}
+
+
+def test_multi_query_medianizer():
+    """one medianizer keeps the median of every query_id, reported to by that query_id's feeds only"""
+    feed_count = 3
+    ledger = Ledger(timestamp=1_700_000_000)
+    client = SimulatedAlgod(ledger)
+    for program in (
+        contracts.approval_program(feed_count, multi_query=True),
+        contracts.clear_state_program(),
+        multi_medianizer_contract.approval_program("network", feed_count),
+        multi_medianizer_contract.clear_state_program(),
+    ):
+        ledger.registerContract(program)
+
+    signers = [Account(account.generate_account()[0]) for _ in range(2)]
+    signers_sk = [signer.getPrivateKey() for signer in signers]
+    governance = Multisig(version=1, threshold=2, addresses=[signer.addr for signer in signers])
+    ledger.fund(governance.address(), 10**10)
+    deployer = Scripts(
+        client, None, None, governance.address(), contract_count=feed_count, median_strategy="network", multi_query=True
+    )
+    medianizer_id = deployer.deploy_multi_medianizer(TIMESTAMP_FRESHNESS, signers_sk)
+
+    query_values = {"BTCUSD": [30000, 31000, 29000], "ETHUSD": [2000, 2100]}
+    reporters = {}
+    for query_id in query_values:
+        feed_ids = deployer.deploy_query(query_id, "query data", TIMESTAMP_FRESHNESS, signers_sk)
+        assert deployer.get_query_median(query_id.encode()) == (0, 0)
+        reporters[query_id] = []
+        for feed_id in feed_ids:
+            reporter = Account(account.generate_account()[0])
+            ledger.fund(reporter.addr, 10**10)
+            scripts = Scripts(client, None, reporter, governance.address(), feed_id, medianizer_id, multi_query=True)
+            scripts.feeds = feed_ids
+            scripts.stake()
+            reporters[query_id].append(scripts)
+
+    timestamps = {}
+    for query_id, values in query_values.items():
+        for scripts, value in zip(reporters[query_id], values):
+            timestamps[query_id] = ledger.timestamp
+            timestamps[value] = ledger.timestamp - 10
+            scripts.report(query_id.encode(), value, timestamps[value])
+
+    # the timestamp of the feed holding the median, the time of the last report if no feed does
+    assert deployer.get_query_median(b"BTCUSD") == (30000, timestamps[30000])
+    assert deployer.get_query_median(b"ETHUSD") == (2050, timestamps["ETHUSD"])
+
+    # a feed can't pass off the feeds of another query_id as its own
+    impostor = reporters["ETHUSD"][0]
+    impostor.feeds = reporters["BTCUSD"][0].feeds
+    with pytest.raises(AlgodHTTPError):
+        impostor.report(b"ETHUSD", 1, ledger.timestamp - 10)
+
+    deployer.remove_query(b"BTCUSD", signers_sk)
+    assert multi_medianizer_contract.query_key(b"BTCUSD") not in getAppGlobalState(client, medianizer_id)
+    with pytest.raises(AlgodHTTPError):
+        reporters["BTCUSD"][0].report(b"BTCUSD", 30000, ledger.timestamp - 10)
+
+
+def test_watcher_confirms_from_simulated_blocks(sim: Sim):
+    """blocks served by the simulator hash to the ids of the transactions sent"""
+    watcher = BlockWatcher(sim.client)
+    sim.scripts[0].watcher = watcher
+    sim.report(0, 42)
+    assert sim.state(sim.app.medianizer_id)[b"median"] == 42
+
+
+def test_raw_noop_call(sim: Sim):
+    """a NoOp app call sent as msgpack, which leaves out its zero OnCompletion, is applied"""
+    scripts = sim.scripts[0]
+    txn = scripts.report_txn(QUERY_ID.encode(), 77, sim.ledger.timestamp - 10)
+    signed = txn.sign(scripts.reporter.getPrivateKey())
+    sim.client.send_raw_transaction(encoding.msgpack_encode(signed))
+    assert sim.state(sim.app.medianizer_id)[b"median"] == 77
+
+
+def test_duplicate_txid_rejected(sim: Sim):
+    """a transaction already confirmed is rejected like algod does, even with a signature over the same bytes"""
+    scripts = sim.scripts[0]
+    signed = scripts.report_txn(QUERY_ID.encode(), 77, sim.ledger.timestamp - 10).sign(scripts.reporter.getPrivateKey())
+    sim.client.send_transaction(signed)
+    with pytest.raises(AlgodHTTPError, match="already in ledger") as error:
+        sim.client.send_transaction(signed)
+    assert error.value.code == 400
+
+
+def test_opcode_budget():
+    ledger = Ledger()
+    loop = "#pragma version 6\nint 0\nloop:\nint 1\n+\ndup\nint 200\n<\nbnz loop\n"
+    program = ledger.register(loop)
+    sender = Account(account.generate_account()[0])
+    ledger.fund(sender.addr, 10**6)
+    create = Txn(
+        Sender=encoding.decode_address(sender.addr),
+        Fee=1000,
+        TypeEnum=6,
+        ApprovalProgram=program,
+        ClearStateProgram=program,
+    )
+    with pytest.raises(SimulationError, match="dynamic cost budget exceeded"):
+        ledger.execute([create])
+
+    # a second app call in the group doubles the pooled budget
+    padding = Txn(Sender=create.get("Sender"), Fee=1000, TypeEnum=6, ApplicationID=999)
+    with pytest.raises(SimulationError, match="application 999 does not exist"):
+        ledger.execute([create, padding])
+    assert ledger.balance(sender.addr) == 10**6
+
+
+def test_program_errors_are_located():
+    ledger = Ledger()
+    program = ledger.register("#pragma version 6\nint 0\nint 1\n-\n")
+    sender = encoding.decode_address(Account(account.generate_account()[0]).addr)
+    ledger.balances[sender] = 10**6
+
+    with pytest.raises(SimulationError) as e:
+        ledger.execute([Txn(Sender=sender, Fee=1000, TypeEnum=6, ApprovalProgram=program, ClearStateProgram=program)])
+    assert e.value.line == 4
+    assert "- would result negative" in str(e.value)
@@ -0,0 +1,112 @@
+"""Tests for the shared price source cache and response parsing"""
+import threading
+import time
+
+import pytest
+
+from src.utils.extract import compile_path
+from src.utils.extract import loads
+from src.utils.source_cache import SourceCache
+
+BITCOIN = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
+ETHEREUM = "https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd"
+
+
+class CountingSource:
+    """answers every url with a new price after a delay, counting the requests"""
+
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, url, timeout):
+        self.requests.append(url)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("source is down")
+        return {"price": len(self.requests)}
+
+
+def test_fresh_response_is_reused():
+    source = CountingSource()
+    cache = SourceCache(source)
+
+    assert cache.get_json("https://a/price", ttl=60) == {"price": 1}
+    assert cache.get_json("https://a/price", ttl=60) == {"price": 1}
+    assert cache.get_json("https://b/price", ttl=60) == {"price": 2}
+    assert cache.get_json("https://a/price", ttl=0, stale_ttl=0) == {"price": 3}
+    assert len(source.requests) == 3
+
+
+def test_concurrent_requests_coalesce():
+    source = CountingSource(delay=0.2)
+    cache = SourceCache(source)
+    responses = []
+
+    threads = [
+        threading.Thread(target=lambda: responses.append(cache.get_json("https://a/price", timeout=1)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.requests == ["https://a/price"]
+    assert responses == [{"price": 1}] * 8
+
+
+def test_stale_while_revalidate():
+    source = CountingSource(delay=0.1)
+    cache = SourceCache(source)
+    assert cache.get_json("https://a/price", ttl=0.05, stale_ttl=60) == {"price": 1}
+    time.sleep(0.1)
+
+    # the stale response is served at once while one request refreshes it
+    start = time.monotonic()
+    assert cache.get_json("https://a/price", ttl=0.05, stale_ttl=60) == {"price": 1}
+    assert cache.get_json("https://a/price", ttl=0.05, stale_ttl=60) == {"price": 1}
+    assert time.monotonic() - start < 0.05
+    time.sleep(0.2)
+
+    assert cache.get_json("https://a/price", ttl=0.05, stale_ttl=60) == {"price": 2}
+    assert len(source.requests) == 2
+
+
+def test_failures_are_not_cached():
+    source = CountingSource()
+    source.fail = True
+    cache = SourceCache(source)
+
+    with pytest.raises(ConnectionError):
+        cache.get_json("https://a/price")
+    source.fail = False
+    assert cache.get_json("https://a/price") == {"price": 2}
+
+
+def test_coingecko_ids_are_merged():
+    source = CountingSource()
+    cache = SourceCache(source)
+    cache.register(BITCOIN)
+    cache.register(ETHEREUM)
+    cache.register("https://api.coingecko.com/api/v3/simple/price?ids=dai&vs_currencies=usd")
+
+    merged = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,dai,ethereum&vs_currencies=usd"
+    assert cache.request_url(BITCOIN) == cache.request_url(ETHEREUM) == merged
+    assert cache.request_url("https://api.binance.com/api/v3/ticker/price?symbol=ALGOUSDT").endswith("ALGOUSDT")
+
+    cache.get_json(BITCOIN)
+    cache.get_json(ETHEREUM)
+    assert source.requests == [merged]
+
+
+def test_compiled_paths():
+    kraken = loads(b'{"error":[],"result":{"TBTCUSD":{"a":["1"],"c":["30100.5","0.01"]}}}')
+
+    assert compile_path(["result", "TBTCUSD", "c", 0])(kraken) == "30100.5"
+    assert compile_path(["result", "TBTCUSD", "c", "1"])(kraken) == "0.01"
+    assert compile_path(["error"])(kraken) == []
+    assert compile_path(("result", "TBTCUSD", "c", 0)) is compile_path(["result", "TBTCUSD", "c", 0])
+    with pytest.raises(KeyError, match="TBTCUSDT"):
+        compile_path(["result", "TBTCUSDT", "c", 0])(kraken)
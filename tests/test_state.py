@@ -0,0 +1,127 @@
+"""Tests for the bulk state reader, against feeds and a medianizer on the AVM simulator"""
+import json
+import threading
+from base64 import b64encode
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from algosdk import encoding
+from algosdk.v2client.algod import AlgodClient
+
+from src.benchmarks.report_path import deploy_simulated
+from src.benchmarks.report_path import TIMESTAMP_OFFSET
+from src.utils.state import decodeRecords
+from src.utils.state import FeedState
+from src.utils.state import MedianizerState
+from src.utils.state import StateReader
+from src.utils.util import decodeReport
+
+QUERY_ID = "BTCUSD"
+
+
+@pytest.fixture
+def scripts():
+    scripts = deploy_simulated(QUERY_ID)
+    scripts.report(QUERY_ID.encode(), 42, scripts.client.ledger.timestamp - TIMESTAMP_OFFSET)
+    return scripts
+
+
+def test_read_query(scripts):
+    reader = StateReader(scripts.client)
+    feeds, medianizer = reader.readQuery(scripts.feeds, scripts.medianizer_app_id)
+
+    assert list(feeds) == scripts.feeds
+    reported = feeds[scripts.feed_app_id]
+    assert reported.queryID == QUERY_ID.encode()
+    assert reported.reporterAddress == scripts.reporter.addr
+    assert reported.stakingStatus == 1
+    assert reported.medianizerID == scripts.medianizer_app_id
+    assert reported.lastValue == 42
+    assert all(feed.lastValue is None and feed.reporterAddress is None for feed in list(feeds.values())[1:])
+
+    assert medianizer.median == 42
+    assert medianizer.medianTimestamp == reported.lastTimestamp
+    assert medianizer.feedAddresses[0] == scripts.feed_app_address
+    assert len(medianizer.feedAddresses) == len(scripts.feeds)
+    reader.close()
+
+
+def test_ttl_cache(scripts):
+    reader = StateReader(scripts.client, ttl=60)
+    assert reader.medianizer(scripts.medianizer_app_id).median == 42
+
+    scripts.report(QUERY_ID.encode(), 43, scripts.client.ledger.timestamp - TIMESTAMP_OFFSET)
+    assert reader.medianizer(scripts.medianizer_app_id).median == 42
+
+    reader.invalidate([scripts.medianizer_app_id])
+    assert reader.medianizer(scripts.medianizer_app_id).median == 43
+
+
+def entry(key: bytes, value):
+    """a global state entry as algod returns it"""
+    if isinstance(value, int):
+        return {"key": b64encode(key).decode(), "value": {"type": 2, "uint": value}}
+    return {"key": b64encode(key).decode(), "value": {"type": 1, "bytes": b64encode(value).decode()}}
+
+
+def test_decode_selected_fields(scripts):
+    reader = StateReader(scripts.client)
+    feed = reader.feeds([scripts.feed_app_id], fields=["lastReport"])[scripts.feed_app_id]
+    full = reader.feeds([scripts.feed_app_id])[scripts.feed_app_id]
+
+    assert feed.lastReport == full.lastReport == (full.lastTimestamp, 42)
+    assert feed.queryID == b"" and feed.reporterAddress is None and feed.stakingStatus == 0
+    assert full.queryID == QUERY_ID.encode()
+
+
+def test_decode_records():
+    assert decodeReport((1_700_000_000).to_bytes(8, "big") + (42).to_bytes(8, "big")) == (1_700_000_000, 42)
+
+    history = b"".join((ts).to_bytes(8, "big") + (ts * 2).to_bytes(8, "big") for ts in (30, 10, 20, 0, 0, 0, 0))
+    feed_state = [entry(b"history_\x00", history), entry(b"history_count", 3), entry(b"tip_amount", 5)]
+    feeds = decodeRecords(FeedState, [(app_id, feed_state) for app_id in range(1000)])
+    assert [feed.appID for feed in feeds] == list(range(1000))
+    assert all(feed.history == [(10, 20), (20, 40), (30, 60)] and feed.tipAmount == 5 for feed in feeds)
+    [feed] = decodeRecords(FeedState, [(1, feed_state)], fields=["tipAmount"])
+    assert feed.history == [] and feed.tipAmount == 5
+
+    medianizer_state = [
+        entry(b"app_2", bytes(range(32))),
+        entry(b"app_1", bytes(32)),
+        entry(b"q:ETHUSD", bytes(40) + (2050).to_bytes(8, "big") + (99).to_bytes(8, "big")),
+    ]
+    [medianizer] = decodeRecords(MedianizerState, [(7, medianizer_state)])
+    assert medianizer.feedAddresses == [encoding.encode_address(bytes(32)), encoding.encode_address(bytes(range(32)))]
+    assert medianizer.queries == {b"ETHUSD": (2050, 99)}
+
+
+def test_reads_algod_over_http(scripts):
+    """an AlgodClient is read over the shared session, with its token"""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            requests.append((self.path, self.headers.get("X-Algo-API-Token")))
+            app_id = int(self.path.rsplit("/", 1)[1])
+            body = json.dumps(scripts.client.application_info(app_id)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = AlgodClient("token", f"http://127.0.0.1:{server.server_address[1]}")
+        feeds = StateReader(client).feeds(scripts.feeds)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert feeds[scripts.feed_app_id].lastValue == 42
+    assert sorted(requests) == sorted((f"/v2/applications/{app_id}", "token") for app_id in scripts.feeds)
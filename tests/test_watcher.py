@@ -0,0 +1,93 @@
+"""Tests for confirming transactions through a shared BlockWatcher"""
+import base64
+
+import msgpack
+import pytest
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+
+from src.utils.watcher import blockTxIDs
+from src.utils.watcher import BlockWatcher
+
+GENESIS_HASH = "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI="
+GENESIS_ID = "testnet-v1.0"
+
+
+def signed_txn(note: bytes) -> transaction.SignedTransaction:
+    """a signed app call like the ones Scripts sends"""
+    sk, addr = account.generate_account()
+    sp = transaction.SuggestedParams(fee=1000, first=1, last=1001, gh=GENESIS_HASH, gen=GENESIS_ID, flat_fee=True)
+    txn = transaction.ApplicationNoOpTxn(addr, sp, 5, app_args=[b"report", 40000], foreign_apps=[1, 2], note=note)
+    return txn.sign(sk)
+
+
+def encode_block(stxns) -> bytes:
+    """msgpack block with transactions stored the way algod stores them"""
+    txns = []
+    for stxn in stxns:
+        d = msgpack.unpackb(base64.b64decode(encoding.msgpack_encode(stxn)), raw=False)
+        del d["txn"]["gh"]
+        del d["txn"]["gen"]
+        d["hgi"] = True
+        txns.append(d)
+    block = {"gen": GENESIS_ID, "gh": base64.b64decode(GENESIS_HASH), "txns": txns}
+    return msgpack.packb({"block": block}, use_bin_type=True)
+
+
+class FakeAlgod:
+    """algod stand-in whose chain gains a block every time a later round is awaited"""
+
+    def __init__(self, blocks) -> None:
+        self.blocks = blocks
+        self.last_round = 10
+        self.blocks_read = []
+        self.lookups = 0
+
+    def status(self):
+        return {"last-round": self.last_round}
+
+    def status_after_block(self, round):
+        self.last_round = max(self.last_round, round + 1)
+        return {"last-round": self.last_round}
+
+    def block_info(self, round, response_format="json"):
+        self.blocks_read.append(round)
+        return encode_block(self.blocks.get(round, []))
+
+    def pending_transaction_info(self, txid):
+        self.lookups += 1
+        for round, stxns in self.blocks.items():
+            if any(s.get_txid() == txid for s in stxns):
+                return {"pool-error": "", "txn": {}, "confirmed-round": round}
+        return {"pool-error": "", "txn": {}}
+
+
+def test_block_txids():
+    """ids computed from a block match the ids of the signed transactions"""
+    stxns = [signed_txn(b"a"), signed_txn(b"b")]
+    assert blockTxIDs(encode_block(stxns)) == [s.get_txid() for s in stxns]
+
+
+def test_many_transactions_one_stream():
+    """transactions in flight together are confirmed from the same blocks"""
+    stxns = [signed_txn(str(i).encode()) for i in range(5)]
+    algod = FakeAlgod({11: stxns[:2], 12: stxns[2:]})
+    watcher = BlockWatcher(algod)
+
+    futures = [watcher.watch(s.get_txid()) for s in stxns]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert [r.confirmedRound for r in results] == [11, 11, 12, 12, 12]
+    # each block is read once for all waiters, and each txid is looked up once when found
+    assert len(algod.blocks_read) == len(set(algod.blocks_read))
+    assert algod.lookups == len(stxns)
+
+
+def test_unconfirmed_transaction_times_out():
+    """a transaction missing from every block fails after `timeout` rounds"""
+    algod = FakeAlgod({})
+    watcher = BlockWatcher(algod)
+
+    with pytest.raises(Exception, match="not confirmed"):
+        watcher.wait(signed_txn(b"lost").get_txid(), timeout=3)